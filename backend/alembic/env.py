@@ -15,6 +15,7 @@ from app.models.settings import UserSettings
 from app.models.session import UserSession
 from app.models.friendship import Friendship
 from app.models.message import Message
+from app.models.conversation import Conversation
 from app.models.block import Block
 from app.models.note import Note
 from app.models.file import File
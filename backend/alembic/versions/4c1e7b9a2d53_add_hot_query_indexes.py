@@ -0,0 +1,51 @@
+"""add_hot_query_indexes
+
+Revision ID: 4c1e7b9a2d53
+Revises: 873d00de896c
+Create Date: 2026-10-18 18:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '4c1e7b9a2d53'
+down_revision: Union[str, Sequence[str], None] = '873d00de896c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index adı, tablo, kolonlar, partial koşul)
+INDEXES = [
+    ('idx_messages_sender_receiver_created', 'messages', ['sender_id', 'receiver_id', 'created_at'], None),
+    ('idx_messages_receiver_sender', 'messages', ['receiver_id', 'sender_id'], None),
+    ('idx_messages_unread', 'messages', ['receiver_id', 'sender_id'], 'is_read IS NOT TRUE'),
+    ('idx_friendships_user_friend_status', 'friendships', ['user_id', 'friend_id', 'status'], None),
+    ('idx_friendships_friend_status', 'friendships', ['friend_id', 'status'], None),
+    ('idx_friendships_pending_requester', 'friendships', ['requester_id'], "status = 'PENDING'"),
+    ('idx_blocks_user_blocked', 'blocks', ['user_id', 'blocked_user_id'], None),
+    ('idx_room_participants_room_user_banned', 'room_participants', ['room_id', 'user_id', 'is_banned'], None),
+    ('idx_notifications_user_created', 'notifications', ['user_id', 'created_at'], None),
+    ('idx_notifications_unread', 'notifications', ['user_id'], 'is_read = false'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY transaction içinde çalışmaz; tablolar yazmaya kilitlenmesin
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
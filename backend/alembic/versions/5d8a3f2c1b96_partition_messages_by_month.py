@@ -0,0 +1,123 @@
+"""partition_messages_by_month
+
+Revision ID: 5d8a3f2c1b96
+Revises: 9b2f6d1e8c47
+Create Date: 2026-10-18 21:00:00.000000
+
+Not: tüm mesajlar tek transaction içinde yeni tabloya kopyalanır ve eski tablo
+(RENAME nedeniyle) bitene kadar ACCESS EXCLUSIVE kilitli kalır; bu sürede mesaj
+okunamaz/yazılamaz. Büyük tablolarda bakım penceresinde çalıştırın. Süre kabaca
+tablonun bir kez kopyalanıp index'lenmesi kadardır (index'ler kopyadan sonra kurulur).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8a3f2c1b96'
+down_revision: Union[str, Sequence[str], None] = '9b2f6d1e8c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "id, sender_id, receiver_id, content, message_type, file_url, is_read, read_at, created_at, updated_at"
+
+# Sonraki aylar app.services.message_partitions tarafından önden oluşturulur
+MONTHS_AHEAD = 3
+
+INDEXES = [
+    ('idx_messages_sender_receiver_created', ['sender_id', 'receiver_id', 'created_at'], None),
+    ('idx_messages_receiver_sender', ['receiver_id', 'sender_id'], None),
+    ('idx_messages_unread', ['receiver_id', 'sender_id'], 'is_read IS NOT TRUE'),
+]
+
+
+def _create_indexes(primary_key: str) -> None:
+    op.execute(f"ALTER TABLE messages ADD PRIMARY KEY ({primary_key})")
+    for name, columns, where in INDEXES:
+        op.execute(
+            f"CREATE INDEX {name} ON messages ({', '.join(columns)})"
+            + (f" WHERE {where}" if where else "")
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Eski tablo kenara alınır; id sırası yeni tabloya devredilir
+    op.execute("ALTER TABLE messages RENAME TO messages_legacy")
+    op.execute("ALTER SEQUENCE messages_id_seq OWNED BY NONE")
+    op.execute("""
+        CREATE TABLE messages (
+            id INTEGER NOT NULL DEFAULT nextval('messages_id_seq'),
+            sender_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            receiver_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            content TEXT NOT NULL,
+            message_type VARCHAR(20),
+            file_url VARCHAR(500),
+            is_read BOOLEAN,
+            read_at TIMESTAMP WITH TIME ZONE,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE
+        ) PARTITION BY RANGE (created_at)
+    """)
+
+    # En eski mesajın ayından bu ay + MONTHS_AHEAD'e kadar aylık partition'lar
+    op.execute(f"""
+        DO $$
+        DECLARE
+            part_month DATE := date_trunc('month', COALESCE((SELECT min(created_at) FROM messages_legacy), now()));
+            last_month DATE := date_trunc('month', now()) + INTERVAL '{MONTHS_AHEAD} months';
+        BEGIN
+            WHILE part_month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE messages_p%s PARTITION OF messages FOR VALUES FROM (%L) TO (%L)',
+                    to_char(part_month, 'YYYYMM'), part_month, (part_month + INTERVAL '1 month')::DATE
+                );
+                part_month := (part_month + INTERVAL '1 month')::DATE;
+            END LOOP;
+        END $$
+    """)
+
+    op.execute(f"""
+        INSERT INTO messages ({COLUMNS})
+        SELECT id, sender_id, receiver_id, content, message_type, file_url, is_read, read_at,
+               COALESCE(created_at, now()), updated_at
+        FROM messages_legacy
+    """)
+    op.execute("DROP TABLE messages_legacy")
+    op.execute("ALTER SEQUENCE messages_id_seq OWNED BY messages.id")
+
+    # Index'ler veri yüklendikten sonra (partition'larda da oluşur).
+    # Partition anahtarı PK'de olmak zorunda.
+    _create_indexes("id, created_at")
+    # Model'deki index=True (id ile tekil erişim)
+    op.execute("CREATE INDEX ix_messages_id ON messages (id)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Not: arşiv şemasına taşınmış partition'lar geri alınmaz
+    op.execute("ALTER TABLE messages RENAME TO messages_partitioned")
+    op.execute("ALTER SEQUENCE messages_id_seq OWNED BY NONE")
+    for name, columns, where in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.execute("DROP INDEX IF EXISTS ix_messages_id")
+    op.execute("ALTER TABLE messages_partitioned DROP CONSTRAINT IF EXISTS messages_pkey")
+    op.execute("""
+        CREATE TABLE messages (
+            id INTEGER NOT NULL DEFAULT nextval('messages_id_seq'),
+            sender_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            receiver_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            content TEXT NOT NULL,
+            message_type VARCHAR(20),
+            file_url VARCHAR(500),
+            is_read BOOLEAN,
+            read_at TIMESTAMP WITH TIME ZONE,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE
+        )
+    """)
+    op.execute(f"INSERT INTO messages ({COLUMNS}) SELECT {COLUMNS} FROM messages_partitioned")
+    op.execute("DROP TABLE messages_partitioned")
+    op.execute("ALTER SEQUENCE messages_id_seq OWNED BY messages.id")
+    op.execute("CREATE INDEX ix_messages_id ON messages (id)")
+    _create_indexes("id")
@@ -0,0 +1,37 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: 9b2f6d1e8c47
+Revises: 4c1e7b9a2d53
+Create Date: 2026-10-18 20:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '9b2f6d1e8c47'
+down_revision: Union[str, Sequence[str], None] = '4c1e7b9a2d53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index adı, tablo, kolonlar) - (created_at, id) cursor'u index'ten okunsun
+INDEXES = [
+    ('idx_notes_user_created_id', 'notes', ['user_id', 'created_at', 'id']),
+    ('idx_files_user_created_id', 'files', ['user_id', 'created_at', 'id']),
+    ('idx_rooms_active_created_id', 'rooms', ['is_active', 'created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,35 @@
+"""add_message_search
+
+Revision ID: b3e9d7c2a610
+Revises: e7c4a1f9b305
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e9d7c2a610'
+down_revision: Union[str, Sequence[str], None] = 'e7c4a1f9b305'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Partition'lı tabloda generated kolon ve index'ler tüm partition'lara yayılır
+    op.execute("""
+        ALTER TABLE messages ADD COLUMN search_vector TSVECTOR
+        GENERATED ALWAYS AS (to_tsvector('simple'::regconfig, coalesce(content, ''))) STORED
+    """)
+    op.execute("CREATE INDEX idx_messages_search ON messages USING gin (search_vector)")
+    op.execute("CREATE INDEX idx_messages_content_trgm ON messages USING gin (content gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS idx_messages_content_trgm")
+    op.execute("DROP INDEX IF EXISTS idx_messages_search")
+    op.execute("ALTER TABLE messages DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,30 @@
+"""add_blocks_blocked_user_index
+
+Revision ID: c8f1e4a7d259
+Revises: b3e9d7c2a610
+Create Date: 2026-10-18 23:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f1e4a7d259'
+down_revision: Union[str, Sequence[str], None] = 'b3e9d7c2a610'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Engel önbelleği "beni engelleyenler" kümesini blocked_user_id ile yükler
+    with op.get_context().autocommit_block():
+        op.create_index('idx_blocks_blocked_user', 'blocks', ['blocked_user_id', 'user_id'],
+                        unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_blocks_blocked_user', table_name='blocks', postgresql_concurrently=True, if_exists=True)
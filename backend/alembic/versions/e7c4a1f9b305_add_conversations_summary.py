@@ -0,0 +1,52 @@
+"""add_conversations_summary
+
+Revision ID: e7c4a1f9b305
+Revises: 5d8a3f2c1b96
+Create Date: 2026-10-18 21:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c4a1f9b305'
+down_revision: Union[str, Sequence[str], None] = '5d8a3f2c1b96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'conversations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_low_id', sa.Integer(), nullable=False),
+        sa.Column('user_high_id', sa.Integer(), nullable=False),
+        sa.Column('last_message_id', sa.Integer(), nullable=True),
+        sa.Column('last_message_preview', sa.String(length=200), nullable=True),
+        sa.Column('last_message_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('unread_low', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('unread_high', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_low_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_high_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_low_id', 'user_high_id', name='uq_conversations_pair')
+    )
+    op.create_index(op.f('ix_conversations_id'), 'conversations', ['id'], unique=False)
+    op.create_index('idx_conversations_low_last', 'conversations', ['user_low_id', 'last_message_at'], unique=False)
+    op.create_index('idx_conversations_high_last', 'conversations', ['user_high_id', 'last_message_at'], unique=False)
+
+    # Mevcut mesajlardan doldur (aynı sorgu: ConversationService.backfill)
+    from app.services.conversation_service import BACKFILL_SQL
+    op.execute(BACKFILL_SQL)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_conversations_high_last', table_name='conversations')
+    op.drop_index('idx_conversations_low_last', table_name='conversations')
+    op.drop_index(op.f('ix_conversations_id'), table_name='conversations')
+    op.drop_table('conversations')
@@ -5,7 +5,9 @@ from sqlalchemy.orm import Session
 
 from app.core.database import SessionLocal
 from app.models.user import User
+from app.schemas.user import TokenClaims
 from app.api.v1.endpoints.auth import get_current_user as auth_get_current_user
+from app.api.v1.endpoints.auth import get_token_claims as auth_get_token_claims
 
 # OAuth2 scheme - auth.py'deki ile aynı
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
@@ -23,6 +25,9 @@ def get_db() -> Generator:
 # auth.py'deki get_current_user'ı re-export et
 get_current_user = auth_get_current_user
 
+# Sadece kimlik bilgisi (uid, tier, role, sid) gereken endpoint'ler için
+get_token_claims = auth_get_token_claims
+
 # Aktif kullanıcı kontrolü
 def get_current_active_user(
     current_user: User = Depends(get_current_user),
@@ -36,3 +41,17 @@ def get_current_active_user(
             detail="Inactive user"
         )
     return current_user
+
+# Yönetici kontrolü (iç metrikler vb.)
+def get_admin_claims(
+    claims: TokenClaims = Depends(get_token_claims),
+) -> TokenClaims:
+    """
+    Sadece admin rolündeki kullanıcılar
+    """
+    if claims.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Yetkiniz yok"
+        )
+    return claims
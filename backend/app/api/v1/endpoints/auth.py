@@ -1,61 +1,118 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
-from app.core.database import get_db
+from jose import JWTError
+from app.core.database import get_db, get_async_db, set_request_user
 from app.core.config import settings
 from app.models.user import User
-from app.schemas.user import UserCreate, UserResponse, Token, TokenData
+from app.schemas.user import UserCreate, UserResponse, UserSnapshot, Token, TokenData, TokenClaims
 from app.services.auth import AuthService
+from app.services.user_cache import user_cache
+from app.services.tier_cache import tier_cache
+from app.services.revocation import access_token_revocation, revocation_ids
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> UserSnapshot:
+    """
+    Token'daki kullanıcıyı döndür.
+    Aynı token tekrar geldiğinde JWT çözme ve veritabanı sorgusu önbellekten atlanır.
+    """
+    cached = user_cache.get(token)
+    if cached is not None:
+        snapshot, cached_ids = cached
+        if await access_token_revocation.is_revoked_async(cached_ids):
+            raise _credentials_exception()
+        await set_request_user(snapshot.id)
+        return snapshot
     
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = AuthService.decode_access_token(token)
         username: str = payload.get("sub")
         if username is None:
-            raise credentials_exception
+            raise _credentials_exception()
         token_data = TokenData(username=username)
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    
+    ids = revocation_ids(payload)
+    if await access_token_revocation.is_revoked_async(ids):
+        raise _credentials_exception()
     
-    user = db.query(User).filter(User.username == token_data.username).first()
+    claims = AuthService.claims_from_payload(payload)
+    if claims:
+        user = await db.scalar(select(User).where(User.id == claims.uid))
+    else:
+        # Eski (v1) token: sadece username var
+        user = await db.scalar(select(User).where(User.username == token_data.username))
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
-    return user
+    tier_cache.remember(user)
+    await set_request_user(user.id)
+    return user_cache.set(token, user, token_exp=payload.get("exp"), revocation_ids=ids)
+
+async def get_token_claims(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> TokenClaims:
+    """
+    Doğrulanmış token claim'leri - tam User satırı gerekmeyen endpoint'ler için.
+    v2 token'larda veritabanına gidilmez; eski token'larda kullanıcıdan tamamlanır.
+    """
+    try:
+        payload = AuthService.decode_access_token(token)
+    except JWTError:
+        raise _credentials_exception()
+    
+    if await access_token_revocation.is_revoked_async(revocation_ids(payload)):
+        raise _credentials_exception()
+    
+    claims = AuthService.claims_from_payload(payload)
+    if claims:
+        await set_request_user(claims.uid)
+        return claims
+    
+    user = await get_current_user(token, db)
+    return TokenClaims(
+        v=1,
+        sub=user.username,
+        uid=user.id,
+        tier=user.subscription_tier or "free",
+        role=user.role or "student"
+    )
 
 @router.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Yeni kullanıcı kaydı"""
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await db.scalar(select(User).where(User.email == user.email))
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    db_user = db.query(User).filter(User.username == user.username).first()
+    db_user = await db.scalar(select(User).where(User.username == user.username))
     if db_user:
         raise HTTPException(status_code=400, detail="Username already taken")
     
-    db_user = AuthService.create_user(db, user)
+    # bcrypt süreç havuzunda; beklerken thread tutulmaz
+    db_user = await AuthService.create_user(db, user)
     return db_user
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Kullanıcı girişi - Refresh token ile"""
-    user = AuthService.authenticate_user(db, form_data.username, form_data.password)
+    user = await AuthService.authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -63,18 +120,22 @@ def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = AuthService.create_access_token(data={"sub": user.username})
-    
     client_ip = request.client.host if request.client else None
     user_agent = request.headers.get("user-agent")
     
-    refresh_token = AuthService.create_refresh_token(
+    refresh_token, session_id = await AuthService.create_refresh_token(
         db=db,
-        user_id=user.id,
+        user=user,
         device_name=user_agent[:100] if user_agent else None,
         ip_address=client_ip
     )
     
+    access_token = AuthService.create_access_token(
+        data=AuthService.build_access_claims(
+            user.id, user.username, user.subscription_tier, user.role, session_id
+        )
+    )
+    
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
@@ -99,10 +160,13 @@ def refresh_token(
 def logout(
     refresh_token: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    claims: TokenClaims = Depends(get_token_claims)
 ):
-    """Çıkış yap - refresh token'ı iptal et"""
-    AuthService.revoke_refresh_token(db, refresh_token)
+    """Çıkış yap - refresh token'ı ve bu oturumun access token'larını iptal et"""
+    AuthService.revoke_refresh_token(db, refresh_token, user_id=current_user.id)
+    if claims.sid is not None:
+        access_token_revocation.revoke_sessions([claims.sid])
     return {"message": "Successfully logged out"}
 
 @router.post("/logout/all")
@@ -119,4 +183,4 @@ def read_users_me(current_user: User = Depends(get_current_user)):
     """Mevcut kullanıcı bilgilerini getir"""
     return current_user
 
-__all__ = ["get_current_user", "oauth2_scheme"]
+__all__ = ["get_current_user", "get_token_claims", "oauth2_scheme"]
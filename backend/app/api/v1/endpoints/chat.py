@@ -1,122 +1,223 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, desc, asc
-from typing import List
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, or_, and_, desc, case, update, literal_column
+from typing import List, Optional
+from app.core.database import get_async_db, get_async_read_db
 from app.api import deps
 from app.models.user import User
-from app.models.message import Message
-from app.models.block import Block
+from app.models.message import Message, search_vector
+from app.models.conversation import Conversation
 from app.schemas.chat import (
-    MessageResponse, MessageCreate, ChatListItem, UnreadCountResponse
+    MessageResponse, MessageCreate, ChatListItem, UnreadCountResponse, MarkReadResponse,
+    MessageSearchResult
 )
-from datetime import datetime
+from app.services.conversation_service import ConversationService, pair
+from app.services.chat_connections import chat_connections
+from app.services.counters import user_counters, MESSAGES
+from app.services.block_graph import block_graph
+from app.utils.pagination import keyset_page, finish_page, encode_rank_cursor, decode_rank_cursor
+import html
 
 router = APIRouter()
 
+# Arama: messages.search_vector ile aynı sözlük
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+# ts_headline ham içeriği döndürür: önce işaretçilerle vurgulanır, sonra HTML kaçışı yapılıp
+# işaretçiler <mark>'a çevrilir (mesaj içeriğindeki HTML istemcide çalışmasın)
+HIGHLIGHT_START, HIGHLIGHT_STOP = "\u27e6", "\u27e7"
+HEADLINE_OPTIONS = f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxFragments=2, MaxWords=20, MinWords=5"
+
+def _highlight(headline: str) -> str:
+    return html.escape(headline).replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_STOP, "</mark>")
+
 @router.get("/", response_model=List[ChatListItem])
-def get_chat_list(
-    db: Session = Depends(get_db),
+async def get_chat_list(
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(deps.get_current_user)
 ):
-    """Sohbet listesi"""
+    """Sohbet listesi - özet tablosundan tek sorgu (en son mesaj en üstte)"""
     current_user_id = current_user.id
     
-    # Mesajlaşılan kullanıcıları bul
-    sent = db.query(Message.receiver_id).filter(Message.sender_id == current_user_id).distinct()
-    received = db.query(Message.sender_id).filter(Message.receiver_id == current_user_id).distinct()
-    user_ids = set([r[0] for r in sent.all()] + [r[0] for r in received.all()])
-    
-    result = []
-    for uid in user_ids:
-        # Engellenme kontrolü
-        blocked = db.query(Block).filter(
-            or_(
-                and_(Block.user_id == current_user_id, Block.blocked_user_id == uid),
-                and_(Block.user_id == uid, Block.blocked_user_id == current_user_id)
-            )
-        ).first()
-        if blocked:
-            continue
-        
-        user = db.query(User).filter(User.id == uid).first()
-        if not user:
-            continue
-        
-        last_msg = db.query(Message).filter(
-            or_(
-                and_(Message.sender_id == current_user_id, Message.receiver_id == uid),
-                and_(Message.sender_id == uid, Message.receiver_id == current_user_id)
-            )
-        ).order_by(desc(Message.created_at)).first()
-        
-        unread = db.query(Message).filter(
-            Message.sender_id == uid,
-            Message.receiver_id == current_user_id,
-            Message.is_read == False
-        ).count()
-        
-        result.append(ChatListItem(
+    is_low = Conversation.user_low_id == current_user_id
+    partner_id = case((is_low, Conversation.user_high_id), else_=Conversation.user_low_id)
+    unread = case((is_low, Conversation.unread_low), else_=Conversation.unread_high)
+    
+    filters = [or_(Conversation.user_low_id == current_user_id, Conversation.user_high_id == current_user_id)]
+    # Engellenmiş çiftler (iki yön) listede gösterilmez
+    hidden = await block_graph.hidden_async(current_user_id)
+    if hidden:
+        filters.append(partner_id.notin_(hidden))
+    
+    rows = await db.execute(
+        select(User, Conversation.last_message_preview, Conversation.last_message_at, unread)
+        .select_from(Conversation)
+        .join(User, User.id == partner_id)
+        .where(*filters)
+        .order_by(desc(Conversation.last_message_at), desc(Conversation.last_message_id))
+    )
+    
+    return [
+        ChatListItem(
             user=user,
-            last_message=last_msg.content if last_msg else None,
-            last_message_time=last_msg.created_at if last_msg else None,
-            unread_count=unread
-        ))
+            last_message=preview,
+            last_message_time=last_time,
+            unread_count=unread_count
+        )
+        for user, preview, last_time, unread_count in rows.all()
+    ]
+
+@router.get("/search", response_model=List[MessageSearchResult])
+async def search_messages(
+    response: Response,
+    q: str = Query(..., min_length=2, max_length=200),
+    user_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Mesajlarda ara (sadece kullanıcının kendi sohbetleri; user_id ile tek sohbet).
+    Kelime eşleşmeleri GIN/tsvector, 3+ karakterli alt metinler pg_trgm index'inden.
+    Skora göre sıralı; sonraki sayfa için X-Next-Cursor.
+    """
+    current_user_id = current_user.id
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank_cd(search_vector, tsquery)
+    
+    matches = [search_vector.op("@@")(tsquery)]
+    if len(q) >= 3:
+        escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        matches.append(Message.content.ilike(f"%{escaped}%", escape="\\"))
+    
+    if user_id is not None:
+        participants = or_(
+            and_(Message.sender_id == current_user_id, Message.receiver_id == user_id),
+            and_(Message.sender_id == user_id, Message.receiver_id == current_user_id)
+        )
+    else:
+        participants = or_(Message.sender_id == current_user_id, Message.receiver_id == current_user_id)
+    
+    filters = [participants, or_(*matches)]
+    # Engellenmiş kullanıcılarla olan mesajlar aranmaz
+    hidden = await block_graph.hidden_async(current_user_id)
+    if hidden:
+        partner_id = case((Message.sender_id == current_user_id, Message.receiver_id), else_=Message.sender_id)
+        filters.append(partner_id.notin_(hidden))
+    
+    ranked = select(Message.id, Message.created_at, rank.label("rank")).where(*filters)
+    if cursor:
+        last_rank, last_id = decode_rank_cursor(cursor)
+        ranked = ranked.where(or_(rank < last_rank, and_(rank == last_rank, Message.id < last_id)))
+    ranked = ranked.order_by(rank.desc(), Message.id.desc()).limit(limit + 1).subquery()
+    
+    # Vurgulama pahalı: sadece bu sayfanın satırları için
+    rows = (await db.execute(
+        select(Message, ranked.c.rank, func.ts_headline(SEARCH_CONFIG, func.translate(Message.content, HIGHLIGHT_START + HIGHLIGHT_STOP, ""), tsquery, HEADLINE_OPTIONS))
+        .join(ranked, and_(Message.id == ranked.c.id, Message.created_at == ranked.c.created_at))
+        .order_by(ranked.c.rank.desc(), Message.id.desc())
+    )).all()
     
-    return result
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_message, last_rank, _ = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_rank_cursor(last_rank, last_message.id)
+    
+    return [
+        MessageSearchResult(**MessageResponse.model_validate(message).model_dump(), rank=score, highlight=_highlight(highlight))
+        for message, score, highlight in rows
+    ]
 
 @router.get("/{user_id}", response_model=List[MessageResponse])
-def get_chat_history(
+async def get_chat_history(
     user_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(deps.get_current_user),
     limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    before_id: Optional[int] = Query(None, ge=0),
+    after_id: Optional[int] = Query(None, ge=0),
+    since_id: Optional[int] = Query(None, ge=0)
 ):
     """
     Mesaj geçmişi - EN ESKİDEN EN YENİYE sıralı
     (FlatList'te ters çevirmeye gerek yok, direkt göster)
+    cursor verilirse o mesajdan sonraki (daha yeni) mesajlar gelir.
+    
+    id ile sayfalama (sayfa içi sıra yine eskiden yeniye):
+    - before_id: bu mesajdan önceki EN YENİ limit mesaj (yukarı kaydırma)
+    - after_id: bu mesajdan sonraki en eski limit mesaj (ileri sayfalama)
+    - since_id: uygulama açılınca sadece görülmemiş mesajlar; since_id=0 son sayfayı verir.
+      limit'ten fazla yeni mesaj varsa en yenileri gelir, boşluk before_id ile doldurulur.
+    X-Has-More: istenen yönde başka mesaj var mı
     """
     current_user_id = current_user.id
     
     # Engellenme kontrolü
-    blocked = db.query(Block).filter(
-        or_(
-            and_(Block.user_id == current_user_id, Block.blocked_user_id == user_id),
-            and_(Block.user_id == user_id, Block.blocked_user_id == current_user_id)
-        )
-    ).first()
-    if blocked:
+    if await block_graph.is_blocked_async(current_user_id, user_id):
         raise HTTPException(status_code=403, detail="Bu kullanıcı ile mesajlaşamazsınız")
     
     # ASC sıralama - en eskiden en yeniye (altta yeni mesajlar)
-    messages = db.query(Message).filter(
+    query = select(Message).where(
         or_(
             and_(Message.sender_id == current_user_id, Message.receiver_id == user_id),
             and_(Message.sender_id == user_id, Message.receiver_id == current_user_id)
         )
-    ).order_by(asc(Message.created_at)).offset(offset).limit(limit).all()  # ASC!
+    )
+    
+    if since_id is not None and before_id is None:
+        # Yeni mesaj yoksa messages tablosuna hiç gitme (özet satırı tek index okuması).
+        # Özet satırı yoksa (henüz doldurulmamış) karar messages'tan verilir.
+        low, high = pair(current_user_id, user_id)
+        last_id = await db.scalar(
+            select(Conversation.last_message_id).where(
+                Conversation.user_low_id == low,
+                Conversation.user_high_id == high
+            )
+        )
+        if last_id is not None and last_id <= since_id:
+            response.headers["X-Has-More"] = "false"
+            return []
     
-    return messages
+    if before_id is not None or after_id is not None or since_id is not None:
+        # En yeni sayfa önce (before/since) veya ileri doğru (after).
+        # Cursor id olduğu için sıra da sadece id: created_at ile id'nin sırası
+        # (saat kayması, toplu yazılan mesajlar) farklıysa satır atlanmaz/tekrarlanmaz
+        newest_first = after_id is None
+        if before_id is not None:
+            query = query.where(Message.id < before_id)
+        if after_id is not None:
+            query = query.where(Message.id > after_id)
+        if since_id is not None:
+            query = query.where(Message.id > since_id)
+        if newest_first:
+            query = query.order_by(desc(Message.id))
+        else:
+            query = query.order_by(Message.id)
+        
+        messages = (await db.scalars(query.limit(limit + 1))).all()
+        response.headers["X-Has-More"] = "true" if len(messages) > limit else "false"
+        messages = messages[:limit]
+        return messages[::-1] if newest_first else messages
+    
+    messages = await db.scalars(keyset_page(query, Message, cursor, limit, offset, descending=False))  # ASC!
+    
+    return finish_page(messages.all(), limit, response)
 
 @router.post("/{user_id}", response_model=MessageResponse)
-def send_message(
+async def send_message(
     user_id: int,
     message: MessageCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(deps.get_current_user)
 ):
     """Mesaj gönder"""
     current_user_id = current_user.id
     
     # Engellenme kontrolü
-    blocked = db.query(Block).filter(
-        or_(
-            and_(Block.user_id == current_user_id, Block.blocked_user_id == user_id),
-            and_(Block.user_id == user_id, Block.blocked_user_id == current_user_id)
-        )
-    ).first()
-    if blocked:
+    if await block_graph.is_blocked_async(current_user_id, user_id):
         raise HTTPException(status_code=403, detail="Bu kullanıcıya mesaj gönderemezsiniz")
     
     new_msg = Message(
@@ -127,41 +228,104 @@ def send_message(
         file_url=message.file_url
     )
     db.add(new_msg)
-    db.commit()
-    db.refresh(new_msg)
+    await db.flush()
+    await db.refresh(new_msg)
+    # Sohbet özeti mesajla aynı transaction'da
+    await ConversationService.record_message(db, new_msg)
+    await db.commit()
+    await user_counters.incr_async(user_id, MESSAGES)
     return new_msg
 
 @router.put("/read/{message_id}")
-def mark_as_read(
+async def mark_as_read(
     message_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(deps.get_current_user)
 ):
     """Mesajı okundu işaretle"""
     current_user_id = current_user.id
     
-    message = db.query(Message).filter(
-        Message.id == message_id,
-        Message.receiver_id == current_user_id
-    ).first()
-    if not message:
-        raise HTTPException(status_code=404, detail="Mesaj bulunamadı")
-    
-    message.is_read = True
-    message.read_at = datetime.utcnow()
-    db.commit()
+    # read_at toplu yoldaki gibi veritabanı saatinden; tek UPDATE aynı mesajı iki kez saymaz
+    sender_id = await db.scalar(
+        update(Message)
+        .where(
+            Message.id == message_id,
+            Message.receiver_id == current_user_id,
+            Message.is_read.isnot(True)
+        )
+        .values(is_read=True, read_at=func.now())
+        .returning(Message.sender_id)
+        .execution_options(synchronize_session=False)
+    )
+    if sender_id is None:
+        exists = await db.scalar(
+            select(Message.id).where(
+                Message.id == message_id,
+                Message.receiver_id == current_user_id
+            )
+        )
+        if not exists:
+            raise HTTPException(status_code=404, detail="Mesaj bulunamadı")
+    else:
+        await ConversationService.messages_read(db, current_user_id, sender_id)
+        await db.commit()
+        await user_counters.incr_async(current_user_id, MESSAGES, -1)
     return {"message": "Okundu işaretlendi"}
 
+@router.put("/{user_id}/read", response_model=MarkReadResponse)
+async def mark_conversation_read(
+    user_id: int,
+    up_to_id: Optional[int] = Query(None, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Sohbeti toplu okundu işaretle: up_to_id'ye kadar (verilmezse hepsi)
+    okunmamış gelen mesajlar tek UPDATE ile. Karşı tarafa tek read_receipt gider.
+    """
+    current_user_id = current_user.id
+    
+    stmt = (
+        update(Message)
+        .where(
+            Message.receiver_id == current_user_id,
+            Message.sender_id == user_id,
+            # NULL is_read de okunmamış sayılır (sohbet özetindeki COALESCE ile aynı)
+            Message.is_read.isnot(True)
+        )
+        .values(is_read=True, read_at=func.now())
+        .returning(Message.id)
+        .execution_options(synchronize_session=False)
+    )
+    if up_to_id is not None:
+        stmt = stmt.where(Message.id <= up_to_id)
+    
+    message_ids = sorted((await db.scalars(stmt)).all())
+    if message_ids:
+        await ConversationService.messages_read(db, current_user_id, user_id, len(message_ids))
+        await db.commit()
+        await user_counters.incr_async(current_user_id, MESSAGES, -len(message_ids))
+        await chat_connections.send_to_user(user_id, {
+            "type": "read_receipt",
+            "reader_id": current_user_id,
+            "message_ids": message_ids,
+            "up_to_id": message_ids[-1]
+        })
+    
+    return {"message_ids": message_ids, "count": len(message_ids)}
+
 @router.get("/unread/count", response_model=UnreadCountResponse)
-def get_unread_count(
-    db: Session = Depends(get_db),
+async def get_unread_count(
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(deps.get_current_user)
 ):
     """Okunmamış mesaj sayısı"""
     current_user_id = current_user.id
     
-    count = db.query(Message).filter(
-        Message.receiver_id == current_user_id,
-        Message.is_read == False
-    ).count()
+    count = await db.scalar(
+        select(func.count(Message.id)).where(
+            Message.receiver_id == current_user_id,
+            Message.is_read.isnot(True)
+        )
+    )
     return {"count": count}
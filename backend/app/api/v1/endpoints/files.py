@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Response, status
 from sqlalchemy.orm import Session
 from typing import Optional, List
 import os
@@ -9,6 +9,7 @@ from app.models.note import Note
 from app.schemas.file import FileResponse, FileCreate
 from app.api.v1.endpoints.auth import get_current_user
 from app.services.file_service import FileService, UPLOAD_DIR
+from app.utils.pagination import keyset_page, finish_page
 from fastapi.responses import FileResponse as FastAPIFileResponse
 import shutil
 
@@ -63,20 +64,22 @@ async def upload_file(
 
 @router.get("/", response_model=List[FileResponse])
 def get_my_files(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     file_type: Optional[str] = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Kullanıcının dosyalarını listele"""
+    """Kullanıcının dosyalarını listele (cursor verilirse keyset sayfalama)"""
     query = db.query(FileModel).filter(FileModel.user_id == current_user.id)
     
     if file_type:
         query = query.filter(FileModel.file_type == file_type)
     
-    files = query.order_by(FileModel.created_at.desc()).offset(skip).limit(limit).all()
-    return files
+    files = keyset_page(query, FileModel, cursor, limit, skip).all()
+    return finish_page(files, limit, response)
 
 @router.get("/note/{note_id}", response_model=List[FileResponse])
 def get_note_files(
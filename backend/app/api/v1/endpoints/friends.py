@@ -7,6 +7,9 @@ from app.api import deps  # YENİ
 from app.models.user import User
 from app.models.friendship import Friendship, FriendshipStatus
 from app.models.block import Block
+from app.core.query_stats import query_budget
+from app.services.counters import user_counters, FRIEND_REQUESTS
+from app.services.block_graph import block_graph
 from app.schemas.friendship import (
     FriendWithStatusSchema, FriendshipRequestSchema,
     BlockResponseSchema, FriendStatusResponse
@@ -15,6 +18,7 @@ from app.schemas.friendship import (
 router = APIRouter()
 
 @router.get("/", response_model=List[FriendWithStatusSchema])
+@query_budget(3)
 def get_friends(
     db: Session = Depends(get_db),
     current_user: User = Depends(deps.get_current_user),  # DÜZELTİLDİ
@@ -31,10 +35,13 @@ def get_friends(
         Friendship.status == FriendshipStatus.ACCEPTED
     ).all()
     
+    # Arkadaşların kullanıcı kayıtları tek sorguda
+    friend_ids = [f.friend_id if f.user_id == current_user_id else f.user_id for f in friendships]
+    users = {u.id: u for u in db.query(User).filter(User.id.in_(friend_ids)).all()} if friend_ids else {}
+    
     result = []
-    for f in friendships:
-        friend_id = f.friend_id if f.user_id == current_user_id else f.user_id
-        friend = db.query(User).filter(User.id == friend_id).first()
+    for f, friend_id in zip(friendships, friend_ids):
+        friend = users.get(friend_id)
         if friend:
             result.append(FriendWithStatusSchema(
                 user=friend,
@@ -46,6 +53,7 @@ def get_friends(
     return result
 
 @router.get("/requests", response_model=List[FriendshipRequestSchema])
+@query_budget(2)
 def get_friend_requests(
     db: Session = Depends(get_db),
     current_user: User = Depends(deps.get_current_user)  # DÜZELTİLDİ
@@ -58,9 +66,13 @@ def get_friend_requests(
         Friendship.status == FriendshipStatus.PENDING
     ).all()
     
+    # İstek gönderenler tek sorguda
+    requester_ids = {req.requester_id for req in requests}
+    users = {u.id: u for u in db.query(User).filter(User.id.in_(requester_ids)).all()} if requester_ids else {}
+    
     result = []
     for req in requests:
-        requester = db.query(User).filter(User.id == req.requester_id).first()
+        requester = users.get(req.requester_id)
         if requester:
             result.append(FriendshipRequestSchema(
                 id=req.id,
@@ -70,6 +82,7 @@ def get_friend_requests(
     return result
 
 @router.get("/requests/sent", response_model=List[FriendshipRequestSchema])
+@query_budget(2)
 def get_sent_requests(
     db: Session = Depends(get_db),
     current_user: User = Depends(deps.get_current_user)  # YENİ
@@ -82,10 +95,12 @@ def get_sent_requests(
         Friendship.status == FriendshipStatus.PENDING
     ).all()
     
+    friend_ids = [req.friend_id if req.user_id == current_user_id else req.user_id for req in requests]
+    users = {u.id: u for u in db.query(User).filter(User.id.in_(friend_ids)).all()} if friend_ids else {}
+    
     result = []
-    for req in requests:
-        friend_id = req.friend_id if req.user_id == current_user_id else req.user_id
-        friend = db.query(User).filter(User.id == friend_id).first()
+    for req, friend_id in zip(requests, friend_ids):
+        friend = users.get(friend_id)
         if friend:
             result.append(FriendshipRequestSchema(
                 id=req.id,
@@ -107,13 +122,7 @@ def send_friend_request(
         raise HTTPException(status_code=400, detail="Kendinize istek gönderemezsiniz")
     
     # Engellenme kontrolü
-    blocked = db.query(Block).filter(
-        or_(
-            and_(Block.user_id == current_user_id, Block.blocked_user_id == user_id),
-            and_(Block.user_id == user_id, Block.blocked_user_id == current_user_id)
-        )
-    ).first()
-    if blocked:
+    if block_graph.is_blocked(current_user_id, user_id):
         raise HTTPException(status_code=400, detail="Bu kullanıcı ile arkadaşlık kuramazsınız")
     
     existing = db.query(Friendship).filter(
@@ -137,6 +146,7 @@ def send_friend_request(
     )
     db.add(friendship)
     db.commit()
+    user_counters.incr(user_id, FRIEND_REQUESTS)
     return {"message": "İstek gönderildi"}
 
 @router.post("/accept/{request_id}")
@@ -158,6 +168,7 @@ def accept_friend_request(
     
     friendship.status = FriendshipStatus.ACCEPTED
     db.commit()
+    user_counters.incr(current_user_id, FRIEND_REQUESTS, -1)
     return {"message": "İstek kabul edildi"}
 
 @router.post("/reject/{request_id}")
@@ -179,6 +190,7 @@ def reject_friend_request(
     
     friendship.status = FriendshipStatus.REJECTED
     db.commit()
+    user_counters.incr(current_user_id, FRIEND_REQUESTS, -1)
     return {"message": "İstek reddedildi"}
 
 @router.post("/block/{user_id}")
@@ -207,12 +219,18 @@ def block_user(
             and_(Friendship.user_id == user_id, Friendship.friend_id == current_user_id)
         )
     ).first()
+    pending_for = None
     if friendship:
+        if friendship.status == FriendshipStatus.PENDING:
+            pending_for = friendship.friend_id
         db.delete(friendship)
     
     block = Block(user_id=current_user_id, blocked_user_id=user_id)
     db.add(block)
     db.commit()
+    block_graph.invalidate(current_user_id, user_id)
+    if pending_for is not None:
+        user_counters.incr(pending_for, FRIEND_REQUESTS, -1)
     return {"message": "Kullanıcı engellendi"}
 
 @router.post("/unblock/{user_id}")
@@ -233,9 +251,11 @@ def unblock_user(
     
     db.delete(block)
     db.commit()
+    block_graph.invalidate(current_user_id, user_id)
     return {"message": "Engel kaldırıldı"}
 
 @router.get("/search")
+@query_budget(3)
 def search_users(
     q: str = Query(..., min_length=2),
     db: Session = Depends(get_db),
@@ -253,26 +273,27 @@ def search_users(
         )
     ).limit(20).all()
     
-    result = []
-    for user in users:
-        friendship = db.query(Friendship).filter(
-            or_(
-                and_(Friendship.user_id == current_user_id, Friendship.friend_id == user.id),
-                and_(Friendship.user_id == user.id, Friendship.friend_id == current_user_id)
-            )
-        ).first()
-        
-        blocked = db.query(Block).filter(
+    # Bulunan kullanıcılarla arkadaşlıklar tek sorguda
+    user_ids = [user.id for user in users]
+    friendships = {}
+    if user_ids:
+        rows = db.query(Friendship).filter(
             or_(
-                and_(Block.user_id == current_user_id, Block.blocked_user_id == user.id),
-                and_(Block.user_id == user.id, Block.blocked_user_id == current_user_id)
+                and_(Friendship.user_id == current_user_id, Friendship.friend_id.in_(user_ids)),
+                and_(Friendship.friend_id == current_user_id, Friendship.user_id.in_(user_ids))
             )
-        ).first()
-        
+        ).order_by(Friendship.id).all()
+        for f in rows:
+            friendships.setdefault(f.friend_id if f.user_id == current_user_id else f.user_id, f)
+    
+    hidden = block_graph.hidden(current_user_id)
+    result = []
+    for user in users:
+        friendship = friendships.get(user.id)
         result.append({
             "user": user,
             "friendship_status": friendship.status if friendship else None,
-            "is_blocked": blocked is not None
+            "is_blocked": user.id in hidden
         })
     return result
 
@@ -288,27 +309,18 @@ def get_friend_status(
     if current_user_id == user_id:
         return {"status": "self"}
     
+    blocked, blocked_by = block_graph.relations(current_user_id)
+    if user_id in blocked:
+        return {"status": "blocked_by_me"}
+    if user_id in blocked_by:
+        return {"status": "blocked_me"}
+    
     friendship = db.query(Friendship).filter(
         or_(
             and_(Friendship.user_id == current_user_id, Friendship.friend_id == user_id),
             and_(Friendship.user_id == user_id, Friendship.friend_id == current_user_id)
         )
     ).first()
-    
-    blocked_by_me = db.query(Block).filter(
-        Block.user_id == current_user_id,
-        Block.blocked_user_id == user_id
-    ).first()
-    
-    blocked_me = db.query(Block).filter(
-        Block.user_id == user_id,
-        Block.blocked_user_id == current_user_id
-    ).first()
-    
-    if blocked_by_me:
-        return {"status": "blocked_by_me"}
-    if blocked_me:
-        return {"status": "blocked_me"}
     if friendship:
         if friendship.status == FriendshipStatus.ACCEPTED:
             return {"status": "friends", "friendship_id": friendship.id}
@@ -1,15 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.models.user import User
-from app.models.achievement import Achievement, UserAchievement
+from app.models.achievement import Achievement, UserAchievement, UserStats
 from app.schemas.achievement import (
     AchievementResponse, UserAchievementResponse, 
     UserStatsResponse, LevelUpResponse
 )
 from app.services.gamification_service import GamificationService
 from app.api.v1.endpoints.auth import get_current_user
+from app.core.query_stats import query_budget
 
 router = APIRouter()
 
@@ -71,17 +72,19 @@ def get_my_achievements(
     return result
 
 @router.get("/leaderboard")
+@query_budget(3)
 def get_leaderboard(
     limit: int = 10,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Liderlik tablosu (XP bazlı)"""
-    stats = db.query(UserStats).order_by(UserStats.total_xp.desc()).limit(limit).all()
+    rows = db.query(UserStats, User).join(
+        User, User.id == UserStats.user_id
+    ).order_by(UserStats.total_xp.desc()).limit(limit).all()
     
     result = []
-    for idx, stat in enumerate(stats):
-        user = db.query(User).filter(User.id == stat.user_id).first()
+    for idx, (stat, user) in enumerate(rows):
         if user:
             result.append({
                 "rank": idx + 1,
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends
+from app.api import deps
+from app.schemas.user import TokenClaims
+from app.schemas.counters import CountersResponse
+from app.services.counters import user_counters
+
+router = APIRouter()
+
+@router.get("/counters", response_model=CountersResponse)
+async def get_counters(claims: TokenClaims = Depends(deps.get_token_claims)):
+    """Tüm rozet sayaçları tek çağrıda (Redis hash'inden, COUNT sorgusu yok)"""
+    return await user_counters.get_async(claims.uid)
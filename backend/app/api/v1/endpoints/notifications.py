@@ -1,47 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.core.database import get_async_db, get_async_read_db
 from app.models.user import User
 from app.schemas.notification import NotificationResponse, NotificationUpdate, UnreadCountResponse
 from app.services.notification_service import NotificationService
 from app.api.v1.endpoints.auth import get_current_user
+from app.utils.pagination import finish_page
 
 router = APIRouter()
 
 @router.get("/", response_model=List[NotificationResponse])
-def get_notifications(
+async def get_notifications(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Kullanıcının bildirimlerini getir"""
-    notifications = NotificationService.get_user_notifications(
+    notifications = await NotificationService.get_user_notifications(
         db=db,
         user_id=current_user.id,
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
-    return notifications
+    return finish_page(notifications, limit, response)
 
 @router.get("/unread/count", response_model=UnreadCountResponse)
-def get_unread_count(
-    db: Session = Depends(get_db),
+async def get_unread_count(
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Okunmamış bildirim sayısını getir"""
-    count = NotificationService.get_unread_count(db=db, user_id=current_user.id)
+    count = await NotificationService.get_unread_count(db=db, user_id=current_user.id)
     return {"unread_count": count}
 
 @router.put("/{notification_id}/read", response_model=NotificationResponse)
-def mark_notification_as_read(
+async def mark_notification_as_read(
     notification_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Bildirimi okundu olarak işaretle"""
-    notification = NotificationService.mark_as_read(
+    notification = await NotificationService.mark_as_read(
         db=db,
         notification_id=notification_id,
         user_id=current_user.id
@@ -53,22 +57,22 @@ def mark_notification_as_read(
     return notification
 
 @router.put("/read-all")
-def mark_all_as_read(
-    db: Session = Depends(get_db),
+async def mark_all_as_read(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Tüm bildirimleri okundu işaretle"""
-    count = NotificationService.mark_all_as_read(db=db, user_id=current_user.id)
+    count = await NotificationService.mark_all_as_read(db=db, user_id=current_user.id)
     return {"message": f"{count} bildirim okundu olarak işaretlendi"}
 
 @router.delete("/{notification_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_notification(
+async def delete_notification(
     notification_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Bildirimi sil"""
-    deleted = NotificationService.delete_notification(
+    deleted = await NotificationService.delete_notification(
         db=db,
         notification_id=notification_id,
         user_id=current_user.id
@@ -1,23 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect, Response
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 import json
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal, get_async_db
 from app.core.config import settings
 from app.models.user import User
 from app.models.room import Room, RoomParticipant
 from app.schemas.room import RoomCreate, RoomUpdate, RoomResponse, RoomParticipantResponse, RoleUpdate, MuteUpdate
 from app.api.v1.endpoints.auth import get_current_user, oauth2_scheme
+from app.services.auth import AuthService
+from app.services.revocation import access_token_revocation, revocation_ids
+from app.core.query_stats import query_budget
+from app.utils.pagination import keyset_page, finish_page
 
 router = APIRouter()
 
-def get_user_role(room_id: int, user_id: int, db: Session) -> str:
+async def get_user_role(room_id: int, user_id: int, db: AsyncSession) -> str:
     """Kullanıcının odadaki rolünü döndür"""
-    participant = db.query(RoomParticipant).filter(
-        RoomParticipant.room_id == room_id,
-        RoomParticipant.user_id == user_id
-    ).first()
+    participant = await db.scalar(
+        select(RoomParticipant).where(
+            RoomParticipant.room_id == room_id,
+            RoomParticipant.user_id == user_id
+        )
+    )
     return participant.role if participant else "guest"
 
 # WebSocket manager
@@ -48,32 +55,41 @@ manager = ConnectionManager()
 # ============ REST API Endpoints ============
 
 @router.get("/", response_model=List[RoomResponse])
-def read_rooms(
+@query_budget(4)
+async def read_rooms(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     room_type: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Odaları listele"""
-    query = db.query(Room).filter(Room.is_active == True)
+    """Odaları listele (en yeni önce; cursor verilirse keyset sayfalama)"""
+    query = select(Room).where(Room.is_active == True)
     if room_type:
-        query = query.filter(Room.room_type == room_type)
+        query = query.where(Room.room_type == room_type)
     
-    rooms = query.offset(skip).limit(limit).all()
+    rooms = finish_page((await db.scalars(keyset_page(query, Room, cursor, limit, skip))).all(), limit, response)
     
-    for room in rooms:
-        room.participant_count = db.query(RoomParticipant).filter(
-            RoomParticipant.room_id == room.id,
+    # Katılımcı sayıları tek sorguda
+    counts = dict((await db.execute(
+        select(RoomParticipant.room_id, func.count(RoomParticipant.id))
+        .where(
+            RoomParticipant.room_id.in_([room.id for room in rooms]),
             RoomParticipant.is_banned == False
-        ).count()
+        )
+        .group_by(RoomParticipant.room_id)
+    )).all())
+    for room in rooms:
+        room.participant_count = counts.get(room.id, 0)
     
     return rooms
 
 @router.post("/", response_model=RoomResponse, status_code=status.HTTP_201_CREATED)
-def create_room(
+async def create_room(
     room: RoomCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Yeni oda oluştur"""
@@ -82,8 +98,8 @@ def create_room(
         owner_id=current_user.id
     )
     db.add(db_room)
-    db.commit()
-    db.refresh(db_room)
+    await db.commit()
+    await db.refresh(db_room)
     
     participant = RoomParticipant(
         room_id=db_room.id,
@@ -91,101 +107,109 @@ def create_room(
         role="owner"
     )
     db.add(participant)
-    db.commit()
+    await db.commit()
     
     db_room.participant_count = 1
     return db_room
 
 @router.get("/{room_id}", response_model=RoomResponse)
-def read_room(
+async def read_room(
     room_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Oda detayı"""
-    room = db.query(Room).filter(Room.id == room_id).first()
+    room = await db.scalar(select(Room).where(Room.id == room_id))
     if not room:
         raise HTTPException(status_code=404, detail="Oda bulunamadı")
     
-    room.participant_count = db.query(RoomParticipant).filter(
-        RoomParticipant.room_id == room_id,
-        RoomParticipant.is_banned == False
-    ).count()
+    room.participant_count = await db.scalar(
+        select(func.count(RoomParticipant.id)).where(
+            RoomParticipant.room_id == room_id,
+            RoomParticipant.is_banned == False
+        )
+    )
     return room
 
 @router.put("/{room_id}", response_model=RoomResponse)
-def update_room(
+async def update_room(
     room_id: int,
     room_update: RoomUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Oda güncelle"""
-    room = db.query(Room).filter(Room.id == room_id).first()
+    room = await db.scalar(select(Room).where(Room.id == room_id))
     if not room:
         raise HTTPException(status_code=404, detail="Oda bulunamadı")
     
-    user_role = get_user_role(room_id, current_user.id, db)
+    user_role = await get_user_role(room_id, current_user.id, db)
     if user_role not in ["owner", "admin"]:
         raise HTTPException(status_code=403, detail="Bu odayı güncelleme yetkiniz yok")
     
     for key, value in room_update.model_dump(exclude_unset=True).items():
         setattr(room, key, value)
     
-    db.commit()
-    db.refresh(room)
+    await db.commit()
+    await db.refresh(room)
     return room
 
 @router.delete("/{room_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_room(
+async def delete_room(
     room_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Oda sil - Sadece owner silebilir"""
-    room = db.query(Room).filter(Room.id == room_id).first()
+    room = await db.scalar(select(Room).where(Room.id == room_id))
     if not room:
         raise HTTPException(status_code=404, detail="Oda bulunamadı")
     
     if room.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Bu odayı silme yetkiniz yok")
     
-    db.delete(room)
-    db.commit()
+    await db.delete(room)
+    await db.commit()
 
 @router.post("/{room_id}/join")
-def join_room(
+async def join_room(
     room_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Odaya katıl"""
-    room = db.query(Room).filter(Room.id == room_id).first()
+    room = await db.scalar(select(Room).where(Room.id == room_id))
     if not room:
         raise HTTPException(status_code=404, detail="Oda bulunamadı")
     
     if not room.is_active:
         raise HTTPException(status_code=400, detail="Bu oda aktif değil")
     
-    banned = db.query(RoomParticipant).filter(
-        RoomParticipant.room_id == room_id,
-        RoomParticipant.user_id == current_user.id,
-        RoomParticipant.is_banned == True
-    ).first()
+    banned = await db.scalar(
+        select(RoomParticipant).where(
+            RoomParticipant.room_id == room_id,
+            RoomParticipant.user_id == current_user.id,
+            RoomParticipant.is_banned == True
+        )
+    )
     if banned:
         raise HTTPException(status_code=403, detail="Bu odadan engellendiniz")
     
-    current_count = db.query(RoomParticipant).filter(
-        RoomParticipant.room_id == room_id,
-        RoomParticipant.is_banned == False
-    ).count()
+    current_count = await db.scalar(
+        select(func.count(RoomParticipant.id)).where(
+            RoomParticipant.room_id == room_id,
+            RoomParticipant.is_banned == False
+        )
+    )
     if current_count >= room.max_participants:
         raise HTTPException(status_code=400, detail="Oda maksimum kapasiteye ulaştı")
     
-    existing = db.query(RoomParticipant).filter(
-        RoomParticipant.room_id == room_id,
-        RoomParticipant.user_id == current_user.id
-    ).first()
+    existing = await db.scalar(
+        select(RoomParticipant).where(
+            RoomParticipant.room_id == room_id,
+            RoomParticipant.user_id == current_user.id
+        )
+    )
     
     if not existing:
         participant = RoomParticipant(
@@ -194,76 +218,87 @@ def join_room(
             role="member"
         )
         db.add(participant)
-        db.commit()
+        await db.commit()
         return {"message": "Odaya katıldınız", "room_id": room_id}
     else:
         return {"message": "Zaten bu odadasınız", "room_id": room_id}
 
 @router.post("/{room_id}/leave")
-def leave_room(
+async def leave_room(
     room_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Odadan ayrıl"""
-    participant = db.query(RoomParticipant).filter(
-        RoomParticipant.room_id == room_id,
-        RoomParticipant.user_id == current_user.id
-    ).first()
+    participant = await db.scalar(
+        select(RoomParticipant).where(
+            RoomParticipant.room_id == room_id,
+            RoomParticipant.user_id == current_user.id
+        )
+    )
     
     if participant:
         if participant.role == "owner":
-            new_owner = db.query(RoomParticipant).filter(
-                RoomParticipant.room_id == room_id,
-                RoomParticipant.user_id != current_user.id,
-                RoomParticipant.is_banned == False
-            ).first()
+            new_owner = await db.scalar(
+                select(RoomParticipant).where(
+                    RoomParticipant.room_id == room_id,
+                    RoomParticipant.user_id != current_user.id,
+                    RoomParticipant.is_banned == False
+                ).limit(1)
+            )
             
             if new_owner:
                 new_owner.role = "owner"
         
-        db.delete(participant)
-        db.commit()
+        await db.delete(participant)
+        await db.commit()
         return {"message": "Odadan ayrıldınız"}
     
     return {"message": "Zaten odada değilsiniz"}
 
 @router.get("/{room_id}/participants", response_model=List[RoomParticipantResponse])
-def get_participants(
+@query_budget(4)
+async def get_participants(
     room_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Odadaki katılımcıları listele"""
-    room = db.query(Room).filter(Room.id == room_id).first()
+    room = await db.scalar(select(Room).where(Room.id == room_id))
     if not room:
         raise HTTPException(status_code=404, detail="Oda bulunamadı")
     
-    participants = db.query(RoomParticipant).filter(
-        RoomParticipant.room_id == room_id,
-        RoomParticipant.is_banned == False
-    ).all()
+    # Kullanıcı adları aynı sorguda
+    rows = (await db.execute(
+        select(RoomParticipant, User.username)
+        .outerjoin(User, User.id == RoomParticipant.user_id)
+        .where(
+            RoomParticipant.room_id == room_id,
+            RoomParticipant.is_banned == False
+        )
+    )).all()
     
-    for p in participants:
-        user = db.query(User).filter(User.id == p.user_id).first()
-        p.username = user.username if user else None
+    participants = []
+    for p, username in rows:
+        p.username = username
+        participants.append(p)
     
     return participants
 
 @router.put("/{room_id}/role/{user_id}")
-def update_user_role(
+async def update_user_role(
     room_id: int,
     user_id: int,
     role_update: RoleUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Kullanıcının rolünü değiştir"""
-    room = db.query(Room).filter(Room.id == room_id).first()
+    room = await db.scalar(select(Room).where(Room.id == room_id))
     if not room:
         raise HTTPException(status_code=404, detail="Oda bulunamadı")
     
-    user_role = get_user_role(room_id, current_user.id, db)
+    user_role = await get_user_role(room_id, current_user.id, db)
     
     if user_role == "owner":
         pass
@@ -272,35 +307,39 @@ def update_user_role(
     else:
         raise HTTPException(status_code=403, detail="Rol değiştirme yetkiniz yok")
     
-    target = db.query(RoomParticipant).filter(
-        RoomParticipant.room_id == room_id,
-        RoomParticipant.user_id == user_id
-    ).first()
+    target = await db.scalar(
+        select(RoomParticipant).where(
+            RoomParticipant.room_id == room_id,
+            RoomParticipant.user_id == user_id
+        )
+    )
     
     if not target:
         raise HTTPException(status_code=404, detail="Kullanıcı odada bulunamadı")
     
     target.role = role_update.role
-    db.commit()
+    await db.commit()
     
     return {"message": f"Kullanıcı rolü {role_update.role} olarak güncellendi"}
 
 @router.post("/{room_id}/kick/{user_id}")
-def kick_user(
+async def kick_user(
     room_id: int,
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Kullanıcıyı odadan at"""
-    user_role = get_user_role(room_id, current_user.id, db)
+    user_role = await get_user_role(room_id, current_user.id, db)
     if user_role not in ["owner", "admin"]:
         raise HTTPException(status_code=403, detail="Kullanıcı atma yetkiniz yok")
     
-    target = db.query(RoomParticipant).filter(
-        RoomParticipant.room_id == room_id,
-        RoomParticipant.user_id == user_id
-    ).first()
+    target = await db.scalar(
+        select(RoomParticipant).where(
+            RoomParticipant.room_id == room_id,
+            RoomParticipant.user_id == user_id
+        )
+    )
     
     if not target:
         raise HTTPException(status_code=404, detail="Kullanıcı odada bulunamadı")
@@ -308,27 +347,29 @@ def kick_user(
     if target.role == "owner":
         raise HTTPException(status_code=403, detail="Oda sahibini atamazsınız")
     
-    db.delete(target)
-    db.commit()
+    await db.delete(target)
+    await db.commit()
     
     return {"message": "Kullanıcı odadan atıldı"}
 
 @router.post("/{room_id}/ban/{user_id}")
-def ban_user(
+async def ban_user(
     room_id: int,
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Kullanıcıyı odadan engelle"""
-    user_role = get_user_role(room_id, current_user.id, db)
+    user_role = await get_user_role(room_id, current_user.id, db)
     if user_role not in ["owner", "admin"]:
         raise HTTPException(status_code=403, detail="Kullanıcı engelleme yetkiniz yok")
     
-    target = db.query(RoomParticipant).filter(
-        RoomParticipant.room_id == room_id,
-        RoomParticipant.user_id == user_id
-    ).first()
+    target = await db.scalar(
+        select(RoomParticipant).where(
+            RoomParticipant.room_id == room_id,
+            RoomParticipant.user_id == user_id
+        )
+    )
     
     if not target:
         raise HTTPException(status_code=404, detail="Kullanıcı odada bulunamadı")
@@ -337,53 +378,57 @@ def ban_user(
         raise HTTPException(status_code=403, detail="Oda sahibini engelleyemezsiniz")
     
     target.is_banned = True
-    db.commit()
+    await db.commit()
     
     return {"message": "Kullanıcı engellendi"}
 
 @router.post("/{room_id}/unban/{user_id}")
-def unban_user(
+async def unban_user(
     room_id: int,
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Kullanıcının engelini kaldır"""
-    user_role = get_user_role(room_id, current_user.id, db)
+    user_role = await get_user_role(room_id, current_user.id, db)
     if user_role not in ["owner", "admin"]:
         raise HTTPException(status_code=403, detail="Engel kaldırma yetkiniz yok")
     
-    target = db.query(RoomParticipant).filter(
-        RoomParticipant.room_id == room_id,
-        RoomParticipant.user_id == user_id,
-        RoomParticipant.is_banned == True
-    ).first()
+    target = await db.scalar(
+        select(RoomParticipant).where(
+            RoomParticipant.room_id == room_id,
+            RoomParticipant.user_id == user_id,
+            RoomParticipant.is_banned == True
+        )
+    )
     
     if not target:
         raise HTTPException(status_code=404, detail="Engellenmiş kullanıcı bulunamadı")
     
     target.is_banned = False
-    db.commit()
+    await db.commit()
     
     return {"message": "Kullanıcının engeli kaldırıldı"}
 
 @router.post("/{room_id}/mute/{user_id}")
-def mute_user(
+async def mute_user(
     room_id: int,
     user_id: int,
     mute_update: MuteUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Kullanıcıyı sustur"""
-    user_role = get_user_role(room_id, current_user.id, db)
+    user_role = await get_user_role(room_id, current_user.id, db)
     if user_role not in ["owner", "admin", "moderator"]:
         raise HTTPException(status_code=403, detail="Kullanıcı susturma yetkiniz yok")
     
-    target = db.query(RoomParticipant).filter(
-        RoomParticipant.room_id == room_id,
-        RoomParticipant.user_id == user_id
-    ).first()
+    target = await db.scalar(
+        select(RoomParticipant).where(
+            RoomParticipant.room_id == room_id,
+            RoomParticipant.user_id == user_id
+        )
+    )
     
     if not target:
         raise HTTPException(status_code=404, detail="Kullanıcı odada bulunamadı")
@@ -392,44 +437,48 @@ def mute_user(
         raise HTTPException(status_code=403, detail="Bu kullanıcıyı susturamazsınız")
     
     target.is_muted = mute_update.is_muted
-    db.commit()
+    await db.commit()
     
     status_text = "susturuldu" if mute_update.is_muted else "susturması kaldırıldı"
     return {"message": f"Kullanıcı {status_text}"}
 
 @router.post("/{room_id}/transfer/{user_id}")
-def transfer_ownership(
+async def transfer_ownership(
     room_id: int,
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Oda sahipliğini devret"""
-    room = db.query(Room).filter(Room.id == room_id).first()
+    room = await db.scalar(select(Room).where(Room.id == room_id))
     if not room:
         raise HTTPException(status_code=404, detail="Oda bulunamadı")
     
     if room.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Sadece oda sahibi devredebilir")
     
-    target = db.query(RoomParticipant).filter(
-        RoomParticipant.room_id == room_id,
-        RoomParticipant.user_id == user_id
-    ).first()
+    target = await db.scalar(
+        select(RoomParticipant).where(
+            RoomParticipant.room_id == room_id,
+            RoomParticipant.user_id == user_id
+        )
+    )
     
     if not target:
         raise HTTPException(status_code=404, detail="Kullanıcı odada bulunamadı")
     
-    old_owner = db.query(RoomParticipant).filter(
-        RoomParticipant.room_id == room_id,
-        RoomParticipant.user_id == current_user.id
-    ).first()
+    old_owner = await db.scalar(
+        select(RoomParticipant).where(
+            RoomParticipant.room_id == room_id,
+            RoomParticipant.user_id == current_user.id
+        )
+    )
     old_owner.role = "member"
     
     target.role = "owner"
     room.owner_id = user_id
     
-    db.commit()
+    await db.commit()
     
     return {"message": "Oda sahipliği devredildi"}
 
@@ -439,21 +488,31 @@ def transfer_ownership(
 async def websocket_endpoint(
     websocket: WebSocket,
     room_id: int,
-    token: str,
-    db: Session = Depends(get_db)
+    token: str
 ):
     await manager.connect(websocket, room_id)
     
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username = payload.get("sub")
-        user = db.query(User).filter(User.username == username).first()
-        
-        if not user:
+        payload = AuthService.decode_access_token(token)
+        if await access_token_revocation.is_revoked_async(revocation_ids(payload)):
             await websocket.close(code=1008)
             return
+        username = payload.get("sub")
+        claims = AuthService.claims_from_payload(payload)
         
-        user_role = get_user_role(room_id, user.id, db)
+        # Bağlantı boyunca havuzdan bağlantı tutmamak için kısa ömürlü session'lar
+        async with AsyncSessionLocal() as db:
+            if claims:
+                user_id = claims.uid
+            else:
+                # Eski token: kullanıcıyı username ile bul
+                user = await db.scalar(select(User).where(User.username == username))
+                if not user:
+                    await websocket.close(code=1008)
+                    return
+                user_id = user.id
+            
+            user_role = await get_user_role(room_id, user_id, db)
         
         await manager.broadcast({
             "type": "system",
@@ -474,10 +533,13 @@ async def websocket_endpoint(
             message = json.loads(data)
             
             if message["type"] == "chat":
-                participant = db.query(RoomParticipant).filter(
-                    RoomParticipant.room_id == room_id,
-                    RoomParticipant.user_id == user.id
-                ).first()
+                async with AsyncSessionLocal() as db:
+                    participant = await db.scalar(
+                        select(RoomParticipant).where(
+                            RoomParticipant.room_id == room_id,
+                            RoomParticipant.user_id == user_id
+                        )
+                    )
                 
                 if participant and participant.is_muted:
                     await websocket.send_json({
@@ -11,6 +11,8 @@ from app.schemas.settings import (
     NotificationSettings, PrivacySettings, AppearanceSettings
 )
 from app.schemas.session import SessionResponse, SessionListResponse
+from app.services.session_store import refresh_session_store
+from app.services.revocation import access_token_revocation
 from datetime import datetime
 
 router = APIRouter()
@@ -295,6 +297,8 @@ def terminate_session(
     
     session.is_active = False
     db.commit()
+    refresh_session_store.revoke(session.session_token, current_user.id)
+    access_token_revocation.revoke_sessions([session.id])
     
     return None
 
@@ -307,12 +311,16 @@ def terminate_all_other_sessions(
     
     # Mevcut oturum hariç hepsini kapat
     # Not: Gerçek implementasyonda mevcut session_id bilinmeli
-    db.query(UserSession).filter(
+    sessions = db.query(UserSession.id).filter(
         UserSession.user_id == current_user.id,
         UserSession.is_active == True
         # UserSession.id != current_session_id
-    ).update({"is_active": False})
+    )
+    session_ids = [row.id for row in sessions.all()]
+    sessions.update({"is_active": False})
     
     db.commit()
+    refresh_session_store.drop_user(current_user.id)
+    access_token_revocation.revoke_sessions(session_ids)
     
     return None
@@ -6,6 +6,7 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "EduVerse"
     VERSION: str = "1.0.0"
     API_V1_STR: str = "/api/v1"
+    ENVIRONMENT: str = "production"  # development, production, test
     
     # Veritabanı
     POSTGRES_SERVER: str
@@ -13,24 +14,100 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
     POSTGRES_PORT: str = "5432"
+    # Açılışta eksik tabloları oluştur. Alembic zinciri temel tabloları oluşturmadığı için
+    # (ilk revizyon mevcut şemayı değiştirir) yeni kurulumlar buna dayanır; kapatmadan önce
+    # şemanın başka yoldan kurulduğundan emin olun.
+    DB_CREATE_ALL_ON_STARTUP: bool = True
     
     @property
     def DATABASE_URL(self) -> str:
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
     
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+    
+    # Okuma replikaları (virgülle ayrılmış URL'ler, boşsa her şey primary'ye gider)
+    DATABASE_REPLICA_URLS: str = ""
+    # Kullanıcı yazdıktan sonra okumalarının primary'den yapılacağı süre (replika gecikmesi)
+    READ_YOUR_WRITES_SECONDS: int = 5
+    
     # Redis
     REDIS_HOST: str
     REDIS_PORT: int
+    # True: Redis yerine süreç içi yedek (sadece tek worker'lı geliştirme ve testler;
+    # birden fazla worker'da oturumlar, iptaller, sayaçlar ve rate limit worker başına ayrılır)
+    REDIS_IN_MEMORY: bool = False
+    # Açılışta Redis'e bağlanma denemesi (artan beklemeyle); hepsi başarısızsa uygulama açılmaz
+    REDIS_CONNECT_ATTEMPTS: int = 5
     
     @property
     def REDIS_URL(self) -> str:
         return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}"
     
+    RATE_LIMIT_REDIS_MAX_CONNECTIONS: int = 50
+    RATE_LIMIT_MEMORY_MAX_KEYS: int = 100000
+    # "redis": her istek Redis'e gider; "hybrid": worker'lar Redis'ten dilim ayırıp yerelde harcar
+    RATE_LIMIT_MODE: str = "redis"
+    RATE_LIMIT_HYBRID_SLICE_RATIO: float = 0.1  # dilim = limit x oran
+    RATE_LIMIT_HYBRID_SYNC_MS: int = 1000  # dilimin en uzun yerel ömrü
+    
+    # Rate limit için abonelik seviyesi önbelleği
+    TIER_CACHE_TTL_SECONDS: int = 300
+    TIER_CACHE_NEGATIVE_TTL_SECONDS: int = 60
+    TIER_CACHE_MAX_SIZE: int = 100000
+    
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Kullanıcı önbelleği (token -> kullanıcı görüntüsü)
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_SIZE: int = 10000
+    
+    # Şifre hash'leme (bcrypt maliyeti değişirse girişte hash yenilenir)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    
+    # Refresh oturumları Redis'te; last_active/iptaller bu aralıkla Postgres'e yazılır
+    SESSION_FLUSH_INTERVAL_SECONDS: int = 30
+    
+    # Access token iptali (her worker'da Redis'ten tazelenen bloom filter)
+    REVOCATION_SYNC_INTERVAL_SECONDS: int = 5
+    REVOCATION_FILTER_CAPACITY: int = 100000
+    REVOCATION_FILTER_ERROR_RATE: float = 0.01
+    
+    # İstek başına SQL sayacı ve N+1 tespiti
+    QUERY_N_PLUS_ONE_THRESHOLD: int = 5  # aynı sorgu kalıbı bu kadar tekrarlanırsa N+1
+    QUERY_BUDGET_STRICT: bool = False  # True ise (testler) bütçeyi aşan istek hata verir
+    
+    # Rozet sayaçları (Redis hash); okunanlar bu aralıkla SQL'den uzlaştırılır
+    COUNTERS_TTL_SECONDS: int = 86400
+    COUNTERS_RECONCILE_INTERVAL_SECONDS: int = 300
+    
+    # Açılışta conversations özeti boşsa mevcut mesajlardan doldurulur (Alembic çalıştırmayan kurulumlar)
+    CONVERSATIONS_BACKFILL_ON_STARTUP: bool = True
+    
+    # Engel önbelleği (kullanıcı başına engellediği/engelleyen kümeleri); değişiklikler SYNC aralığıyla diğer worker'lara yayılır
+    BLOCK_GRAPH_TTL_SECONDS: int = 600
+    BLOCK_GRAPH_MAX_SIZE: int = 100000
+    BLOCK_GRAPH_SYNC_INTERVAL_SECONDS: int = 2
+    
+    # WebSocket mesajları toplu yazılır: en fazla FLUSH_MS bekler veya BATCH_SIZE dolunca yazar
+    CHAT_WRITER_BATCH_SIZE: int = 200
+    CHAT_WRITER_FLUSH_MS: int = 5
+    CHAT_WRITER_MAX_PENDING: int = 10000
+    
+    # messages aylık partition'ları: önden oluşturulacak ay sayısı, saklama süresi (0 = arşivleme yok).
+    # Arşivlenen mesajlar sohbet geçmişinden, aramadan ve sayaç uzlaştırmasından düşer;
+    # conversations özeti onları göstermeye devam eder. Bilinçli olarak açılmalı.
+    MESSAGE_PARTITION_MONTHS_AHEAD: int = 3
+    MESSAGE_RETENTION_MONTHS: int = 0
+    MESSAGE_ARCHIVE_SCHEMA: str = "archive"
+    MESSAGE_PARTITION_INTERVAL_SECONDS: int = 21600
+    
     # OpenRouter AI
     OPENROUTER_API_KEY: str
     OPENROUTER_API_URL: str = "https://openrouter.ai/api/v1/chat/completions"
@@ -1,7 +1,23 @@
-from sqlalchemy import create_engine
+import random
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
+from app.core.redis import get_redis, get_async_redis
+from app.utils.cache import TTLCache
+
+def _async_url(url: str) -> str:
+    """Senkron URL'yi async sürücülü karşılığına çevir"""
+    if url.startswith("postgresql://"):
+        return "postgresql+asyncpg://" + url[len("postgresql://"):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+REPLICA_URLS = [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
 
 # PostgreSQL bağlantı engine'i
 engine = create_engine(
@@ -11,9 +27,159 @@ engine = create_engine(
     max_overflow=20      # Maksimum ek bağlantı
 )
 
+# Async engine (asyncpg) - async endpoint'ler threadpool'u beklemeden çalışır
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20
+)
+
+# Okuma replikaları
+replica_engines = [create_engine(url, pool_pre_ping=True) for url in REPLICA_URLS]
+async_replica_engines = [create_async_engine(_async_url(url), pool_pre_ping=True) for url in REPLICA_URLS]
+
+# İsteği yapan kullanıcı (read-your-writes için); get_current_user doldurur
+current_user_id: ContextVar[Optional[int]] = ContextVar("current_user_id", default=None)
+# Kullanıcı yakın zamanda yazdı mı (istek başında bir kez async okunur; None = bilinmiyor)
+recent_write: ContextVar[Optional[bool]] = ContextVar("recent_write", default=None)
+
+class WriteTracker:
+    """
+    Kullanıcıların son yazma zamanını tutar.
+    Pencere Redis'te tutulur (kullanıcının sonraki isteği başka worker'a düşebilir);
+    yerel önbellek aynı worker'daki kontrolleri Redis'e gitmeden karşılar.
+    """
+
+    def __init__(self, window_seconds: int):
+        self.window_seconds = window_seconds
+        self._local = TTLCache(max_size=100000, ttl_seconds=window_seconds)
+
+    def _key(self, user_id: int) -> str:
+        return f"db:recent_write:{user_id}"
+
+    def mark(self, user_id: int):
+        self._local.set(user_id, True)
+        try:
+            get_redis().set(self._key(user_id), 1, ex=self.window_seconds)
+        except Exception as e:
+            print(f"⚠️ Yazma işareti kaydedilemedi: {e}")
+
+    def recently_wrote_local(self, user_id: int) -> bool:
+        """Sadece bu worker'daki kayıt (ağa gitmez)"""
+        return self._local.get(user_id, False)
+
+    def recently_wrote(self, user_id: int) -> bool:
+        if self.recently_wrote_local(user_id):
+            return True
+        try:
+            return bool(get_redis().exists(self._key(user_id)))
+        except Exception:
+            return True  # emin değilsek primary'den oku
+
+    async def recently_wrote_async(self, user_id: int) -> bool:
+        if self.recently_wrote_local(user_id):
+            return True
+        try:
+            return bool(await get_async_redis().exists(self._key(user_id)))
+        except Exception:
+            return True
+
+# Singleton instance
+write_tracker = WriteTracker(settings.READ_YOUR_WRITES_SECONDS)
+
+async def set_request_user(user_id: int):
+    """
+    İsteği yapan kullanıcıyı kaydet. Replika varsa yakın zamanda yazıp yazmadığı
+    burada bir kez (async) okunur; get_bind sorgu başına Redis'e gitmez.
+    """
+    current_user_id.set(user_id)
+    if REPLICA_URLS:
+        recent_write.set(await write_tracker.recently_wrote_async(user_id))
+
+class RoutingSession(Session):
+    """
+    Okuma session'ı: sorgular replikalardan birine gider.
+    Yazma ifadeleri, flush'lar ve yakın zamanda yazmış kullanıcının okumaları
+    primary'ye gider. Seçilen hedef session boyunca sabit kalır.
+    """
+
+    primary_engine = engine
+    replicas = replica_engines
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if not self.replicas or self._flushing:
+            return self.primary_engine
+        if clause is not None and not getattr(clause, "is_select", False):
+            # Yazma yapan session bundan sonra da primary'den okusun
+            self.info["route"] = self.primary_engine
+            return self.primary_engine
+
+        route = self.info.get("route")
+        if route is None:
+            user_id = current_user_id.get()
+            if user_id is not None and self._recently_wrote(user_id):
+                route = self.primary_engine
+            else:
+                route = random.choice(self.replicas)
+            self.info["route"] = route
+        return route
+
+    def _recently_wrote(self, user_id: int) -> bool:
+        # Thread'de çalışır; istek başında okunmadıysa Redis'e sorulabilir
+        flag = recent_write.get()
+        if flag is not None:
+            return flag or write_tracker.recently_wrote_local(user_id)
+        return write_tracker.recently_wrote(user_id)
+
+class AsyncRoutingSession(RoutingSession):
+    """AsyncSession'ın altındaki senkron session (async engine'lerle)"""
+
+    primary_engine = async_engine.sync_engine
+    replicas = [e.sync_engine for e in async_replica_engines]
+
+    def _recently_wrote(self, user_id: int) -> bool:
+        # Event loop'ta çalışır: ağa gitmez (istek başındaki bayrak + bu worker'ın kaydı)
+        return bool(recent_write.get()) or write_tracker.recently_wrote_local(user_id)
+
+# Kullanıcının yazdığını işaretle (tüm session'lar için)
+@event.listens_for(Session, "after_flush")
+def _remember_write(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(Session, "after_commit")
+def _track_write(session):
+    if session.info.pop("wrote", False) and REPLICA_URLS:
+        user_id = current_user_id.get()
+        if user_id is not None:
+            write_tracker.mark(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_write(session):
+    session.info.pop("wrote", None)
+
 # Session oluşturucu
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Okuma session oluşturucu (replikalara yönlendirir)
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
+
+# Async session oluşturucu; commit sonrası nesneler yeniden yüklenmez
+# (response serileştirilirken lazy load yapılamaz)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+AsyncReadSessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=AsyncRoutingSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base model sınıfı
 Base = declarative_base()
 
@@ -24,3 +190,20 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Sadece okuyan endpoint'ler için (replika)
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Async dependency - async def endpoint'ler için
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
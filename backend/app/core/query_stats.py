@@ -0,0 +1,153 @@
+import asyncio
+import functools
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+# Parametre listelerini (IN (?, ?, ?)) tek kalıba indir; boşlukları sadeleştir
+_PARAM_LIST = re.compile(r"\(\s*(?:\?|\$\d+|%\(\w+\)s|%s)(?:\s*,\s*(?:\?|\$\d+|%\(\w+\)s|%s))*\s*\)")
+_SPACES = re.compile(r"\s+")
+
+def statement_shape(statement: str) -> str:
+    return _SPACES.sub(" ", _PARAM_LIST.sub("(?)", statement)).strip()
+
+class QueryBudgetExceeded(AssertionError):
+    """Endpoint beyan ettiği sorgu bütçesini aştı (QUERY_BUDGET_STRICT modunda)"""
+
+class QueryStats:
+    """Bir isteğin SQL istatistikleri"""
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+        # Endpoint'e girildiğinde sayılmış sorgular (middleware, kimlik doğrulama);
+        # bütçe sadece endpoint'in kendi sorgularına uygulanır
+        self.baseline: Optional[int] = None
+        self._scope = scope
+        self._lock = threading.Lock()
+
+    @property
+    def budget(self) -> Optional[int]:
+        """Eşleşen endpoint'in beyan ettiği bütçe (router scope'a endpoint'i yazar)"""
+        if self._scope is None:
+            return None
+        return getattr(self._scope.get("endpoint"), "__query_budget__", None)
+
+    def enter_endpoint(self):
+        with self._lock:
+            self.baseline = self.count
+
+    @property
+    def endpoint_count(self) -> Optional[int]:
+        """Endpoint gövdesinin çalıştırdığı sorgu sayısı (bütçeli endpoint'lerde)"""
+        if self.baseline is None:
+            return None
+        return self.count - self.baseline
+
+    def record(self, statement: str, duration: float):
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            self.shapes[statement_shape(statement)] += 1
+            count = self.endpoint_count
+        if settings.QUERY_BUDGET_STRICT and count is not None:
+            budget = self.budget
+            if budget is not None and count > budget:
+                raise QueryBudgetExceeded(f"Sorgu bütçesi aşıldı: {count} > {budget}")
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+    def n_plus_one(self, threshold: int = None) -> Dict[str, int]:
+        """Eşik kadar tekrarlanan sorgu kalıpları"""
+        threshold = threshold or settings.QUERY_N_PLUS_ONE_THRESHOLD
+        return {shape: n for shape, n in self.shapes.items() if n >= threshold}
+
+    @property
+    def over_budget(self) -> bool:
+        count = self.endpoint_count
+        return self.budget is not None and count is not None and count > self.budget
+
+# Aktif isteğin istatistikleri (middleware kurar; threadpool ve greenlet'lere context ile taşınır)
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+def _enter_endpoint():
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.enter_endpoint()
+
+def query_budget(max_queries: int):
+    """
+    Endpoint'in istek başına en fazla kaç SQL çalıştırabileceğini beyan et.
+    Sayım endpoint'e girilince başlar; middleware ve bağımlılık (kimlik doğrulama)
+    sorguları önbellek durumuna göre değiştiği için bütçeye dahil edilmez.
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                _enter_endpoint()
+                return await func(*args, **kwargs)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                _enter_endpoint()
+                return func(*args, **kwargs)
+        wrapper.__query_budget__ = max_queries
+        return wrapper
+    return decorator
+
+class QueryMetrics:
+    """Route başına toplam SQL metrikleri (prod'da header yerine)"""
+
+    def __init__(self):
+        self._routes: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, route: str, stats: QueryStats):
+        n_plus_one = stats.n_plus_one()
+        with self._lock:
+            m = self._routes.setdefault(route, {
+                "requests": 0, "queries": 0, "db_time_ms": 0.0,
+                "max_queries": 0, "n_plus_one": 0, "over_budget": 0
+            })
+            m["requests"] += 1
+            m["queries"] += stats.count
+            m["db_time_ms"] += stats.duration_ms
+            m["max_queries"] = max(m["max_queries"], stats.count)
+            m["n_plus_one"] += 1 if n_plus_one else 0
+            m["over_budget"] += 1 if stats.over_budget else 0
+            first_n_plus_one = n_plus_one and m["n_plus_one"] == 1
+        if first_n_plus_one:
+            # Her route için bir kez logla
+            print(f"⚠️ N+1 sorgu tespit edildi: {route} ({max(n_plus_one.values())} tekrar)")
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {route: dict(m) for route, m in self._routes.items()}
+
+# Singleton instance
+query_metrics = QueryMetrics()
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_query_stats.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_query_stats.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    stats.record(statement, time.perf_counter() - starts.pop())
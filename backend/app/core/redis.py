@@ -0,0 +1,311 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional
+import redis
+import redis.asyncio
+from app.core.config import settings
+
+class InMemoryRedis:
+    """
+    REDIS_IN_MEMORY ile (tek worker'lı geliştirme, testler) kullanılan süreç içi yedek.
+    Uygulamanın kullandığı komutların küçük bir alt kümesini,
+    decode_responses=True davranışıyla (her şey str) taklit eder.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    # ---- yardımcılar ----
+    def _alive(self, name: str) -> bool:
+        expires_at = self._expires.get(name)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._data.pop(name, None)
+            self._expires.pop(name, None)
+            return False
+        return name in self._data
+
+    def _get_typed(self, name: str, factory):
+        if not self._alive(name):
+            self._data[name] = factory()
+        return self._data[name]
+
+    # ---- genel ----
+    def ping(self) -> bool:
+        return True
+
+    def exists(self, *names: str) -> int:
+        with self._lock:
+            return sum(1 for n in names if self._alive(n))
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            removed = 0
+            for n in names:
+                if self._alive(n):
+                    removed += 1
+                self._data.pop(n, None)
+                self._expires.pop(n, None)
+            return removed
+
+    def expire(self, name: str, seconds: int) -> bool:
+        with self._lock:
+            if not self._alive(name):
+                return False
+            self._expires[name] = time.monotonic() + seconds
+            return True
+
+    def ttl(self, name: str) -> int:
+        with self._lock:
+            if not self._alive(name):
+                return -2
+            expires_at = self._expires.get(name)
+            if expires_at is None:
+                return -1
+            return max(0, int(expires_at - time.monotonic()))
+
+    # ---- string ----
+    def get(self, name: str) -> Optional[str]:
+        with self._lock:
+            return self._data.get(name) if self._alive(name) else None
+
+    def set(self, name: str, value: Any, ex: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        with self._lock:
+            if nx and self._alive(name):
+                return None
+            self._data[name] = str(value)
+            if ex is not None:
+                self._expires[name] = time.monotonic() + ex
+            else:
+                self._expires.pop(name, None)
+            return True
+
+    def setex(self, name: str, time_seconds: int, value: Any) -> bool:
+        return self.set(name, value, ex=time_seconds)
+
+    def incrby(self, name: str, amount: int = 1) -> int:
+        with self._lock:
+            value = int(self._data[name]) + amount if self._alive(name) else amount
+            self._data[name] = str(value)
+            return value
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        return self.incrby(name, amount)
+
+    # ---- hash ----
+    def hset(self, name: str, key: Optional[str] = None, value: Any = None, mapping: Optional[dict] = None) -> int:
+        with self._lock:
+            h = self._get_typed(name, dict)
+            items = dict(mapping or {})
+            if key is not None:
+                items[key] = value
+            added = 0
+            for k, v in items.items():
+                if k not in h:
+                    added += 1
+                h[k] = str(v)
+            return added
+
+    def hsetnx(self, name: str, key: str, value: Any) -> int:
+        with self._lock:
+            h = self._get_typed(name, dict)
+            if key in h:
+                return 0
+            h[key] = str(value)
+            return 1
+
+    def hget(self, name: str, key: str) -> Optional[str]:
+        with self._lock:
+            return self._data[name].get(key) if self._alive(name) else None
+
+    def hgetall(self, name: str) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._data[name]) if self._alive(name) else {}
+
+    def hdel(self, name: str, *keys: str) -> int:
+        with self._lock:
+            if not self._alive(name):
+                return 0
+            h = self._data[name]
+            removed = sum(1 for k in keys if h.pop(k, None) is not None)
+            if not h:
+                self.delete(name)
+            return removed
+
+    def hincrby(self, name: str, key: str, amount: int = 1) -> int:
+        with self._lock:
+            h = self._get_typed(name, dict)
+            value = int(h.get(key, 0)) + amount
+            h[key] = str(value)
+            return value
+
+    # ---- set ----
+    def sadd(self, name: str, *values: Any) -> int:
+        with self._lock:
+            s = self._get_typed(name, set)
+            before = len(s)
+            s.update(str(v) for v in values)
+            return len(s) - before
+
+    def srem(self, name: str, *values: Any) -> int:
+        with self._lock:
+            if not self._alive(name):
+                return 0
+            s = self._data[name]
+            removed = 0
+            for v in values:
+                if str(v) in s:
+                    s.discard(str(v))
+                    removed += 1
+            if not s:
+                self.delete(name)
+            return removed
+
+    def smembers(self, name: str) -> set:
+        with self._lock:
+            return set(self._data[name]) if self._alive(name) else set()
+
+    def sismember(self, name: str, value: Any) -> bool:
+        with self._lock:
+            return self._alive(name) and str(value) in self._data[name]
+
+    # ---- sorted set ----
+    def zadd(self, name: str, mapping: dict) -> int:
+        with self._lock:
+            z = self._get_typed(name, dict)
+            added = sum(1 for m in mapping if str(m) not in z)
+            for member, score in mapping.items():
+                z[str(member)] = float(score)
+            return added
+
+    def zscore(self, name: str, member: Any) -> Optional[float]:
+        with self._lock:
+            return self._data[name].get(str(member)) if self._alive(name) else None
+
+    def zrangebyscore(self, name: str, min: Any, max: Any) -> list:
+        with self._lock:
+            if not self._alive(name):
+                return []
+            lo = float("-inf") if min == "-inf" else float(min)
+            hi = float("inf") if max == "+inf" else float(max)
+            items = sorted(self._data[name].items(), key=lambda kv: kv[1])
+            return [m for m, score in items if lo <= score <= hi]
+
+    def zremrangebyscore(self, name: str, min: Any, max: Any) -> int:
+        with self._lock:
+            members = self.zrangebyscore(name, min, max)
+            for m in members:
+                self._data[name].pop(m, None)
+            return len(members)
+
+    # ---- pipeline ----
+    def pipeline(self, transaction: bool = True) -> "InMemoryPipeline":
+        return InMemoryPipeline(self)
+
+class InMemoryPipeline:
+    """Komutları biriktirip tek kilit altında sırayla çalıştırır (MULTI/EXEC benzeri)"""
+
+    def __init__(self, client: InMemoryRedis):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name: str):
+        method = getattr(self._client, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((method, args, kwargs))
+            return self
+        return queue
+
+    def execute(self) -> list:
+        with self._client._lock:
+            results = [method(*args, **kwargs) for method, args, kwargs in self._commands]
+        self._commands = []
+        return results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._commands = []
+
+class AsyncInMemoryRedis:
+    """InMemoryRedis'in async arayüzü (komutlar bellekte, beklemeden çalışır)"""
+
+    def __init__(self, client: InMemoryRedis):
+        self._client = client
+
+    def __getattr__(self, name: str):
+        method = getattr(self._client, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+def get_redis():
+    """
+    Paylaşılan Redis istemcisini döndür.
+    Bağlantı ilk komutta kurulur; Redis'e ulaşılamazsa komut hata verir (sessizce
+    worker'a özel belleğe geçilmez). Süreç içi yedek sadece REDIS_IN_MEMORY ile.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                if settings.REDIS_IN_MEMORY:
+                    _client = InMemoryRedis()
+                else:
+                    _client = redis.Redis(
+                        host=settings.REDIS_HOST,
+                        port=settings.REDIS_PORT,
+                        decode_responses=True,
+                        socket_connect_timeout=1
+                    )
+    return _client
+
+def get_async_redis():
+    """
+    Async endpoint'ler için Redis istemcisi (event loop'u bloklamaz).
+    Süreç içi yedekte get_redis() ile aynı bellek içi veriyi kullanır.
+    """
+    global _async_client
+    if _async_client is None:
+        client = get_redis()
+        with _client_lock:
+            if _async_client is None:
+                if isinstance(client, InMemoryRedis):
+                    _async_client = AsyncInMemoryRedis(client)
+                else:
+                    _async_client = redis.asyncio.Redis(
+                        host=settings.REDIS_HOST,
+                        port=settings.REDIS_PORT,
+                        decode_responses=True,
+                        socket_connect_timeout=1
+                    )
+    return _async_client
+
+async def wait_for_redis(attempts: int, delay: float = 0.5):
+    """Açılışta Redis'in erişilebilir olduğunu doğrula; her denemede bekleme iki katına çıkar"""
+    client = get_async_redis()
+    for attempt in range(1, attempts + 1):
+        try:
+            await client.ping()
+            return
+        except Exception as e:
+            if attempt >= attempts:
+                raise RuntimeError(f"Redis'e bağlanılamadı ({attempts} deneme): {e}") from e
+            print(f"⚠️ Redis bağlantısı yok ({e}), {delay:.1f} sn sonra tekrar denenecek")
+            await asyncio.sleep(delay)
+            delay *= 2
+
+def set_redis(client):
+    """İstemciyi değiştir (testlerde InMemoryRedis vermek için)"""
+    global _client, _async_client
+    _client = client
+    _async_client = None
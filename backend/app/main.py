@@ -1,20 +1,90 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
 from app.api.v1 import router as api_router
-from app.core.database import engine, Base
-from app.middleware import RateLimitMiddleware
+from app.api import deps
+from app.api.v1.endpoints.ai import ai_service
+from app.core.database import engine, async_engine, Base, SessionLocal, AsyncSessionLocal
+from app.models.user import User
+from app.models.message import ensure_search_schema
+from app.middleware import RateLimitMiddleware, QueryStatsMiddleware
+from app.core.query_stats import query_metrics
+from app.core.redis import wait_for_redis
+from app.services.auth import AuthService
+from app.services.password_hasher import password_hasher
+from app.services.session_store import flush_sessions, flush_sessions_periodically
+from app.services.revocation import access_token_revocation, revocation_ids, sync_revocations_periodically
+from app.services.file_service import ensure_upload_dirs
+from app.services.message_partitions import maintain_partitions_periodically
+from app.services.chat_connections import chat_connections
+from app.services.conversation_service import ConversationService
+from app.services.counters import reconcile_counters_periodically
+from app.services.message_writer import message_writer, MessageRejected
+from app.services.block_graph import block_graph, sync_block_graph_periodically
+import asyncio
 import json
 from urllib.parse import parse_qs
-import jwt
 
-# Veritabanı tablolarını oluştur
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Açılış/kapanış işleri; modül import edilirken hiçbir bağlantı kurulmaz"""
+    # Oturumlar, iptaller, sayaçlar ve rate limit worker'lar arasında Redis'le paylaşılır
+    await wait_for_redis(settings.REDIS_CONNECT_ATTEMPTS)
+    if settings.DB_CREATE_ALL_ON_STARTUP:
+        await run_in_threadpool(Base.metadata.create_all, bind=engine)
+        # Var olan messages tablosuna arama kolonu create_all ile eklenmez
+        if await run_in_threadpool(ensure_search_schema, engine):
+            print("✅ Mesaj arama kolonu ve index'leri eklendi")
+    ensure_upload_dirs()
+    if settings.CONVERSATIONS_BACKFILL_ON_STARTUP:
+        try:
+            async with AsyncSessionLocal() as db:
+                if await ConversationService.backfill_if_empty(db):
+                    print("✅ Sohbet özetleri mevcut mesajlardan dolduruldu")
+        except Exception as e:
+            print(f"🔴 Sohbet özeti doldurma hatası: {e}")
+    
+    app.state.session_flusher = asyncio.create_task(
+        flush_sessions_periodically(settings.SESSION_FLUSH_INTERVAL_SECONDS)
+    )
+    app.state.revocation_sync = asyncio.create_task(
+        sync_revocations_periodically(settings.REVOCATION_SYNC_INTERVAL_SECONDS)
+    )
+    app.state.partition_maintenance = asyncio.create_task(
+        maintain_partitions_periodically(settings.MESSAGE_PARTITION_INTERVAL_SECONDS)
+    )
+    app.state.counters_reconciler = asyncio.create_task(
+        reconcile_counters_periodically(settings.COUNTERS_RECONCILE_INTERVAL_SECONDS)
+    )
+    app.state.block_graph_sync = asyncio.create_task(
+        sync_block_graph_periodically(settings.BLOCK_GRAPH_SYNC_INTERVAL_SECONDS)
+    )
+    message_writer.start()
+    
+    yield
+    
+    # Kuyrukta bekleyen WebSocket mesajlarını yaz
+    await message_writer.stop()
+    app.state.block_graph_sync.cancel()
+    app.state.counters_reconciler.cancel()
+    app.state.partition_maintenance.cancel()
+    app.state.revocation_sync.cancel()
+    app.state.session_flusher.cancel()
+    try:
+        await run_in_threadpool(flush_sessions)
+    except Exception as e:
+        print(f"🔴 Oturum flush hatası: {e}")
+    password_hasher.shutdown()
+    await ai_service.close()
+    await async_engine.dispose()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # Rate Limit Middleware (YENİ)
@@ -42,22 +112,39 @@ app.add_middleware(
     max_age=3600,
 )
 
+# İstek başına SQL sayacı (en dışta; rate limit'in sorgularını da sayar)
+app.add_middleware(QueryStatsMiddleware)
+
 # API router'ını ekle
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
-# WebSocket bağlantılarını tut
-active_connections = {}
-
-JWT_SECRET = settings.SECRET_KEY
-JWT_ALGORITHM = "HS256"
+def _user_id_by_username(username: str):
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == username).first()
+        return user.id if user else None
+    finally:
+        db.close()
 
-def decode_token(token: str):
+async def decode_token(token: str):
+    """Token'dan kullanıcı id'sini çöz (v2'de uid claim'i, eski token'larda username ile DB)"""
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload.get("user_id")
+        payload = AuthService.decode_access_token(token)
     except Exception as e:
         print(f"🔴 Token decode hatası: {e}")
         return None
+    
+    if await access_token_revocation.is_revoked_async(revocation_ids(payload)):
+        return None
+    
+    claims = AuthService.claims_from_payload(payload)
+    if claims:
+        return claims.uid
+    
+    username = payload.get("sub")
+    if not username:
+        return None
+    return await run_in_threadpool(_user_id_by_username, username)
 
 @app.websocket("/api/v1/ws/chat")
 async def websocket_endpoint(websocket: WebSocket):
@@ -70,14 +157,12 @@ async def websocket_endpoint(websocket: WebSocket):
         token = params.get('token', [None])[0]
 
         if token:
-            user_id = decode_token(token)
+            user_id = await decode_token(token)
             if not user_id:
                 await websocket.close(code=1008)
                 return
             
-            if user_id not in active_connections:
-                active_connections[user_id] = []
-            active_connections[user_id].append(websocket)
+            chat_connections.add(user_id, websocket)
             print(f"✅ WebSocket bağlandı: {user_id}")
 
         while True:
@@ -87,49 +172,73 @@ async def websocket_endpoint(websocket: WebSocket):
 
             if message["type"] == "private_message":
                 receiver_id = message["receiver_id"]
-                if receiver_id in active_connections:
-                    for conn in active_connections[receiver_id]:
-                        await conn.send_json({
-                            "type": "private_message",
-                            "sender_id": user_id,
-                            "content": message["content"],
-                            "timestamp": message.get("timestamp")
-                        })
+                client_id = message.get("client_id")
+                if not user_id:
+                    await websocket.send_json({"type": "message_error", "client_id": client_id, "detail": "Giriş gerekli"})
+                    continue
+                
+                # Toplu yazıcıya ver; kaydedilince id ile onay dön
+                try:
+                    saved = await message_writer.submit(
+                        user_id,
+                        receiver_id,
+                        message.get("content"),
+                        message.get("message_type", "text"),
+                        message.get("file_url")
+                    )
+                except MessageRejected as e:
+                    await websocket.send_json({"type": "message_error", "client_id": client_id, "detail": str(e)})
+                    continue
+                except Exception:
+                    await websocket.send_json({"type": "message_error", "client_id": client_id, "detail": "Mesaj kaydedilemedi"})
+                    continue
+                
+                await websocket.send_json({
+                    "type": "message_ack",
+                    "client_id": client_id,
+                    "message_id": saved.id,
+                    "created_at": saved.created_at.isoformat()
+                })
+                if await chat_connections.send_to_user(receiver_id, {
+                    "type": "private_message",
+                    "message_id": saved.id,
+                    "sender_id": user_id,
+                    "content": saved.content,
+                    "message_type": saved.message_type,
+                    "file_url": saved.file_url,
+                    "created_at": saved.created_at.isoformat(),
+                    "timestamp": message.get("timestamp")
+                }):
                     print(f"📤 Mesaj iletildi: {receiver_id}")
 
             elif message["type"] == "typing":
-                receiver_id = message["receiver_id"]
-                if receiver_id in active_connections:
-                    for conn in active_connections[receiver_id]:
-                        await conn.send_json({
-                            "type": "typing",
-                            "sender_id": user_id,
-                            "is_typing": message.get("is_typing")
-                        })
+                # Engellenmiş kullanıcıya olay iletilmez
+                if not user_id or await block_graph.is_blocked_async(user_id, message["receiver_id"]):
+                    continue
+                await chat_connections.send_to_user(message["receiver_id"], {
+                    "type": "typing",
+                    "sender_id": user_id,
+                    "is_typing": message.get("is_typing")
+                })
 
             elif message["type"] == "mark_read":
-                sender_id = message["sender_id"]
-                if sender_id in active_connections:
-                    for conn in active_connections[sender_id]:
-                        await conn.send_json({
-                            "type": "read_receipt",
-                            "reader_id": user_id,
-                            "message_ids": message.get("message_ids")
-                        })
+                if not user_id or await block_graph.is_blocked_async(user_id, message["sender_id"]):
+                    continue
+                await chat_connections.send_to_user(message["sender_id"], {
+                    "type": "read_receipt",
+                    "reader_id": user_id,
+                    "message_ids": message.get("message_ids")
+                })
 
     except WebSocketDisconnect:
-        if user_id and user_id in active_connections:
-            active_connections[user_id] = [c for c in active_connections[user_id] if c != websocket]
-            if not active_connections[user_id]:
-                del active_connections[user_id]
+        if user_id:
+            chat_connections.remove(user_id, websocket)
             print(f"❌ WebSocket ayrıldı: {user_id}")
 
     except Exception as e:
         print(f"🔴 WebSocket hatası: {e}")
-        if user_id and user_id in active_connections:
-            active_connections[user_id] = [c for c in active_connections[user_id] if c != websocket]
-            if not active_connections[user_id]:
-                del active_connections[user_id]
+        if user_id:
+            chat_connections.remove(user_id, websocket)
 
 @app.get("/")
 def root():
@@ -142,3 +251,8 @@ def root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy", "database": "connected"}
+
+@app.get("/metrics/db", dependencies=[Depends(deps.get_admin_claims)])
+def db_metrics():
+    """Route başına SQL sayısı, süresi ve N+1 sayaçları (sadece admin)"""
+    return query_metrics.snapshot()
@@ -1,3 +1,4 @@
 from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
 
-__all__ = ["RateLimitMiddleware"]
+__all__ = ["RateLimitMiddleware", "QueryStatsMiddleware"]
@@ -0,0 +1,308 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+from app.core.config import settings
+
+# GCRA (Generic Cell Rate Algorithm): anahtar başına tek sayı (TAT) tutar.
+# Okuma-kontrol-yazma Redis içinde atomik çalışır; tek round trip.
+# Saat olarak Redis TIME kullanılır, böylece worker saatleri farklı olsa da tutarlıdır.
+GCRA_SCRIPT = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local interval = window_ms / limit
+
+local tat = tonumber(redis.call('GET', key))
+if tat == nil or tat < now then
+    tat = now
+end
+
+local new_tat = tat + interval * cost
+local allow_at = new_tat - window_ms
+if allow_at > now then
+    return {0, math.ceil(allow_at - now)}
+end
+
+redis.call('SET', key, tostring(new_tat), 'PX', math.ceil(new_tat - now))
+return {1, math.floor((now + window_ms - new_tat) / interval)}
+"""
+
+# Aynı GCRA durumundan bir seferde "requested" kadar hak ayırır (en az 1, en çok mevcut kadar).
+# Dönüş: {ayrılan, kalan} veya hak yoksa {0, beklenecek ms}
+LEASE_SCRIPT = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local interval = window_ms / limit
+
+local tat = tonumber(redis.call('GET', key))
+if tat == nil or tat < now then
+    tat = now
+end
+
+local available = math.floor((now + window_ms - tat) / interval)
+if available < 1 then
+    return {0, math.ceil(tat + interval - window_ms - now)}
+end
+
+local granted = math.min(requested, available)
+local new_tat = tat + interval * granted
+redis.call('SET', key, tostring(new_tat), 'PX', math.ceil(new_tat - now))
+return {granted, available - granted}
+"""
+
+# Kullanılmayan ayrılmış hakları geri ver
+REFUND_SCRIPT = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local unused = tonumber(ARGV[3])
+
+local tat = tonumber(redis.call('GET', key))
+if tat == nil then
+    return 0
+end
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local new_tat = math.max(now, tat - (window_ms / limit) * unused)
+if new_tat <= now then
+    redis.call('DEL', key)
+else
+    redis.call('SET', key, tostring(new_tat), 'PX', math.ceil(new_tat - now))
+end
+return 1
+"""
+
+class RedisGCRALimiter:
+    """
+    asyncio Redis üzerinde atomik GCRA rate limiter.
+    Redis'e ulaşılamazsa bir süre devre dışı kalır, çağıran taraf memory'ye düşer.
+    """
+
+    def __init__(self, url: str, max_connections: int, retry_after: int = 30):
+        # Havuz doluysa bağlantı beklenir (ConnectionPool hata verip limiter'ı kapatırdı)
+        self._pool = aioredis.BlockingConnectionPool.from_url(
+            url,
+            max_connections=max_connections,
+            timeout=1,
+            socket_connect_timeout=1,
+            socket_timeout=1
+        )
+        self._client = aioredis.Redis(connection_pool=self._pool)
+        self._script = self._client.register_script(GCRA_SCRIPT)
+        self._retry_after = retry_after
+        self._disabled_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._disabled_until
+
+    async def hit(self, key: str, limit: int, window: int, cost: int = 1) -> Optional[Tuple[bool, int]]:
+        """
+        (izin verildi mi, kalan hak veya beklenecek saniye) döndürür.
+        Redis hatasında None döner.
+        """
+        if not self.available:
+            return None
+        try:
+            allowed, value = await self._script(keys=[key], args=[limit, window * 1000, cost])
+        except RedisError as e:
+            self._disable(e)
+            return None
+        if allowed:
+            return True, int(value)
+        return False, math.ceil(int(value) / 1000)
+
+    def _disable(self, error: Exception):
+        print(f"⚠️ Redis rate limit hatası, memory'ye geçiliyor: {error}")
+        self._disabled_until = time.monotonic() + self._retry_after
+
+    async def close(self):
+        await self._pool.disconnect()
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+class MemoryTokenBucketLimiter:
+    """
+    Süreç içi token bucket limiter (Redis yokken).
+    Anahtar başına iki sayı tutar; tablo max_keys ile sınırlıdır ve
+    dolunca en uzun süredir kullanılmayan anahtar atılır (LRU).
+    Pencere boyunca boşta kalan bucket zaten dolmuştur, atılması bilgi kaybettirmez.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, _Bucket]" = OrderedDict()
+
+    def hit(self, key: str, limit: int, window: int, cost: int = 1) -> Tuple[bool, int]:
+        now = time.monotonic()
+        rate = limit / window  # saniyede dolan token
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = _Bucket(float(limit), now)
+            self._buckets[key] = bucket
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket.tokens = min(float(limit), bucket.tokens + (now - bucket.updated) * rate)
+            bucket.updated = now
+
+        if bucket.tokens < cost:
+            return False, math.ceil((cost - bucket.tokens) / rate)
+
+        bucket.tokens -= cost
+        return True, int(bucket.tokens)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+class _Lease:
+    __slots__ = ("tokens", "limit", "expires", "blocked_until", "retry_after", "refill")
+
+    def __init__(self, limit: int):
+        self.tokens = 0
+        self.limit = limit
+        self.expires = 0.0
+        self.blocked_until = 0.0
+        self.retry_after = 0
+        self.refill: Optional[asyncio.Future] = None
+
+class HybridLimiter(RedisGCRALimiter):
+    """
+    İki katmanlı limiter: her worker, istemci kotasından Redis'te bir dilim
+    (slice) ayırıp yerelde harcar. Redis'e sadece dilim bittiğinde (K istek)
+    ya da süresi dolduğunda (N ms) gidilir; dilim yarılanınca bir sonraki
+    arka planda önden alınır. Harcanmayan haklar süre dolunca geri verilir.
+
+    Dilim önceden ayrıldığı için global limit hiçbir zaman aşılmaz; hata payı
+    en fazla (worker sayısı x dilim) kadar fazladan reddedilen istektir.
+    """
+
+    def __init__(self, url: str, max_connections: int, slice_ratio: float,
+                 sync_ms: int, max_keys: int, retry_after: int = 30):
+        super().__init__(url, max_connections, retry_after)
+        self.slice_ratio = slice_ratio
+        self.lease_seconds = sync_ms / 1000
+        self.max_keys = max_keys
+        self._lease_script = self._client.register_script(LEASE_SCRIPT)
+        self._refund_script = self._client.register_script(REFUND_SCRIPT)
+        self._leases: "OrderedDict[str, _Lease]" = OrderedDict()
+        self._windows: dict = {}
+
+    def _slice(self, limit: int) -> int:
+        return max(1, int(limit * self.slice_ratio))
+
+    async def hit(self, key: str, limit: int, window: int, cost: int = 1) -> Optional[Tuple[bool, int]]:
+        if not self.available:
+            return None
+
+        now = time.monotonic()
+        lease = self._get_lease(key, limit, window, now)
+
+        if lease.tokens < cost:
+            if lease.blocked_until > now:
+                return False, lease.retry_after
+            ok = await self._start_refill(key, lease, limit, window, max(cost, self._slice(limit)))
+            if not ok:
+                return None
+            if lease.tokens < cost:
+                if lease.blocked_until > time.monotonic():
+                    return False, lease.retry_after
+                # Kısmi dilim: eksik haklar birikene kadar bekle (kalanlar dilimde kullanılır)
+                return False, max(1, math.ceil((cost - lease.tokens) * window / limit))
+
+        lease.tokens -= cost
+
+        # Dilim yarılandıysa bir sonrakini beklemeden arka planda al
+        if lease.tokens < self._slice(limit) / 2:
+            self._start_refill(key, lease, limit, window, self._slice(limit))
+        return True, lease.tokens
+
+    def _get_lease(self, key: str, limit: int, window: int, now: float) -> _Lease:
+        lease = self._leases.get(key)
+        if lease is not None and lease.refill is None and (lease.expires <= now or lease.limit != limit):
+            # Süresi dolan veya limiti değişen dilimin kalanını geri ver
+            self._release(key, lease, window)
+            lease = None
+
+        if lease is None:
+            lease = _Lease(limit)
+            self._leases[key] = lease
+            self._windows[key] = window
+            if len(self._leases) > self.max_keys:
+                self._evict(key, window)
+        else:
+            self._leases.move_to_end(key)
+        return lease
+
+    def _evict(self, keep: str, window: int):
+        """
+        En eski dilimleri bırak. Redis isteği süren dilimler atlanır: bırakılırsa
+        dönen haklar sahipsiz dilime yazılır ve hiç iade edilmezdi.
+        """
+        excess = len(self._leases) - self.max_keys
+        victims = []
+        for old_key, old_lease in self._leases.items():
+            if len(victims) >= excess:
+                break
+            if old_key != keep and old_lease.refill is None:
+                victims.append((old_key, old_lease))
+        for old_key, old_lease in victims:
+            self._release(old_key, old_lease, self._windows.get(old_key, window))
+
+    def _start_refill(self, key: str, lease: _Lease, limit: int, window: int, want: int) -> asyncio.Future:
+        """Aynı anahtar için aynı anda tek Redis isteği; bekleyenler onu paylaşır"""
+        if lease.refill is None:
+            lease.refill = asyncio.ensure_future(self._acquire(key, lease, limit, window, want))
+        return lease.refill
+
+    async def _acquire(self, key: str, lease: _Lease, limit: int, window: int, want: int) -> bool:
+        try:
+            granted, value = await self._lease_script(keys=[key], args=[limit, window * 1000, want])
+        except RedisError as e:
+            self._disable(e)
+            return False
+        finally:
+            lease.refill = None
+
+        if granted > 0:
+            lease.tokens += int(granted)
+            lease.expires = time.monotonic() + self.lease_seconds
+            lease.blocked_until = 0.0
+        else:
+            lease.retry_after = max(1, math.ceil(int(value) / 1000))
+            lease.blocked_until = time.monotonic() + int(value) / 1000
+            lease.expires = lease.blocked_until
+        return True
+
+    def _release(self, key: str, lease: _Lease, window: int):
+        self._leases.pop(key, None)
+        self._windows.pop(key, None)
+        if lease.tokens > 0 and self.available:
+            asyncio.ensure_future(self._refund(key, lease.limit, window, lease.tokens))
+
+    async def _refund(self, key: str, limit: int, window: int, unused: int):
+        try:
+            await self._refund_script(keys=[key], args=[limit, window * 1000, unused])
+        except RedisError as e:
+            self._disable(e)
@@ -0,0 +1,46 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.core.query_stats import QueryStats, current_query_stats, query_metrics
+
+class QueryStatsMiddleware:
+    """
+    İstek başına SQL sayısı ve süresi.
+    Development'ta X-DB-* header'ları olarak döner, diğer ortamlarda
+    route başına metriklere eklenir. Tekrarlanan sorgu kalıpları N+1 olarak işaretlenir.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.expose_headers = settings.ENVIRONMENT == "development"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope)
+        token = current_query_stats.set(stats)
+
+        async def send_with_stats(message: Message):
+            if message["type"] == "http.response.start" and self.expose_headers:
+                n_plus_one = stats.n_plus_one()
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-query-count", str(stats.count).encode()))
+                headers.append((b"x-db-time-ms", f"{stats.duration_ms:.1f}".encode()))
+                if n_plus_one:
+                    headers.append((b"x-db-n-plus-one", str(max(n_plus_one.values())).encode()))
+                budget = stats.budget
+                if budget is not None:
+                    headers.append((b"x-db-query-budget", str(budget).encode()))
+                    if stats.endpoint_count is not None:
+                        headers.append((b"x-db-endpoint-query-count", str(stats.endpoint_count).encode()))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            current_query_stats.reset(token)
+            route = getattr(scope.get("route"), "path", None)
+            if route and not self.expose_headers:
+                query_metrics.observe(f"{scope['method']} {route}", stats)
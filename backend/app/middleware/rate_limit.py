@@ -1,131 +1,214 @@
-from fastapi import Request, HTTPException
-from fastapi.security import HTTPBearer
-from starlette.middleware.base import BaseHTTPMiddleware
-from typing import Dict, Tuple
-import time
-from collections import defaultdict
-import redis
+from typing import Optional, Tuple
+from urllib.parse import parse_qs
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from jose import JWTError
 from app.core.config import settings
+from app.services.auth import AuthService
+from app.services.tier_cache import tier_cache
+from app.services.file_service import MAX_FILE_SIZE
+from app.middleware.limiters import RedisGCRALimiter, HybridLimiter, MemoryTokenBucketLimiter
 
-# Redis bağlantısı (opsiyonel, yoksa memory kullan)
-try:
-    redis_client = redis.Redis(
-        host=settings.REDIS_HOST,
-        port=settings.REDIS_PORT,
-        decode_responses=True
-    )
-    REDIS_AVAILABLE = redis_client.ping()
-except:
-    REDIS_AVAILABLE = False
-    print("⚠️ Redis bağlantısı yok, rate limiting memory'de çalışacak")
+PREMIUM_TIERS = ("premium", "pro", "edu")
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app):
-        super().__init__(app)
-        # Rate limit ayarları
-        self.default_limit = 60  # dakikada 60 istek
-        self.premium_limit = 300  # Premium kullanıcı için 300 istek/dk
-        self.window = 60  # 60 saniye
+# Kota kovaları: ad -> (normal limit, premium limit, pencere saniye)
+QUOTAS = {
+    "requests": (60, 300, 60),                                    # genel istek sayısı / dk
+    "ai": (20, 120, 3600),                                        # AI birimi / saat
+    "upload": (200 * 1024 * 1024, 2 * 1024 * 1024 * 1024, 3600),  # yüklenen byte / saat
+    "ws_connect": (10, 30, 60),                                   # WebSocket bağlantısı / dk
+    "ws_messages": (120, 600, 60),                                # WebSocket mesajı / dk
+}
+
+EXCLUDED_PATHS = ("/health", "/docs", "/openapi.json", "/redoc")
+
+# Route ağırlıkları: (method, path öneki, kova, maliyet). İlk eşleşen kullanılır.
+# Maliyet None ise isteğin Content-Length değeri (byte) harcanır; başlık yoksa
+# (chunked yükleme) veya geçersizse tek isteğin en fazla taşıyabileceği byte harcanır.
+API = settings.API_V1_STR
+ROUTE_COSTS = [
+    ("POST", f"{API}/ai/chat", "ai", 2),
+    ("POST", f"{API}/ai/generate-quiz", "ai", 3),
+    ("POST", f"{API}/ai/flashcards", "ai", 3),
+    ("POST", f"{API}/ai/", "ai", 1),
+    ("POST", f"{API}/files/upload", "upload", None),
+]
+
+def route_cost(method: str, path: str, content_length: Optional[str]) -> Tuple[str, int]:
+    """İsteğin hangi kovadan ne kadar harcayacağını döndür"""
+    for rule_method, prefix, bucket, cost in ROUTE_COSTS:
+        if method == rule_method and path.startswith(prefix):
+            if cost is None:
+                try:
+                    cost = max(1, int(content_length))
+                except (TypeError, ValueError):
+                    cost = MAX_FILE_SIZE
+            return bucket, cost
+    return "requests", 1
+
+class RateLimitMiddleware:
+    """
+    Saf ASGI rate limit middleware'i.
+    HTTP isteklerini route ağırlıklı kovalardan, WebSocket'lerde hem bağlantıyı
+    hem de gelen her mesajı sınırlar. Limit aşılınca 429 yanıtı döner.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # Rate limit ayarları (kova başına limitler QUOTAS'ta)
+        self.quotas = QUOTAS
         
-        # Memory storage (Redis yoksa)
-        self.memory_storage: Dict[str, list] = defaultdict(list)
-    
-    def _get_client_id(self, request: Request) -> str:
-        """İstemciyi tanımlamak için IP + Token (varsa)"""
-        client_ip = request.client.host if request.client else "unknown"
+        # Redis (atomik GCRA, tek round trip); ulaşılamazsa memory kullanılır.
+        # Hybrid modda çoğu istek Redis'e gitmeden yerel dilimden karşılanır.
+        # REDIS_IN_MEMORY ise (geliştirme, testler) sadece memory.
+        if settings.REDIS_IN_MEMORY:
+            self.redis_limiter = None
+        elif settings.RATE_LIMIT_MODE == "hybrid":
+            self.redis_limiter = HybridLimiter(
+                settings.REDIS_URL,
+                max_connections=settings.RATE_LIMIT_REDIS_MAX_CONNECTIONS,
+                slice_ratio=settings.RATE_LIMIT_HYBRID_SLICE_RATIO,
+                sync_ms=settings.RATE_LIMIT_HYBRID_SYNC_MS,
+                max_keys=settings.RATE_LIMIT_MEMORY_MAX_KEYS
+            )
+        else:
+            self.redis_limiter = RedisGCRALimiter(
+                settings.REDIS_URL,
+                max_connections=settings.RATE_LIMIT_REDIS_MAX_CONNECTIONS
+            )
         
-        # Authorization header'dan token al
-        auth_header = request.headers.get("Authorization")
+        # Memory storage (Redis yoksa) - sınırlı boyutlu token bucket tablosu
+        self.memory_limiter = MemoryTokenBucketLimiter(
+            max_keys=settings.RATE_LIMIT_MEMORY_MAX_KEYS
+        )
+    
+    def _get_client_id(self, scope: Scope, user_id: Optional[int] = None) -> str:
+        """İstemciyi tanımlamak için kullanıcı id'si (token geçerliyse) veya IP"""
+        if user_id is not None:
+            return f"user:{user_id}"
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+    
+    def _get_token(self, scope: Scope, headers: Headers) -> Optional[str]:
+        """Authorization header'ı veya (WebSocket için) ?token= parametresi"""
+        auth_header = headers.get("authorization")
         if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.split(" ")[1]
-            return f"{client_ip}:{token[:20]}"
-        
-        return client_ip
+            return auth_header.split(" ")[1]
+        if scope["type"] == "websocket":
+            params = parse_qs(scope.get("query_string", b"").decode())
+            return params.get("token", [None])[0]
+        return None
     
-    def _is_premium_user(self, request: Request) -> bool:
-        """Kullanıcının premium olup olmadığını kontrol et"""
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return False
-        
-        token = auth_header.split(" ")[1]
+    async def _resolve_user(self, token: Optional[str]) -> Tuple[Optional[int], bool]:
+        """
+        Token'daki kullanıcı id'si ve premium olup olmadığı.
+        Seviye önbellekten gelir; sadece önbellekte yoksa veritabanına gidilir.
+        """
+        if not token:
+            return None, False
         try:
-            from jose import jwt
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-            username = payload.get("sub")
-            
-            if username:
-                from app.core.database import SessionLocal
-                from app.models.user import User
-                db = SessionLocal()
-                user = db.query(User).filter(User.username == username).first()
-                db.close()
-                
-                if user and user.subscription_tier in ["premium", "pro", "edu"]:
-                    return True
-        except:
-            pass
-        return False
-    
-    def _check_rate_limit_redis(self, key: str, limit: int) -> Tuple[bool, int]:
-        """Redis ile rate limit kontrolü"""
-        current = redis_client.get(key)
-        if current is None:
-            redis_client.setex(key, self.window, 1)
-            return True, limit - 1
+            payload = AuthService.decode_access_token(token)
+        except JWTError:
+            return None, False
         
-        current_count = int(current)
-        if current_count >= limit:
-            ttl = redis_client.ttl(key)
-            return False, ttl
+        claims = AuthService.claims_from_payload(payload)
+        if claims:
+            tier = await tier_cache.resolve(user_id=claims.uid)
+            return claims.uid, tier in PREMIUM_TIERS
+        if payload.get("sub"):
+            tier = await tier_cache.resolve(username=payload["sub"])
+            return None, tier in PREMIUM_TIERS
+        return None, False
+    
+    async def _hit(self, client_id: str, is_premium: bool, bucket: str, cost: int) -> Tuple[bool, int, int, int]:
+        """(izin verildi mi, kalan hak veya beklenecek saniye, limit, pencere)"""
+        default_limit, premium_limit, window = self.quotas[bucket]
+        limit = premium_limit if is_premium else default_limit
+        key = f"{bucket}:{client_id}"
         
-        redis_client.incr(key)
-        return True, limit - (current_count + 1)
+        # Redis veya memory kullan
+        result = None
+        if self.redis_limiter is not None:
+            result = await self.redis_limiter.hit(f"rate_limit:{key}", limit, window, cost)
+        if result is None:
+            result = self.memory_limiter.hit(key, limit, window, cost)
+        allowed, remaining_or_wait = result
+        return allowed, remaining_or_wait, limit, window
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            await self._handle_http(scope, receive, send)
+        elif scope["type"] == "websocket":
+            await self._handle_websocket(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
     
-    def _check_rate_limit_memory(self, key: str, limit: int) -> Tuple[bool, int]:
-        """Memory ile rate limit kontrolü"""
-        now = time.time()
-        requests = self.memory_storage[key]
+    async def _handle_http(self, scope: Scope, receive: Receive, send: Send):
+        # Özel endpoint'leri rate limit dışı bırak
+        if scope["path"] in EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
         
-        # Süresi geçmiş istekleri temizle
-        self.memory_storage[key] = [t for t in requests if now - t < self.window]
+        headers = Headers(scope=scope)
+        user_id, is_premium = await self._resolve_user(self._get_token(scope, headers))
+        client_id = self._get_client_id(scope, user_id)
         
-        if len(self.memory_storage[key]) >= limit:
-            oldest = self.memory_storage[key][0]
-            wait_time = int(self.window - (now - oldest))
-            return False, wait_time
+        # Pahalı route'lar (AI, yükleme) kendi kovalarından ağırlıklı harcar
+        bucket, cost = route_cost(scope["method"], scope["path"], headers.get("content-length"))
+        allowed, remaining_or_wait, limit, window = await self._hit(client_id, is_premium, bucket, cost)
         
-        self.memory_storage[key].append(now)
-        remaining = limit - len(self.memory_storage[key])
-        return True, remaining
-    
-    async def dispatch(self, request: Request, call_next):
-        # Özel endpoint'leri rate limit dışı bırak
-        excluded_paths = ["/health", "/docs", "/openapi.json", "/redoc"]
-        if request.url.path in excluded_paths:
-            return await call_next(request)
+        if not allowed:
+            response = self._too_many_requests(remaining_or_wait)
+            await response(scope, receive, send)
+            return
         
-        client_id = self._get_client_id(request)
-        is_premium = self._is_premium_user(request)
-        limit = self.premium_limit if is_premium else self.default_limit
+        rate_headers = [
+            (b"x-ratelimit-bucket", bucket.encode()),
+            (b"x-ratelimit-limit", str(limit).encode()),
+            (b"x-ratelimit-remaining", str(remaining_or_wait).encode()),
+            (b"x-ratelimit-reset", str(window).encode()),
+        ]
         
-        # Redis veya memory kullan
-        if REDIS_AVAILABLE:
-            key = f"rate_limit:{client_id}"
-            allowed, remaining_or_wait = self._check_rate_limit_redis(key, limit)
-        else:
-            allowed, remaining_or_wait = self._check_rate_limit_memory(client_id, limit)
+        async def send_with_headers(message: Message):
+            # Response header'ları ekle
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + rate_headers
+            await send(message)
         
+        await self.app(scope, receive, send_with_headers)
+    
+    async def _handle_websocket(self, scope: Scope, receive: Receive, send: Send):
+        headers = Headers(scope=scope)
+        user_id, is_premium = await self._resolve_user(self._get_token(scope, headers))
+        client_id = self._get_client_id(scope, user_id)
+        
+        allowed, wait, _, _ = await self._hit(client_id, is_premium, "ws_connect", 1)
         if not allowed:
-            raise HTTPException(
-                status_code=429,
-                detail=f"Too many requests. Please try again in {remaining_or_wait} seconds."
-            )
+            if "websocket.http.response" in scope.get("extensions", {}):
+                # Sunucu destekliyorsa handshake'i gerçek bir 429 ile reddet
+                response = self._too_many_requests(wait)
+                await response(scope, receive, send)
+            else:
+                await send({"type": "websocket.close", "code": 1008, "reason": "Too many connections"})
+            return
         
-        # Response header'ları ekle
-        response = await call_next(request)
-        response.headers["X-RateLimit-Limit"] = str(limit)
-        response.headers["X-RateLimit-Remaining"] = str(remaining_or_wait)
-        response.headers["X-RateLimit-Reset"] = str(self.window)
+        async def receive_limited() -> Message:
+            message = await receive()
+            if message["type"] != "websocket.receive":
+                return message
+            allowed, _, _, _ = await self._hit(client_id, is_premium, "ws_messages", 1)
+            if allowed:
+                return message
+            # Mesaj limiti aşıldı: bağlantıyı kapat, uygulamaya kopma olarak bildir
+            await send({"type": "websocket.close", "code": 1008, "reason": "Too many messages"})
+            return {"type": "websocket.disconnect", "code": 1008}
         
-        return response
+        await self.app(scope, receive_limited, send)
+    
+    def _too_many_requests(self, retry_after: int) -> JSONResponse:
+        return JSONResponse(
+            status_code=429,
+            content={"detail": f"Too many requests. Please try again in {retry_after} seconds."},
+            headers={"Retry-After": str(retry_after)}
+        )
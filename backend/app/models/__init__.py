@@ -3,6 +3,7 @@ from app.models.session import UserSession
 from app.models.note import Note
 from app.models.room import Room, RoomParticipant
 from app.models.message import Message
+from app.models.conversation import Conversation
 from app.models.friendship import Friendship
 from app.models.file import File
 from app.models.settings import UserSettings
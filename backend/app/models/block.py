@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -9,3 +9,9 @@ class Block(Base):
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     blocked_user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Index'ler
+    __table_args__ = (
+        Index('idx_blocks_user_blocked', 'user_id', 'blocked_user_id'),
+        Index('idx_blocks_blocked_user', 'blocked_user_id', 'user_id'),
+    )
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class Conversation(Base):
+    """
+    İki kullanıcı arasındaki sohbetin özeti (sohbet listesi için).
+    Çift sıralı tutulur: user_low_id < user_high_id.
+    Mesaj gönderme / okuma ile aynı transaction'da güncellenir.
+    """
+    __tablename__ = "conversations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_low_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_high_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    last_message_id = Column(Integer, nullable=True)  # messages partition'lı, FK yok
+    last_message_preview = Column(String(200), nullable=True)
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
+    unread_low = Column(Integer, nullable=False, default=0)   # user_low_id'nin okumadıkları
+    unread_high = Column(Integer, nullable=False, default=0)  # user_high_id'nin okumadıkları
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Index'ler
+    __table_args__ = (
+        UniqueConstraint('user_low_id', 'user_high_id', name='uq_conversations_pair'),
+        # Sohbet listesi: kullanıcı hangi tarafta olursa olsun son mesaja göre
+        Index('idx_conversations_low_last', 'user_low_id', 'last_message_at'),
+        Index('idx_conversations_high_last', 'user_high_id', 'last_message_at'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, BigInteger
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, BigInteger, Index
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -15,3 +15,8 @@ class File(Base):
     note_id = Column(Integer, ForeignKey("notes.id", ondelete="CASCADE"))
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Index'ler
+    __table_args__ = (
+        Index('idx_files_user_created_id', 'user_id', 'created_at', 'id'),
+    )
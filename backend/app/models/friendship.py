@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Index, text
 from sqlalchemy.sql import func
 from app.core.database import Base
 import enum
@@ -19,3 +19,11 @@ class Friendship(Base):
     requester_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Index'ler
+    __table_args__ = (
+        Index('idx_friendships_user_friend_status', 'user_id', 'friend_id', 'status'),
+        Index('idx_friendships_friend_status', 'friend_id', 'status'),
+        # Gönderilen bekleyen istekler
+        Index('idx_friendships_pending_requester', 'requester_id', postgresql_where=text("status = 'PENDING'")),
+    )
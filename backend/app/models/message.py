@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, Index, DDL, event, text, literal_column
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -13,5 +14,65 @@ class Message(Base):
     file_url = Column(String(500), nullable=True)
     is_read = Column(Boolean, default=False)
     read_at = Column(DateTime(timezone=True), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # PostgreSQL'de tablo bu kolona göre aylık partition'lıdır (PK: id + created_at)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Index'ler
+    __table_args__ = (
+        # Sohbet geçmişi / son mesaj (iki yön de aynı index'i kullanır)
+        Index('idx_messages_sender_receiver_created', 'sender_id', 'receiver_id', 'created_at'),
+        # Gelen mesajlar (sohbet listesi)
+        Index('idx_messages_receiver_sender', 'receiver_id', 'sender_id'),
+        # Sadece okunmamışlar (okunmamış sayıları); NULL is_read de okunmamış sayılır
+        Index('idx_messages_unread', 'receiver_id', 'sender_id', postgresql_where=text('is_read IS NOT TRUE')),
+        # Mesaj arama: alt metin (pg_trgm) eşleşmeleri; kelime index'i aşağıda (search_vector)
+        Index('idx_messages_content_trgm', 'content', postgresql_using='gin', postgresql_ops={'content': 'gin_trgm_ops'}),
+    )
+
+# Tam metin arama kolonu (PostgreSQL generated kolon). Model'e map edilmez: her INSERT'in
+# RETURNING'ine girmesin ve PostgreSQL dışı veritabanlarında create_all çalışsın.
+# Sadece arama sorgusu bu ifadeyle kullanır (bkz. alembic b3e9d7c2a610).
+search_vector = literal_column("messages.search_vector", TSVECTOR)
+
+# Arama kolonu ve index'leri (alembic b3e9d7c2a610 ile aynı, tekrar çalıştırılabilir)
+SEARCH_EXTENSION_DDL = "CREATE EXTENSION IF NOT EXISTS pg_trgm"
+SEARCH_COLUMN_DDL = (
+    "ALTER TABLE messages ADD COLUMN IF NOT EXISTS search_vector TSVECTOR "
+    "GENERATED ALWAYS AS (to_tsvector('simple'::regconfig, coalesce(content, ''))) STORED"
+)
+SEARCH_INDEX_DDL = "CREATE INDEX IF NOT EXISTS idx_messages_search ON messages USING gin (search_vector)"
+TRGM_INDEX_DDL = "CREATE INDEX IF NOT EXISTS idx_messages_content_trgm ON messages USING gin (content gin_trgm_ops)"
+# Açılışta birden fazla worker aynı anda ALTER çalıştırmasın
+SEARCH_SCHEMA_LOCK_ID = 727003
+
+# trigram index'i için (create_all ile kurulan veritabanlarında da)
+event.listen(
+    Message.__table__,
+    "before_create",
+    DDL(SEARCH_EXTENSION_DDL).execute_if(dialect="postgresql")
+)
+event.listen(Message.__table__, "after_create", DDL(SEARCH_COLUMN_DDL).execute_if(dialect="postgresql"))
+event.listen(Message.__table__, "after_create", DDL(SEARCH_INDEX_DDL).execute_if(dialect="postgresql"))
+
+def ensure_search_schema(bind) -> bool:
+    """
+    create_all var olan messages tablosuna kolon/index eklemez: arama kolonu veya
+    index'leri eksikse ekle (sadece PostgreSQL). Bir şey eklendiyse True.
+    """
+    if bind.dialect.name != "postgresql":
+        return False
+    check = text("""
+        SELECT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'messages' AND column_name = 'search_vector'
+        )
+        AND to_regclass('idx_messages_search') IS NOT NULL
+        AND to_regclass('idx_messages_content_trgm') IS NOT NULL
+    """)
+    with bind.begin() as conn:
+        if conn.execute(check).scalar():
+            return False
+        conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": SEARCH_SCHEMA_LOCK_ID})
+        for ddl in (SEARCH_EXTENSION_DDL, SEARCH_COLUMN_DDL, SEARCH_INDEX_DDL, TRGM_INDEX_DDL):
+            conn.execute(text(ddl))
+    return True
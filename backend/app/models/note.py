@@ -19,6 +19,7 @@ class Note(Base):
         Index('idx_notes_user_id', 'user_id'),
         Index('idx_notes_type', 'note_type'),
         Index('idx_notes_created', 'created_at'),
+        Index('idx_notes_user_created_id', 'user_id', 'created_at', 'id'),
     )
     
     @property
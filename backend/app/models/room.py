@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -17,6 +17,11 @@ class Room(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    # Index'ler
+    __table_args__ = (
+        Index('idx_rooms_active_created_id', 'is_active', 'created_at', 'id'),
+    )
+    
     # Relationships
     owner = relationship("User", backref="owned_rooms")
     participants = relationship("RoomParticipant", back_populates="room", cascade="all, delete-orphan")
@@ -32,6 +37,11 @@ class RoomParticipant(Base):
     is_banned = Column(Boolean, default=False)
     joined_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    # Index'ler
+    __table_args__ = (
+        Index('idx_room_participants_room_user_banned', 'room_id', 'user_id', 'is_banned'),
+    )
+    
     # Relationships
     room = relationship("Room", back_populates="participants")
     user = relationship("User", backref="room_participations")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class MessageBase(BaseModel):
@@ -33,6 +33,10 @@ class MessageResponse(MessageBase):
     class Config:
         from_attributes = True
 
+class MessageSearchResult(MessageResponse):
+    rank: float
+    highlight: str  # HTML kaçışlı; eşleşen kısımlar <mark>...</mark> içinde
+
 class ChatUserSchema(BaseModel):
     id: int
     username: str
@@ -53,3 +57,7 @@ class ChatListItem(BaseModel):
 
 class UnreadCountResponse(BaseModel):
     count: int
+
+class MarkReadResponse(BaseModel):
+    message_ids: List[int]
+    count: int
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+class CountersResponse(BaseModel):
+    messages: int = 0         # okunmamış mesajlar
+    notifications: int = 0    # okunmamış bildirimler
+    friend_requests: int = 0  # bekleyen arkadaşlık istekleri
@@ -28,6 +28,13 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+class UserSnapshot(UserResponse):
+    """Önbellekte tutulan, ORM oturumundan bağımsız kullanıcı görüntüsü"""
+    
+    class Config:
+        from_attributes = True
+        frozen = True
+
 class Token(BaseModel):
     access_token: str
     refresh_token: Optional[str] = None
@@ -35,3 +42,15 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+
+class TokenClaims(BaseModel):
+    """Doğrulanmış access token içeriği (v2) - DB'ye gitmeden kimlik bilgisi"""
+    v: int
+    sub: str
+    uid: int
+    tier: str = "free"
+    role: str = "student"
+    sid: Optional[int] = None
+
+    class Config:
+        frozen = True
@@ -1,4 +1,3 @@
-import httpx
 import json
 from typing import List, Dict, Any, Optional
 from app.core.config import settings
@@ -21,6 +20,19 @@ class AIService:
         }
         # Varsayılan model (ÇALIŞAN)
         self.default_model = "mistralai/mixtral-8x7b-instruct"
+        self._http = None
+    
+    def _client(self):
+        """Paylaşılan HTTP istemcisi (bağlantılar istekler arasında yeniden kullanılır)"""
+        if self._http is None:
+            import httpx  # ağır modül; ilk AI isteğinde yüklenir
+            self._http = httpx.AsyncClient(timeout=30.0)
+        return self._http
+    
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
     
     async def chat_completion(
         self,
@@ -50,27 +62,26 @@ class AIService:
         
         print(f"📤 İstek gönderiliyor: {use_model}")
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.post(
-                    self.base_url,
-                    headers=self.headers,
-                    json=payload
-                )
-                
-                print(f"📥 Cevap kodu: {response.status_code}")
+        try:
+            response = await self._client().post(
+                self.base_url,
+                headers=self.headers,
+                json=payload
+            )
+            
+            print(f"📥 Cevap kodu: {response.status_code}")
+            
+            if response.status_code == 200:
+                return response.json()
+            elif response.status_code == 401:
+                return {"error": "API anahtarı geçersiz. .env dosyasını kontrol edin."}
+            elif response.status_code == 404:
+                return {"error": f"Model bulunamadı: {use_model}. Lütfen geçerli bir model seçin."}
+            else:
+                return {"error": f"API hatası: {response.status_code}"}
                 
-                if response.status_code == 200:
-                    return response.json()
-                elif response.status_code == 401:
-                    return {"error": "API anahtarı geçersiz. .env dosyasını kontrol edin."}
-                elif response.status_code == 404:
-                    return {"error": f"Model bulunamadı: {use_model}. Lütfen geçerli bir model seçin."}
-                else:
-                    return {"error": f"API hatası: {response.status_code}"}
-                    
-            except Exception as e:
-                return {"error": f"Bağlantı hatası: {str(e)}"}
+        except Exception as e:
+            return {"error": f"Bağlantı hatası: {str(e)}"}
     
     async def explain_topic(self, topic: str, level: str = "üniversite", model: Optional[str] = None) -> str:
         """Konu anlatımı"""
@@ -1,24 +1,31 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 import uuid
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
 from app.models.user import User
 from app.models.session import UserSession
-from app.schemas.user import UserCreate
+from app.schemas.user import UserCreate, TokenClaims
+from app.services.password_hasher import password_hasher
+from app.services.session_store import refresh_session_store
+from app.services.revocation import access_token_revocation
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# v1: sadece "sub" (username). v2: uid/tier/role/sid claim'leri de var.
+ACCESS_TOKEN_VERSION = 2
 
 class AuthService:
     @staticmethod
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(plain_password: str, hashed_password: str) -> bool:
+        valid, _ = await password_hasher.verify_and_update(plain_password, hashed_password)
+        return valid
     
     @staticmethod
-    def get_password_hash(password: str) -> str:
-        return pwd_context.hash(password)
+    async def get_password_hash(password: str) -> str:
+        return await password_hasher.hash(password)
     
     @staticmethod
     def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -33,33 +40,74 @@ class AuthService:
         return encoded_jwt
     
     @staticmethod
-    def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
-        user = db.query(User).filter(User.username == username).first()
-        if not user or not AuthService.verify_password(password, user.hashed_password):
+    def build_access_claims(user_id: int, username: str, tier: Optional[str], role: Optional[str], session_id: Optional[int] = None) -> dict:
+        """v2 access token claim'leri (jti: tek token iptali için)"""
+        return {
+            "jti": uuid.uuid4().hex,
+            "v": ACCESS_TOKEN_VERSION,
+            "sub": username,
+            "uid": user_id,
+            "tier": tier or "free",
+            "role": role or "student",
+            "sid": session_id
+        }
+    
+    @staticmethod
+    def decode_access_token(token: str) -> dict:
+        """İmzayı ve süreyi doğrula; geçersizse JWTError fırlatır"""
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    
+    @staticmethod
+    def claims_from_payload(payload: dict) -> Optional[TokenClaims]:
+        """v2 claim'lerini döndür; eski formattaki (sadece sub) token'lar için None"""
+        if payload.get("v", 1) < ACCESS_TOKEN_VERSION or payload.get("uid") is None:
+            return None
+        return TokenClaims(
+            v=payload["v"],
+            sub=payload["sub"],
+            uid=payload["uid"],
+            tier=payload.get("tier", "free"),
+            role=payload.get("role", "student"),
+            sid=payload.get("sid")
+        )
+    
+    @staticmethod
+    async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
+        user = await db.scalar(select(User).where(User.username == username))
+        if not user:
             return None
+        
+        valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+        if not valid:
+            return None
+        
+        # bcrypt maliyeti değiştiyse hash'i yeni ayarla güncelle
+        if new_hash:
+            user.hashed_password = new_hash
+            await db.commit()
         return user
     
     @staticmethod
-    def create_user(db: Session, user: UserCreate) -> User:
+    async def create_user(db: AsyncSession, user: UserCreate) -> User:
         db_user = User(
             email=user.email,
             username=user.username,
             full_name=user.full_name,
-            hashed_password=AuthService.get_password_hash(user.password)
+            hashed_password=await AuthService.get_password_hash(user.password)
         )
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         return db_user
     
     @staticmethod
-    def create_refresh_token(db: Session, user_id: int, device_name: str = None, ip_address: str = None) -> str:
-        """Yeni refresh token oluştur"""
+    async def create_refresh_token(db: AsyncSession, user: User, device_name: str = None, ip_address: str = None) -> Tuple[str, int]:
+        """Yeni refresh token oluştur - (token, oturum id) döner"""
         session_token = str(uuid.uuid4())
         expires_at = datetime.utcnow() + timedelta(days=7)
         
         user_session = UserSession(
-            user_id=user_id,
+            user_id=user.id,
             session_token=session_token,
             device_name=device_name,
             ip_address=ip_address,
@@ -67,46 +115,76 @@ class AuthService:
             expires_at=expires_at
         )
         db.add(user_session)
-        db.commit()
-        return session_token
+        await db.commit()
+        
+        await run_in_threadpool(refresh_session_store.put, session_token, user_session.id, user, expires_at)
+        return session_token, user_session.id
     
     @staticmethod
     def refresh_access_token(db: Session, refresh_token: str) -> Optional[str]:
-        """Refresh token ile yeni access token oluştur"""
-        session = db.query(UserSession).filter(
-            UserSession.session_token == refresh_token,
-            UserSession.is_active == True,
-            UserSession.expires_at > datetime.utcnow()
-        ).first()
-        
-        if not session:
-            return None
-        
-        session.last_active = datetime.utcnow()
-        db.commit()
+        """
+        Refresh token ile yeni access token oluştur.
+        Oturum Redis'ten okunur; Postgres'e sadece Redis'te kayıt yoksa gidilir.
+        """
+        cached = refresh_session_store.get(refresh_token)
         
-        user = db.query(User).filter(User.id == session.user_id).first()
-        if not user:
-            return None
+        if cached is None:
+            if refresh_session_store.is_revoked(refresh_token):
+                return None
+            
+            session = db.query(UserSession).filter(
+                UserSession.session_token == refresh_token,
+                UserSession.is_active == True,
+                UserSession.expires_at > datetime.utcnow()
+            ).first()
+            
+            if not session:
+                return None
+            
+            user = db.query(User).filter(User.id == session.user_id).first()
+            if not user:
+                return None
+            
+            refresh_session_store.put(refresh_token, session.id, user, session.expires_at)
+            claims = AuthService.build_access_claims(
+                user.id, user.username, user.subscription_tier, user.role, session.id
+            )
+        else:
+            claims = AuthService.build_access_claims(
+                cached["user_id"], cached["username"], cached["tier"], cached["role"], cached["sid"]
+            )
         
-        return AuthService.create_access_token(data={"sub": user.username})
+        refresh_session_store.touch(refresh_token)
+        return AuthService.create_access_token(data=claims)
     
     @staticmethod
-    def revoke_refresh_token(db: Session, refresh_token: str):
-        """Refresh token'ı iptal et (çıkış yapınca)"""
-        session = db.query(UserSession).filter(
-            UserSession.session_token == refresh_token
-        ).first()
+    def revoke_refresh_token(db: Session, refresh_token: str, user_id: Optional[int] = None):
+        """
+        Refresh token'ı iptal et (çıkış yapınca) - Postgres'e flush ile yazılır.
+        Oturuma bağlı access token'lar da iptal listesine girer.
+        """
+        cached = refresh_session_store.get(refresh_token)
+        if cached:
+            session_id = cached["sid"]
+        else:
+            session = db.query(UserSession.id).filter(
+                UserSession.session_token == refresh_token
+            ).first()
+            session_id = session.id if session else None
         
-        if session:
-            session.is_active = False
-            db.commit()
+        refresh_session_store.revoke(refresh_token, user_id)
+        if session_id is not None:
+            access_token_revocation.revoke_sessions([session_id])
     
     @staticmethod
     def revoke_all_user_sessions(db: Session, user_id: int):
-        """Kullanıcının tüm oturumlarını iptal et"""
-        db.query(UserSession).filter(
+        """Kullanıcının tüm oturumlarını (ve bağlı access token'ları) iptal et"""
+        active = db.query(UserSession.id).filter(
             UserSession.user_id == user_id,
             UserSession.is_active == True
-        ).update({"is_active": False})
+        )
+        session_ids = [row.id for row in active.all()]
+        active.update({"is_active": False})
         db.commit()
+        refresh_session_store.drop_user(user_id)
+        access_token_revocation.revoke_sessions(session_ids)
@@ -0,0 +1,168 @@
+import asyncio
+import threading
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+from sqlalchemy import or_
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.redis import get_redis
+from app.models.block import Block
+from app.utils.cache import TTLCache, MISSING
+
+# Engel değişen kullanıcılar: sorted set, üye = user_id, skor = değişiklik sürümü
+CHANGES_KEY = "blocks:changes"
+VERSION_KEY = "blocks:version"
+# incr ile zadd arasında okunan sürümde değişiklik kaçmasın diye son N sürüm yeniden okunur
+SYNC_OVERLAP = 100
+
+# (engellediklerim, beni engelleyenler)
+Relations = Tuple[FrozenSet[int], FrozenSet[int]]
+
+def _load_relations(user_ids: Iterable[int]) -> Dict[int, Relations]:
+    """Kullanıcıların engel kümelerini tek sorguda oku"""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    blocked = {uid: set() for uid in user_ids}
+    blocked_by = {uid: set() for uid in user_ids}
+    db = SessionLocal()
+    try:
+        rows = db.query(Block.user_id, Block.blocked_user_id).filter(
+            or_(Block.user_id.in_(user_ids), Block.blocked_user_id.in_(user_ids))
+        ).all()
+    finally:
+        db.close()
+    for blocker, blocked_user in rows:
+        if blocker in blocked:
+            blocked[blocker].add(blocked_user)
+        if blocked_user in blocked_by:
+            blocked_by[blocked_user].add(blocker)
+    return {uid: (frozenset(blocked[uid]), frozenset(blocked_by[uid])) for uid in user_ids}
+
+class BlockGraph:
+    """
+    Kullanıcı başına engel kümeleri (engellediği / engelleyen), ilk kullanımda yüklenir.
+    Kontroller bellek içi küme aramasıdır; REST ve WebSocket aynı önbelleği kullanır.
+    Engel eklenince/kalkınca iki kullanıcının kaydı bu worker'da hemen silinir,
+    diğer worker'lar Redis'teki değişiklik listesini periyodik okuyup siler.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self._cache = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+        # Kayıt düşürülme sayaçları: yükleme sürerken gelen invalidate, eski veriyi geri yazdırmasın
+        self._generations: Dict[int, int] = {}
+        self._epoch = 0  # tüm önbellek temizlenince artar
+
+    def _generation(self, user_id: int) -> Tuple[int, int]:
+        with self._lock:
+            return self._epoch, self._generations.get(user_id, 0)
+
+    def _forget(self, user_id: int):
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self._cache.delete(user_id)
+
+    def _store(self, user_id: int, entry: Relations, generation: Tuple[int, int]):
+        """Yükleme başladığından beri kayıt düşürülmediyse önbelleğe yaz"""
+        with self._lock:
+            if (self._epoch, self._generations.get(user_id, 0)) == generation:
+                self._cache.set(user_id, entry)
+
+    @property
+    def redis(self):
+        return get_redis()
+
+    def relations_many(self, user_ids: Iterable[int]) -> Dict[int, Relations]:
+        """Önbellekte olmayanlar tek sorguda yüklenir"""
+        result = {}
+        missing = []
+        for uid in set(user_ids):
+            entry = self._cache.get(uid)
+            if entry is MISSING:
+                missing.append(uid)
+            else:
+                result[uid] = entry
+        generations = {uid: self._generation(uid) for uid in missing}
+        for uid, entry in _load_relations(missing).items():
+            self._store(uid, entry, generations[uid])
+            result[uid] = entry
+        return result
+
+    def relations(self, user_id: int) -> Relations:
+        return self.relations_many([user_id])[user_id]
+
+    def hidden(self, user_id: int) -> FrozenSet[int]:
+        """İki yönden biriyle engel olan kullanıcılar (listelerde gösterilmez)"""
+        blocked, blocked_by = self.relations(user_id)
+        return blocked | blocked_by
+
+    def has_blocked(self, user_id: int, other_id: int) -> bool:
+        """user_id, other_id'yi engellemiş mi"""
+        return other_id in self.relations(user_id)[0]
+
+    def is_blocked(self, user_id: int, other_id: int) -> bool:
+        """İki kullanıcı arasında herhangi bir yönde engel var mı"""
+        blocked, blocked_by = self.relations(user_id)
+        return other_id in blocked or other_id in blocked_by
+
+    def invalidate(self, *user_ids: int):
+        """Engel değişti: bu worker'da hemen, diğerlerinde sonraki sync'te düşer"""
+        for uid in user_ids:
+            self._forget(uid)
+        try:
+            version = self.redis.incr(VERSION_KEY)
+            self.redis.zadd(CHANGES_KEY, {str(uid): version for uid in user_ids})
+        except Exception as e:
+            print(f"⚠️ Engel değişikliği yayınlanamadı: {e}")
+
+    def sync(self):
+        """Diğer worker'larda değişen kullanıcıların kayıtlarını düşür"""
+        version = self.redis.get(VERSION_KEY)
+        version = int(version) if version is not None else 0
+        last = self._version
+        if last is not None and version == last:
+            return
+        if last is None or version < last:
+            # İlk sync veya Redis sıfırlanmış: neyin değiştiği bilinmiyor
+            with self._lock:
+                self._epoch += 1
+                self._cache.clear()
+        else:
+            for uid in self.redis.zrangebyscore(CHANGES_KEY, last + 1 - SYNC_OVERLAP, "+inf"):
+                self._forget(int(uid))
+        self._version = version
+
+    async def relations_async(self, user_id: int) -> Relations:
+        # Önbellekteyse thread'e geçmeden dön
+        entry = self._cache.get(user_id)
+        if entry is MISSING:
+            entry = await run_in_threadpool(self.relations, user_id)
+        return entry
+
+    async def relations_many_async(self, user_ids: Iterable[int]) -> Dict[int, Relations]:
+        return await run_in_threadpool(self.relations_many, list(user_ids))
+
+    async def hidden_async(self, user_id: int) -> FrozenSet[int]:
+        blocked, blocked_by = await self.relations_async(user_id)
+        return blocked | blocked_by
+
+    async def is_blocked_async(self, user_id: int, other_id: int) -> bool:
+        blocked, blocked_by = await self.relations_async(user_id)
+        return other_id in blocked or other_id in blocked_by
+
+# Singleton instance
+block_graph = BlockGraph(
+    max_size=settings.BLOCK_GRAPH_MAX_SIZE,
+    ttl_seconds=settings.BLOCK_GRAPH_TTL_SECONDS
+)
+
+async def sync_block_graph_periodically(interval: int):
+    """Arka plan görevi: başka worker'larda değişen engelleri önbellekten düşür"""
+    while True:
+        try:
+            await run_in_threadpool(block_graph.sync)
+        except Exception as e:
+            print(f"🔴 Engel önbelleği senkron hatası: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,39 @@
+from typing import Dict, List
+from fastapi import WebSocket
+
+class ChatConnectionManager:
+    """
+    /ws/chat bağlantıları: kullanıcı id -> açık WebSocket'ler.
+    REST endpoint'leri de (ör. okundu bilgisi) buradan bildirim gönderir.
+    """
+
+    def __init__(self):
+        self.active_connections: Dict[int, List[WebSocket]] = {}
+
+    def add(self, user_id: int, websocket: WebSocket):
+        self.active_connections.setdefault(user_id, []).append(websocket)
+
+    def remove(self, user_id: int, websocket: WebSocket):
+        connections = [c for c in self.active_connections.get(user_id, []) if c != websocket]
+        if connections:
+            self.active_connections[user_id] = connections
+        else:
+            self.active_connections.pop(user_id, None)
+
+    def is_online(self, user_id: int) -> bool:
+        return user_id in self.active_connections
+
+    async def send_to_user(self, user_id: int, message: dict) -> bool:
+        """Kullanıcının bu worker'daki tüm bağlantılarına gönder; kimse yoksa False"""
+        connections = self.active_connections.get(user_id)
+        if not connections:
+            return False
+        for connection in list(connections):
+            try:
+                await connection.send_json(message)
+            except Exception as e:
+                print(f"🔴 WebSocket gönderim hatası: {e}")
+        return True
+
+# Singleton instance
+chat_connections = ChatConnectionManager()
@@ -0,0 +1,125 @@
+from sqlalchemy import select, update, case, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Iterable, Tuple
+from app.models.conversation import Conversation
+from app.models.message import Message
+
+PREVIEW_LENGTH = 200
+# Açılışta doldurmayı birden fazla worker aynı anda yapmasın
+BACKFILL_LOCK_ID = 727002
+
+# Mevcut mesajlardan özet tablosunu (yeniden) kur: çift başına son mesaj ve iki tarafın okunmamışları
+BACKFILL_SQL = """
+INSERT INTO conversations (user_low_id, user_high_id, last_message_id, last_message_preview,
+                           last_message_at, unread_low, unread_high)
+SELECT p.low_id, p.high_id, m.id, substr(m.content, 1, 200), m.created_at, p.unread_low, p.unread_high
+FROM (
+    SELECT
+        CASE WHEN sender_id < receiver_id THEN sender_id ELSE receiver_id END AS low_id,
+        CASE WHEN sender_id < receiver_id THEN receiver_id ELSE sender_id END AS high_id,
+        max(id) AS last_id,
+        sum(CASE WHEN COALESCE(is_read, false) = false AND receiver_id < sender_id THEN 1 ELSE 0 END) AS unread_low,
+        sum(CASE WHEN COALESCE(is_read, false) = false AND receiver_id > sender_id THEN 1 ELSE 0 END) AS unread_high
+    FROM messages
+    GROUP BY 1, 2
+) p
+JOIN messages m ON m.id = p.last_id
+WHERE true
+ON CONFLICT (user_low_id, user_high_id) DO UPDATE SET
+    last_message_id = excluded.last_message_id,
+    last_message_preview = excluded.last_message_preview,
+    last_message_at = excluded.last_message_at,
+    unread_low = excluded.unread_low,
+    unread_high = excluded.unread_high
+"""
+
+def pair(a: int, b: int) -> Tuple[int, int]:
+    return (a, b) if a < b else (b, a)
+
+class ConversationService:
+    
+    @staticmethod
+    def _insert(db: AsyncSession):
+        dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+        return dialect.insert(Conversation)
+    
+    @staticmethod
+    async def record_message(db: AsyncSession, message: Message) -> None:
+        """Yeni mesajı sohbet özetine işle (commit çağıranda)"""
+        await ConversationService.record_messages(db, [message])
+    
+    @staticmethod
+    async def record_messages(db: AsyncSession, messages: Iterable[Message]) -> None:
+        """
+        Mesajları sohbet özetine işle (commit çağıranda).
+        Çift başına toplanıp tek çok satırlı upsert yapılır; eşzamanlı gönderimlerde
+        satır kilidiyle sıralanır ve son mesaj sadece daha yeni bir id gelirse değişir.
+        """
+        rows: Dict[Tuple[int, int], dict] = {}
+        for message in messages:
+            low, high = pair(message.sender_id, message.receiver_id)
+            row = rows.setdefault((low, high), {
+                "user_low_id": low,
+                "user_high_id": high,
+                "last_message_id": 0,
+                "unread_low": 0,
+                "unread_high": 0
+            })
+            if message.id > row["last_message_id"]:
+                row["last_message_id"] = message.id
+                row["last_message_preview"] = message.content[:PREVIEW_LENGTH]
+                row["last_message_at"] = message.created_at
+            row["unread_low" if message.receiver_id == low else "unread_high"] += 1
+        if not rows:
+            return
+        
+        # Satır kilitleri her zaman (low, high) sırasıyla alınsın: ortak çiftleri farklı sırada
+        # yazan iki batch birbirini beklemesin (deadlock)
+        stmt = ConversationService._insert(db).values([rows[k] for k in sorted(rows)])
+        newer = stmt.excluded.last_message_id > Conversation.last_message_id
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Conversation.user_low_id, Conversation.user_high_id],
+            set_={
+                "last_message_id": case((newer, stmt.excluded.last_message_id), else_=Conversation.last_message_id),
+                "last_message_preview": case((newer, stmt.excluded.last_message_preview), else_=Conversation.last_message_preview),
+                "last_message_at": case((newer, stmt.excluded.last_message_at), else_=Conversation.last_message_at),
+                "unread_low": Conversation.unread_low + stmt.excluded.unread_low,
+                "unread_high": Conversation.unread_high + stmt.excluded.unread_high,
+            }
+        )
+        await db.execute(stmt)
+    
+    @staticmethod
+    async def messages_read(db: AsyncSession, reader_id: int, partner_id: int, count: int = 1) -> None:
+        """Okuyan tarafın okunmamış sayısını düş (commit çağıranda)"""
+        if count <= 0:
+            return
+        low, high = pair(reader_id, partner_id)
+        column = Conversation.unread_low if reader_id == low else Conversation.unread_high
+        await db.execute(
+            update(Conversation)
+            .where(Conversation.user_low_id == low, Conversation.user_high_id == high)
+            .values({column: case((column > count, column - count), else_=0)})
+        )
+    
+    @staticmethod
+    async def backfill(db: AsyncSession) -> None:
+        """Özet tablosunu mesajlardan yeniden hesapla"""
+        await db.execute(text(BACKFILL_SQL))
+        await db.commit()
+    
+    @staticmethod
+    async def backfill_if_empty(db: AsyncSession) -> bool:
+        """
+        Özet tablosu boşken mesaj varsa bir kez doldur (create_all ile kurulan mevcut veritabanları).
+        Worker'lar kilitte sıralanır; ilki doldurur, sonrakiler dolu tabloyu görüp geçer.
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            await db.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": BACKFILL_LOCK_ID})
+        empty = await db.scalar(select(Conversation.id).limit(1)) is None
+        if not empty or await db.scalar(select(Message.id).limit(1)) is None:
+            await db.rollback()
+            return False
+        await ConversationService.backfill(db)
+        return True
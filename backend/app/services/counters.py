@@ -0,0 +1,158 @@
+import asyncio
+from typing import Dict, Iterable
+from redis.exceptions import RedisError
+from sqlalchemy import func
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.redis import get_redis
+from app.models.friendship import Friendship, FriendshipStatus
+from app.models.message import Message
+from app.models.notification import Notification
+
+COUNTERS_KEY = "counters:{user_id}"
+ACTIVE_KEY = "counters:active"  # son okunan kullanıcılar; uzlaştırma bunlar için yapılır
+LOADED_FIELD = "_loaded"
+
+MESSAGES = "messages"
+NOTIFICATIONS = "notifications"
+FRIEND_REQUESTS = "friend_requests"
+FIELDS = (MESSAGES, NOTIFICATIONS, FRIEND_REQUESTS)
+
+def _load_counts(user_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+    """Sayaçları SQL'den hesapla (her sayaç için tek gruplu sorgu)"""
+    user_ids = list(user_ids)
+    counts = {uid: dict.fromkeys(FIELDS, 0) for uid in user_ids}
+    if not user_ids:
+        return counts
+    db = SessionLocal()
+    try:
+        queries = (
+            (MESSAGES, db.query(Message.receiver_id, func.count(Message.id))
+                .filter(Message.receiver_id.in_(user_ids), Message.is_read.isnot(True))
+                .group_by(Message.receiver_id)),
+            (NOTIFICATIONS, db.query(Notification.user_id, func.count(Notification.id))
+                .filter(Notification.user_id.in_(user_ids), Notification.is_read == False)
+                .group_by(Notification.user_id)),
+            (FRIEND_REQUESTS, db.query(Friendship.friend_id, func.count(Friendship.id))
+                .filter(Friendship.friend_id.in_(user_ids), Friendship.status == FriendshipStatus.PENDING)
+                .group_by(Friendship.friend_id)),
+        )
+        for field, query in queries:
+            for uid, count in query.all():
+                counts[uid][field] = count
+        return counts
+    finally:
+        db.close()
+
+class UserCounters:
+    """
+    Rozet sayaçları (okunmamış mesaj / bildirim, bekleyen arkadaşlık isteği).
+    Kullanıcı başına bir Redis hash'i; yazma yapan endpoint'ler commit'ten sonra
+    atomik HINCRBY ile günceller, okuma tek HGETALL'dur.
+    Hash yoksa (ilk okuma, TTL dolmuş) SQL'den yüklenir; kaymalar periyodik
+    uzlaştırma ile düzelir.
+    """
+
+    def __init__(self, ttl_seconds: int, reconcile_batch: int = 500):
+        self.ttl_seconds = ttl_seconds
+        self.reconcile_batch = reconcile_batch
+
+    @property
+    def redis(self):
+        return get_redis()
+
+    def _store(self, pipe, user_id: int, counts: Dict[str, int]):
+        key = COUNTERS_KEY.format(user_id=user_id)
+        pipe.hset(key, mapping={**counts, LOADED_FIELD: 1})
+        pipe.expire(key, self.ttl_seconds)
+
+    def incr(self, user_id: int, field: str, amount: int = 1):
+        """
+        Sayacı değiştir (azaltmak için negatif). Hash henüz yüklenmemişse
+        yazılan değer ilk okumada SQL'den gelenle ezilir, o yüzden koşulsuz artırılır.
+        """
+        if not amount:
+            return
+        key = COUNTERS_KEY.format(user_id=user_id)
+        try:
+            pipe = self.redis.pipeline()
+            pipe.hincrby(key, field, amount)
+            pipe.expire(key, self.ttl_seconds)
+            pipe.execute()
+        except RedisError as e:
+            print(f"⚠️ Sayaç güncellenemedi ({user_id}, {field}): {e}")
+
+    def incr_many(self, field: str, amounts: Dict[int, int]):
+        """Birden çok kullanıcının sayacını tek pipeline'da değiştir"""
+        amounts = {uid: amount for uid, amount in amounts.items() if amount}
+        if not amounts:
+            return
+        try:
+            pipe = self.redis.pipeline()
+            for user_id, amount in amounts.items():
+                key = COUNTERS_KEY.format(user_id=user_id)
+                pipe.hincrby(key, field, amount)
+                pipe.expire(key, self.ttl_seconds)
+            pipe.execute()
+        except RedisError as e:
+            print(f"⚠️ Sayaçlar güncellenemedi ({field}): {e}")
+
+    def get(self, user_id: int) -> Dict[str, int]:
+        key = COUNTERS_KEY.format(user_id=user_id)
+        try:
+            data = self.redis.hgetall(key)
+        except RedisError as e:
+            print(f"⚠️ Sayaçlar okunamadı, SQL kullanılıyor: {e}")
+            return _load_counts([user_id])[user_id]
+
+        if LOADED_FIELD in data:
+            counts = {field: max(0, int(data.get(field, 0))) for field in FIELDS}
+        else:
+            counts = _load_counts([user_id])[user_id]
+
+        try:
+            pipe = self.redis.pipeline()
+            if LOADED_FIELD not in data:
+                self._store(pipe, user_id, counts)
+            pipe.sadd(ACTIVE_KEY, user_id)
+            pipe.execute()
+        except RedisError as e:
+            print(f"⚠️ Sayaçlar kaydedilemedi: {e}")
+        return counts
+
+    def reconcile(self) -> int:
+        """Son dönemde okunan kullanıcıların sayaçlarını SQL'den yeniden yaz"""
+        pipe = self.redis.pipeline()
+        pipe.smembers(ACTIVE_KEY)
+        pipe.delete(ACTIVE_KEY)
+        user_ids = sorted(int(uid) for uid in pipe.execute()[0])
+
+        for start in range(0, len(user_ids), self.reconcile_batch):
+            counts = _load_counts(user_ids[start:start + self.reconcile_batch])
+            pipe = self.redis.pipeline()
+            for uid, values in counts.items():
+                self._store(pipe, uid, values)
+            pipe.execute()
+        return len(user_ids)
+
+    async def incr_async(self, user_id: int, field: str, amount: int = 1):
+        await run_in_threadpool(self.incr, user_id, field, amount)
+
+    async def incr_many_async(self, field: str, amounts: Dict[int, int]):
+        await run_in_threadpool(self.incr_many, field, amounts)
+
+    async def get_async(self, user_id: int) -> Dict[str, int]:
+        return await run_in_threadpool(self.get, user_id)
+
+async def reconcile_counters_periodically(interval: int):
+    """Arka plan görevi: sayaçları SQL ile uzlaştır"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(user_counters.reconcile)
+        except Exception as e:
+            print(f"🔴 Sayaç uzlaştırma hatası: {e}")
+
+# Singleton instance
+user_counters = UserCounters(ttl_seconds=settings.COUNTERS_TTL_SECONDS)
@@ -3,14 +3,12 @@ import base64
 import aiofiles
 from pathlib import Path
 from fastapi import UploadFile, HTTPException
-from PIL import Image
 import uuid
 import imghdr
 from io import BytesIO
 from typing import Optional, Tuple
 
 UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
 
 # Alt klasörler
 IMAGES_DIR = UPLOAD_DIR / "images"
@@ -19,8 +17,10 @@ AUDIO_DIR = UPLOAD_DIR / "audio"
 VIDEO_DIR = UPLOAD_DIR / "video"
 OTHER_DIR = UPLOAD_DIR / "other"
 
-for dir_path in [IMAGES_DIR, DOCUMENTS_DIR, AUDIO_DIR, VIDEO_DIR, OTHER_DIR]:
-    dir_path.mkdir(exist_ok=True)
+def ensure_upload_dirs():
+    """Yükleme klasörlerini oluştur (uygulama açılışında çağrılır)"""
+    for dir_path in [IMAGES_DIR, DOCUMENTS_DIR, AUDIO_DIR, VIDEO_DIR, OTHER_DIR]:
+        dir_path.mkdir(parents=True, exist_ok=True)
 
 # Desteklenen dosya uzantıları
 ALLOWED_EXTENSIONS = {
@@ -97,6 +97,7 @@ class Base64Validator:
             
             # PIL ile açmayı dene
             try:
+                from PIL import Image  # ağır modül; sadece gerektiğinde yükle
                 img = Image.open(BytesIO(image_data))
                 width, height = img.size
                 img_format = img.format.lower()
@@ -159,7 +160,7 @@ class FileService:
         
         # Kullanıcıya özel alt klasör
         user_dir = save_dir / str(user_id)
-        user_dir.mkdir(exist_ok=True)
+        user_dir.mkdir(parents=True, exist_ok=True)
         
         # Dosyayı kaydet
         file_path = user_dir / unique_filename
@@ -173,6 +174,7 @@ class FileService:
         thumbnail_path = None
         if file_type == 'image':
             try:
+                from PIL import Image
                 img = Image.open(file_path)
                 # Çok büyük resimleri küçült
                 img.thumbnail((300, 300))
@@ -0,0 +1,125 @@
+import asyncio
+from datetime import date
+from typing import List, Tuple
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import engine
+
+# messages tablosu created_at'e göre aylık RANGE partition'lara bölünür (bkz. alembic 5d8a3f2c1b96).
+# Partition adı: messages_pYYYYMM, aralık [ayın 1'i, sonraki ayın 1'i)
+PARENT = "messages"
+# Birden fazla worker aynı anda DDL çalıştırmasın
+ADVISORY_LOCK_ID = 727001
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_p{month:%Y%m}"
+
+def month_of(name: str) -> date:
+    suffix = name[len(PARENT) + 2:]
+    return date(int(suffix[:4]), int(suffix[4:6]), 1)
+
+class MessagePartitionManager:
+    """
+    Aylık partition bakımı:
+    - ileriye dönük partition'ları önceden oluşturur (insert'ler hiç boşluğa düşmez)
+    - saklama süresini geçen partition'ları ayırıp (DETACH) arşiv şemasına taşır
+    Sadece PostgreSQL'de ve tablo partition'lı ise çalışır.
+    """
+
+    def __init__(self, months_ahead: int, retention_months: int, archive_schema: str):
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+        self.archive_schema = archive_schema
+
+    def _is_partitioned(self, conn) -> bool:
+        if conn.dialect.name != "postgresql":
+            return False
+        relkind = conn.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": PARENT}
+        ).scalar()
+        return relkind == "p"
+
+    def _partitions(self, conn) -> List[Tuple[str, bool]]:
+        """(partition adı, detach yarıda mı kaldı) listesi"""
+        rows = conn.execute(text("""
+            SELECT c.relname, i.inhdetachpending
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(:name)
+        """), {"name": PARENT}).all()
+        return [(name, pending) for name, pending in rows if name.startswith(f"{PARENT}_p")]
+
+    def ensure_future(self, conn, today: date) -> List[str]:
+        """Bu ay + months_ahead aylık partition'ları oluştur"""
+        created = []
+        existing = {name for name, _ in self._partitions(conn)}
+        current = today.replace(day=1)
+        for offset in range(self.months_ahead + 1):
+            month = add_months(current, offset)
+            name = partition_name(month)
+            if name in existing:
+                continue
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            ))
+            created.append(name)
+        return created
+
+    def archive_old(self, conn, today: date) -> List[str]:
+        """Saklama süresinden eski partition'ları ayır ve arşiv şemasına taşı"""
+        if self.retention_months <= 0:
+            return []
+        cutoff = add_months(today.replace(day=1), -self.retention_months)
+        archived = []
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.archive_schema}"))
+        for name, pending in sorted(self._partitions(conn)):
+            if month_of(name) >= cutoff:
+                continue
+            if pending:
+                # Önceki CONCURRENTLY detach yarıda kalmış
+                conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name} FINALIZE"))
+            else:
+                # CONCURRENTLY: ana tabloyu yazmaya kilitlemez (transaction dışında çalışmalı)
+                conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name} CONCURRENTLY"))
+            conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {self.archive_schema}"))
+            archived.append(name)
+        return archived
+
+    def run(self, today: date = None) -> dict:
+        today = today or date.today()
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            if not self._is_partitioned(conn):
+                return {"created": [], "archived": []}
+            if not conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID}).scalar():
+                return {"created": [], "archived": []}
+            try:
+                return {
+                    "created": self.ensure_future(conn, today),
+                    "archived": self.archive_old(conn, today),
+                }
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID})
+
+async def maintain_partitions_periodically(interval: int):
+    """Arka plan görevi: partition'ları oluştur / arşivle"""
+    while True:
+        try:
+            result = await run_in_threadpool(message_partitions.run)
+            if result["created"] or result["archived"]:
+                print(f"🗂️ Mesaj partition'ları: {result}")
+        except Exception as e:
+            print(f"🔴 Partition bakım hatası: {e}")
+        await asyncio.sleep(interval)
+
+# Singleton instance
+message_partitions = MessagePartitionManager(
+    months_ahead=settings.MESSAGE_PARTITION_MONTHS_AHEAD,
+    retention_months=settings.MESSAGE_RETENTION_MONTHS,
+    archive_schema=settings.MESSAGE_ARCHIVE_SCHEMA
+)
@@ -0,0 +1,148 @@
+import asyncio
+from collections import Counter
+from typing import List, Optional, Set
+from sqlalchemy import insert, select
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.message import Message
+from app.models.user import User
+from app.services.block_graph import block_graph
+from app.services.conversation_service import ConversationService
+from app.services.counters import user_counters, MESSAGES
+
+class MessageRejected(Exception):
+    """Mesaj kaydedilmedi (alıcı yok veya engel var)"""
+
+class _Pending:
+    __slots__ = ("values", "future")
+
+    def __init__(self, values: dict, future: asyncio.Future):
+        self.values = values
+        self.future = future
+
+class MessageWriter:
+    """
+    WebSocket özel mesajlarını toplu kaydeder.
+    submit() mesajı kuyruğa koyar ve kayıt bitince (id, created_at dolu) Message döner.
+    Arka plan görevi ilk mesajdan sonra en fazla flush_ms bekler veya batch_size
+    dolunca tek çok satırlı INSERT, tek sohbet özeti upsert'i ve tek commit yapar.
+    Kuyruk max_pending ile sınırlı; dolunca gönderenler bekler (backpressure).
+    """
+
+    def __init__(self, batch_size: int, flush_ms: int, max_pending: int):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_ms / 1000
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Kuyrukta kalanları yazıp dur"""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, sender_id: int, receiver_id: int, content: str,
+                     message_type: str = "text", file_url: Optional[str] = None) -> Message:
+        if self._task is None:
+            raise RuntimeError("MessageWriter başlatılmadı")
+        # Tek hatalı satır bütün batch'i düşürmesin: kolon sınırları burada kontrol edilir
+        if (not isinstance(receiver_id, int) or not isinstance(content, str) or not content
+                or len(message_type or "") > 20 or len(file_url or "") > 500):
+            raise MessageRejected("Geçersiz mesaj")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Pending({
+            "sender_id": sender_id,
+            "receiver_id": receiver_id,
+            "content": content,
+            "message_type": message_type,
+            "file_url": file_url,
+            "is_read": False
+        }, future))
+        # Bağlantı kapansa da mesaj yazılır; sadece bekleyen iptal olur
+        return await asyncio.shield(future)
+
+    async def _run(self):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            if self._queue.qsize() < self.batch_size - 1:
+                await asyncio.sleep(self.flush_seconds)
+
+            stopping = False
+            while len(batch) < self.batch_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _rejections(self, db, batch: List[_Pending]) -> List[Optional[str]]:
+        """Her mesaj için red nedeni (yoksa None); tek kullanıcı sorgusu, engeller önbellekten"""
+        user_ids = {p.values["sender_id"] for p in batch} | {p.values["receiver_id"] for p in batch}
+        existing: Set[int] = set((await db.scalars(select(User.id).where(User.id.in_(user_ids)))).all())
+        relations = await block_graph.relations_many_async({p.values["sender_id"] for p in batch})
+
+        reasons = []
+        for p in batch:
+            sender, receiver = p.values["sender_id"], p.values["receiver_id"]
+            blocked, blocked_by = relations[sender]
+            if receiver not in existing or sender not in existing:
+                reasons.append("Kullanıcı bulunamadı")
+            elif receiver in blocked or receiver in blocked_by:
+                reasons.append("Bu kullanıcıya mesaj gönderemezsiniz")
+            else:
+                reasons.append(None)
+        return reasons
+
+    async def _flush(self, batch: List[_Pending]):
+        try:
+            async with AsyncSessionLocal() as db:
+                reasons = await self._rejections(db, batch)
+                accepted = [p for p, reason in zip(batch, reasons) if reason is None]
+                for p, reason in zip(batch, reasons):
+                    if reason is not None and not p.future.done():
+                        p.future.set_exception(MessageRejected(reason))
+                if not accepted:
+                    return
+
+                rows = (await db.execute(
+                    insert(Message).returning(Message.id, Message.created_at, sort_by_parameter_order=True),
+                    [p.values for p in accepted]
+                )).all()
+                messages = [
+                    Message(**p.values, id=row.id, created_at=row.created_at)
+                    for p, row in zip(accepted, rows)
+                ]
+                await ConversationService.record_messages(db, messages)
+                await db.commit()
+        except Exception as e:
+            print(f"🔴 Mesaj yazma hatası ({len(batch)} mesaj): {e}")
+            for p in batch:
+                if not p.future.done():
+                    p.future.set_exception(e)
+            return
+
+        await user_counters.incr_many_async(MESSAGES, Counter(m.receiver_id for m in messages))
+        for p, message in zip(accepted, messages):
+            if not p.future.done():
+                p.future.set_result(message)
+
+# Singleton instance
+message_writer = MessageWriter(
+    batch_size=settings.CHAT_WRITER_BATCH_SIZE,
+    flush_ms=settings.CHAT_WRITER_FLUSH_MS,
+    max_pending=settings.CHAT_WRITER_MAX_PENDING
+)
@@ -1,12 +1,15 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.notification import Notification
 from app.schemas.notification import NotificationCreate
 from typing import List, Optional
+from app.utils.pagination import keyset_page
+from app.services.counters import user_counters, NOTIFICATIONS
 
 class NotificationService:
     
     @staticmethod
-    def create_notification(db: Session, user_id: int, type: str, title: str, body: str, data: dict = None) -> Notification:
+    async def create_notification(db: AsyncSession, user_id: int, type: str, title: str, body: str, data: dict = None) -> Notification:
         """Yeni bildirim oluştur"""
         notification = Notification(
             user_id=user_id,
@@ -16,68 +19,95 @@ class NotificationService:
             data=data or {}
         )
         db.add(notification)
-        db.commit()
-        db.refresh(notification)
+        await db.commit()
+        await db.refresh(notification)
+        await user_counters.incr_async(user_id, NOTIFICATIONS)
         return notification
     
     @staticmethod
-    def get_user_notifications(db: Session, user_id: int, skip: int = 0, limit: int = 50) -> List[Notification]:
-        """Kullanıcının bildirimlerini getir"""
-        return db.query(Notification).filter(
-            Notification.user_id == user_id
-        ).order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
+    async def get_user_notifications(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 50, cursor: Optional[str] = None) -> List[Notification]:
+        """Kullanıcının bildirimlerini getir (sonraki sayfa var mı diye limit + 1 satıra kadar döner)"""
+        result = await db.scalars(
+            keyset_page(select(Notification).where(Notification.user_id == user_id), Notification, cursor, limit, skip)
+        )
+        return result.all()
     
     @staticmethod
-    def get_unread_count(db: Session, user_id: int) -> int:
+    async def get_unread_count(db: AsyncSession, user_id: int) -> int:
         """Okunmamış bildirim sayısını getir"""
-        return db.query(Notification).filter(
-            Notification.user_id == user_id,
-            Notification.is_read == False
-        ).count()
+        return await db.scalar(
+            select(func.count(Notification.id)).where(
+                Notification.user_id == user_id,
+                Notification.is_read == False
+            )
+        )
     
     @staticmethod
-    def mark_as_read(db: Session, notification_id: int, user_id: int) -> Optional[Notification]:
+    async def mark_as_read(db: AsyncSession, notification_id: int, user_id: int) -> Optional[Notification]:
         """Bildirimi okundu olarak işaretle"""
-        notification = db.query(Notification).filter(
-            Notification.id == notification_id,
-            Notification.user_id == user_id
-        ).first()
-        
+        # Koşullu UPDATE: eşzamanlı iki çağrıdan sadece satırı değiştiren sayacı azaltır
+        notification = await db.scalar(
+            update(Notification)
+            .where(
+                Notification.id == notification_id,
+                Notification.user_id == user_id,
+                Notification.is_read == False
+            )
+            .values(is_read=True)
+            .returning(Notification)
+        )
         if notification:
-            notification.is_read = True
-            db.commit()
-            db.refresh(notification)
+            await db.commit()
+            await db.refresh(notification)
+            await user_counters.incr_async(user_id, NOTIFICATIONS, -1)
+            return notification
         
-        return notification
+        return await db.scalar(
+            select(Notification).where(
+                Notification.id == notification_id,
+                Notification.user_id == user_id
+            )
+        )
     
     @staticmethod
-    def mark_all_as_read(db: Session, user_id: int) -> int:
+    async def mark_all_as_read(db: AsyncSession, user_id: int) -> int:
         """Tüm bildirimleri okundu işaretle"""
-        result = db.query(Notification).filter(
-            Notification.user_id == user_id,
-            Notification.is_read == False
-        ).update({"is_read": True})
-        db.commit()
-        return result
+        result = await db.execute(
+            update(Notification)
+            .where(
+                Notification.user_id == user_id,
+                Notification.is_read == False
+            )
+            .values(is_read=True)
+        )
+        await db.commit()
+        await user_counters.incr_async(user_id, NOTIFICATIONS, -result.rowcount)
+        return result.rowcount
     
     @staticmethod
-    def delete_notification(db: Session, notification_id: int, user_id: int) -> bool:
+    async def delete_notification(db: AsyncSession, notification_id: int, user_id: int) -> bool:
         """Bildirimi sil"""
-        notification = db.query(Notification).filter(
-            Notification.id == notification_id,
-            Notification.user_id == user_id
-        ).first()
-        
-        if notification:
-            db.delete(notification)
-            db.commit()
-            return True
-        return False
+        # Silinen satırın durumu DELETE'ten döner: eşzamanlı silmede sayaç bir kez azalır
+        deleted = (await db.execute(
+            delete(Notification)
+            .where(
+                Notification.id == notification_id,
+                Notification.user_id == user_id
+            )
+            .returning(Notification.is_read)
+            .execution_options(synchronize_session=False)
+        )).first()
+        if deleted is None:
+            return False
+        await db.commit()
+        if deleted.is_read == False:
+            await user_counters.incr_async(user_id, NOTIFICATIONS, -1)
+        return True
     
     @staticmethod
-    def create_friend_request_notification(db: Session, to_user_id: int, from_username: str):
+    async def create_friend_request_notification(db: AsyncSession, to_user_id: int, from_username: str):
         """Arkadaşlık isteği bildirimi oluştur"""
-        return NotificationService.create_notification(
+        return await NotificationService.create_notification(
             db=db,
             user_id=to_user_id,
             type="friend_request",
@@ -87,9 +117,9 @@ class NotificationService:
         )
     
     @staticmethod
-    def create_message_notification(db: Session, to_user_id: int, from_username: str, message_preview: str):
+    async def create_message_notification(db: AsyncSession, to_user_id: int, from_username: str, message_preview: str):
         """Yeni mesaj bildirimi oluştur"""
-        return NotificationService.create_notification(
+        return await NotificationService.create_notification(
             db=db,
             user_id=to_user_id,
             type="message",
@@ -99,9 +129,9 @@ class NotificationService:
         )
     
     @staticmethod
-    def create_room_invite_notification(db: Session, to_user_id: int, from_username: str, room_name: str, room_id: int):
+    async def create_room_invite_notification(db: AsyncSession, to_user_id: int, from_username: str, room_name: str, room_id: int):
         """Oda daveti bildirimi oluştur"""
-        return NotificationService.create_notification(
+        return await NotificationService.create_notification(
             db=db,
             user_id=to_user_id,
             type="room_invite",
@@ -111,9 +141,9 @@ class NotificationService:
         )
     
     @staticmethod
-    def create_mention_notification(db: Session, to_user_id: int, from_username: str, room_name: str):
+    async def create_mention_notification(db: AsyncSession, to_user_id: int, from_username: str, room_name: str):
         """Etiketlenme bildirimi oluştur"""
-        return NotificationService.create_notification(
+        return await NotificationService.create_notification(
             db=db,
             user_id=to_user_id,
             type="mention",
@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import math
+import threading
+import time
+from typing import Iterable, Tuple
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.redis import get_redis, get_async_redis
+
+REVOKED_KEY = "revoked:access"            # sorted set: "sid:12" / "jti:ab" -> geçerlilik sonu
+REVOKED_VERSION_KEY = "revoked:access:version"
+
+class BloomFilter:
+    """Sabit boyutlu bloom filter (yanlış negatif yok, yanlış pozitif oranı ayarlı)"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+def revocation_ids(payload: dict) -> Tuple[str, ...]:
+    """Token'ı iptal edebilecek kimlikler (oturum id'si ve token id'si)"""
+    ids = []
+    if payload.get("sid") is not None:
+        ids.append(f"sid:{payload['sid']}")
+    if payload.get("jti"):
+        ids.append(f"jti:{payload['jti']}")
+    return tuple(ids)
+
+class AccessTokenRevocation:
+    """
+    Access token iptali.
+    İptaller Redis'te tutulur; her worker periyodik olarak yenilenen bir
+    bloom filter'a sahiptir. Normal istekte sadece bellek içi kontrol yapılır,
+    yalnızca filtre eşleşirse Redis'e tam kontrol için gidilir.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._filter = BloomFilter(capacity, error_rate)
+        self._version = None
+        self._lock = threading.Lock()
+
+    @property
+    def redis(self):
+        return get_redis()
+
+    def revoke(self, ids: Iterable[str]):
+        """Kimlikleri access token ömrü boyunca iptal et"""
+        ids = list(ids)
+        if not ids:
+            return
+        until = time.time() + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        pipe = self.redis.pipeline()
+        pipe.zadd(REVOKED_KEY, {i: until for i in ids})
+        pipe.incr(REVOKED_VERSION_KEY)
+        pipe.execute()
+        # Bu worker beklemeden görsün
+        with self._lock:
+            for i in ids:
+                self._filter.add(i)
+
+    def revoke_sessions(self, session_ids: Iterable[int]):
+        self.revoke(f"sid:{sid}" for sid in session_ids)
+
+    def is_revoked(self, ids: Tuple[str, ...]) -> bool:
+        candidates = [i for i in ids if i in self._filter]
+        if not candidates:
+            return False
+        now = time.time()
+        for i in candidates:
+            until = self.redis.zscore(REVOKED_KEY, i)
+            if until is not None and float(until) > now:
+                return True
+        return False
+
+    async def is_revoked_async(self, ids: Tuple[str, ...]) -> bool:
+        """is_revoked'un async endpoint'ler için olanı: filtre eşleşirse Redis beklenir, loop bloklanmaz"""
+        candidates = [i for i in ids if i in self._filter]
+        if not candidates:
+            return False
+        now = time.time()
+        redis = get_async_redis()
+        for i in candidates:
+            until = await redis.zscore(REVOKED_KEY, i)
+            if until is not None and float(until) > now:
+                return True
+        return False
+
+    def sync(self):
+        """Filtreyi Redis'teki güncel iptal listesinden yeniden kur"""
+        version = self.redis.get(REVOKED_VERSION_KEY)
+        if version is not None and version == self._version:
+            return
+        now = time.time()
+        self.redis.zremrangebyscore(REVOKED_KEY, "-inf", now)
+        members = self.redis.zrangebyscore(REVOKED_KEY, now, "+inf")
+
+        new_filter = BloomFilter(max(self.capacity, len(members) * 2), self.error_rate)
+        for m in members:
+            new_filter.add(m)
+        with self._lock:
+            self._filter = new_filter
+            self._version = version
+
+# Singleton instance
+access_token_revocation = AccessTokenRevocation(
+    capacity=settings.REVOCATION_FILTER_CAPACITY,
+    error_rate=settings.REVOCATION_FILTER_ERROR_RATE
+)
+
+async def sync_revocations_periodically(interval: int):
+    """Arka plan görevi: bloom filter'ı Redis'ten tazele"""
+    while True:
+        try:
+            await run_in_threadpool(access_token_revocation.sync)
+        except Exception as e:
+            print(f"🔴 İptal listesi senkronizasyon hatası: {e}")
+        await asyncio.sleep(interval)
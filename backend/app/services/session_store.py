@@ -0,0 +1,189 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import bindparam, event, inspect
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.database import SessionLocal
+from app.core.redis import get_redis
+from app.models.session import UserSession
+from app.models.user import User
+
+SESSION_KEY = "refresh:session:{token}"
+USER_SESSIONS_KEY = "refresh:user:{user_id}"
+REVOKED_TOMBSTONE_KEY = "refresh:dead:{token}"
+ACTIVITY_KEY = "refresh:pending:activity"   # token -> son kullanım zamanı
+REVOKED_KEY = "refresh:pending:revoked"     # Postgres'e yazılacak iptaller
+
+# Refresh token ömrü kadar; flush kaybolsa bile iptal edilen token geri dönemez
+TOMBSTONE_TTL = 7 * 24 * 60 * 60
+
+class RefreshSessionStore:
+    """
+    Refresh token oturumlarını Redis'te tutar.
+    Postgres kalıcı kayıttır; last_active ve iptaller periyodik olarak
+    flush() ile topluca yazılır, böylece refresh isteği Postgres'e gitmez.
+    """
+
+    @property
+    def redis(self):
+        return get_redis()
+
+    def put(self, token: str, session_id: int, user: User, expires_at: datetime):
+        """Oturumu Redis'e yaz (token'ın süresi kadar yaşar)"""
+        expires_ts = expires_at.replace(tzinfo=expires_at.tzinfo or timezone.utc).timestamp()
+        ttl = int(expires_ts - time.time())
+        if ttl <= 0:
+            return
+        key = SESSION_KEY.format(token=token)
+        user_key = USER_SESSIONS_KEY.format(user_id=user.id)
+        pipe = self.redis.pipeline()
+        pipe.hset(key, mapping={
+            "sid": session_id,
+            "user_id": user.id,
+            "username": user.username,
+            "tier": user.subscription_tier or "free",
+            "role": user.role or "student",
+            "expires_at": expires_ts
+        })
+        pipe.expire(key, ttl)
+        pipe.sadd(user_key, token)
+        pipe.expire(user_key, ttl)
+        pipe.execute()
+
+    def get(self, token: str) -> Optional[dict]:
+        """Geçerli oturumu döndür; Redis'te yoksa None"""
+        data = self.redis.hgetall(SESSION_KEY.format(token=token))
+        if not data or float(data["expires_at"]) <= time.time():
+            return None
+        return {
+            "sid": int(data["sid"]),
+            "user_id": int(data["user_id"]),
+            "username": data["username"],
+            "tier": data.get("tier", "free"),
+            "role": data.get("role", "student"),
+            "expires_at": float(data["expires_at"])
+        }
+
+    def is_revoked(self, token: str) -> bool:
+        return bool(self.redis.exists(REVOKED_TOMBSTONE_KEY.format(token=token)))
+
+    def touch(self, token: str):
+        """Son kullanım zamanını write-behind kuyruğuna yaz"""
+        self.redis.hset(ACTIVITY_KEY, token, time.time())
+
+    def revoke(self, token: str, user_id: Optional[int] = None):
+        """Oturumu hemen geçersiz kıl; Postgres'e bir sonraki flush'ta yazılır"""
+        pipe = self.redis.pipeline()
+        pipe.delete(SESSION_KEY.format(token=token))
+        pipe.set(REVOKED_TOMBSTONE_KEY.format(token=token), 1, ex=TOMBSTONE_TTL)
+        pipe.sadd(REVOKED_KEY, token)
+        pipe.hdel(ACTIVITY_KEY, token)
+        if user_id is not None:
+            pipe.srem(USER_SESSIONS_KEY.format(user_id=user_id), token)
+        pipe.execute()
+
+    def drop_user(self, user_id: int):
+        """Kullanıcının Redis'teki tüm oturumlarını sil (Postgres çağıran tarafından güncellenir)"""
+        user_key = USER_SESSIONS_KEY.format(user_id=user_id)
+        tokens = self.redis.smembers(user_key)
+        pipe = self.redis.pipeline()
+        for token in tokens:
+            pipe.delete(SESSION_KEY.format(token=token))
+            pipe.set(REVOKED_TOMBSTONE_KEY.format(token=token), 1, ex=TOMBSTONE_TTL)
+            pipe.hdel(ACTIVITY_KEY, token)
+        pipe.delete(user_key)
+        pipe.execute()
+
+    def forget_user(self, user_id: int):
+        """
+        Kullanıcının oturumlarını iptal etmeden Redis'ten düşür.
+        Bir sonraki refresh Postgres'ten güncel kullanıcıyla yeniden yüklenir.
+        """
+        user_key = USER_SESSIONS_KEY.format(user_id=user_id)
+        tokens = self.redis.smembers(user_key)
+        pipe = self.redis.pipeline()
+        for token in tokens:
+            pipe.delete(SESSION_KEY.format(token=token))
+        pipe.delete(user_key)
+        pipe.execute()
+
+    def flush(self, db: Session) -> int:
+        """Biriken last_active ve iptalleri Postgres'e topluca yaz"""
+        pipe = self.redis.pipeline()
+        pipe.hgetall(ACTIVITY_KEY)
+        pipe.delete(ACTIVITY_KEY)
+        pipe.smembers(REVOKED_KEY)
+        pipe.delete(REVOKED_KEY)
+        activity, _, revoked, _ = pipe.execute()
+
+        if not activity and not revoked:
+            return 0
+
+        try:
+            self._write(db, activity, revoked)
+        except Exception:
+            # İptaller ve son kullanım zamanları kaybolmasın, bir sonraki flush'ta tekrar denensin
+            db.rollback()
+            self._requeue(activity, revoked)
+            raise
+        return len(activity) + len(revoked)
+
+    def _requeue(self, activity: dict, revoked: set):
+        pipe = self.redis.pipeline()
+        for token, ts in activity.items():
+            # Bu arada gelen daha yeni kullanım zamanı ezilmesin
+            pipe.hsetnx(ACTIVITY_KEY, token, ts)
+        if revoked:
+            pipe.sadd(REVOKED_KEY, *revoked)
+        pipe.execute()
+
+    @staticmethod
+    def _write(db: Session, activity: dict, revoked: set):
+        table = UserSession.__table__
+        if activity:
+            db.execute(
+                table.update()
+                .where(table.c.session_token == bindparam("b_token"))
+                .values(last_active=bindparam("b_last_active")),
+                [
+                    # last_active naive UTC tutulur (datetime.utcnow() ile aynı)
+                    {"b_token": token, "b_last_active": datetime.utcfromtimestamp(float(ts))}
+                    for token, ts in activity.items()
+                ]
+            )
+        if revoked:
+            db.execute(
+                table.update()
+                .where(table.c.session_token.in_(list(revoked)))
+                .values(is_active=False)
+            )
+        db.commit()
+
+# Singleton instance
+refresh_session_store = RefreshSessionStore()
+
+# Token claim'lerine giren alanlar değişince Redis'teki oturum kopyasını düşür
+@event.listens_for(User, "after_update")
+def _forget_stale_sessions(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in ("username", "subscription_tier", "role")):
+        refresh_session_store.forget_user(target.id)
+
+def flush_sessions():
+    """Write-behind kuyruğunu kendi DB oturumuyla boşalt"""
+    db = SessionLocal()
+    try:
+        return refresh_session_store.flush(db)
+    finally:
+        db.close()
+
+async def flush_sessions_periodically(interval: int):
+    """Arka plan görevi: her interval saniyede bir flush"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(flush_sessions)
+        except Exception as e:
+            print(f"🔴 Oturum flush hatası: {e}")
@@ -0,0 +1,77 @@
+from typing import Optional
+from sqlalchemy import event, inspect
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.user import User
+from app.utils.cache import TTLCache, MISSING
+
+def _load_tier(user_id: Optional[int], username: Optional[str]) -> Optional[str]:
+    """Abonelik seviyesini veritabanından oku (kullanıcı yoksa None)"""
+    db = SessionLocal()
+    try:
+        query = db.query(User.subscription_tier)
+        if user_id is not None:
+            row = query.filter(User.id == user_id).first()
+        else:
+            row = query.filter(User.username == username).first()
+        return row.subscription_tier if row else None
+    finally:
+        db.close()
+
+class TierCache:
+    """
+    Rate limit için kullanıcı abonelik seviyesi önbelleği.
+    Bulunamayan kullanıcılar da (negatif) kısa süreliğine önbelleğe alınır;
+    önbellekte varsa veritabanı bağlantısı açılmaz.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int, negative_ttl_seconds: int):
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._cache = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    @staticmethod
+    def _key(user_id: Optional[int], username: Optional[str]) -> str:
+        return f"uid:{user_id}" if user_id is not None else f"user:{username}"
+
+    async def resolve(self, user_id: Optional[int] = None, username: Optional[str] = None) -> str:
+        key = self._key(user_id, username)
+        tier = self._cache.get(key)
+        if tier is MISSING:
+            tier = await run_in_threadpool(_load_tier, user_id, username)
+            self._cache.set(key, tier, ttl=None if tier is not None else self.negative_ttl_seconds)
+        return tier or "free"
+
+    def remember(self, user: User):
+        """Zaten yüklenmiş kullanıcının seviyesini önbelleğe al"""
+        self._cache.set(self._key(user.id, None), user.subscription_tier)
+        self._cache.set(self._key(None, user.username), user.subscription_tier)
+
+    def invalidate(self, user_id: int, *usernames: str):
+        self._cache.delete(self._key(user_id, None))
+        for username in usernames:
+            self._cache.delete(self._key(None, username))
+
+# Singleton instance
+tier_cache = TierCache(
+    max_size=settings.TIER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.TIER_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=settings.TIER_CACHE_NEGATIVE_TTL_SECONDS
+)
+
+@event.listens_for(User, "after_update")
+def _invalidate_tier(mapper, connection, target):
+    state = inspect(target)
+    tier_history = state.attrs.subscription_tier.history
+    username_history = state.attrs.username.history
+    if tier_history.has_changes() or username_history.has_changes():
+        tier_cache.invalidate(target.id, target.username, *(username_history.deleted or ()))
+
+@event.listens_for(User, "after_delete")
+def _forget_tier(mapper, connection, target):
+    tier_cache.invalidate(target.id, target.username)
+
+# Yeni kayıt olan kullanıcı önceden negatif önbelleğe girmiş olabilir
+@event.listens_for(User, "after_insert")
+def _clear_negative_tier(mapper, connection, target):
+    tier_cache.invalidate(target.id, target.username)
@@ -0,0 +1,99 @@
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+from sqlalchemy import event
+from app.core.config import settings
+from app.models.user import User
+from app.schemas.user import UserSnapshot
+from app.utils.cache import TTLCache, MISSING
+
+class UserCache:
+    """
+    Doğrulanmış token -> kullanıcı görüntüsü önbelleği (TTL + LRU)
+    Her istekte JWT çözme ve User sorgusunu atlamak için kullanılır.
+    """
+
+    def __init__(self, ttl_seconds: int, max_size: int):
+        # token -> (kullanıcı görüntüsü, iptal kimlikleri)
+        self._cache = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        # user_id -> token'lar (kullanıcı güncellenince hepsini düşürmek için).
+        # TTLCache'ten sessizce düşen token'lar burada kalabilir; dizin büyüyünce ayıklanır.
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._indexed = 0
+        self._lock = threading.Lock()
+
+    @property
+    def ttl_seconds(self) -> int:
+        return self._cache.ttl_seconds
+
+    @property
+    def max_size(self) -> int:
+        return self._cache.max_size
+
+    def get(self, token: str) -> Optional[Tuple[UserSnapshot, Tuple[str, ...]]]:
+        """
+        Token için önbellekteki (kullanıcı, iptal kimlikleri) çiftini döndür
+        (yoksa veya süresi geçmişse None)
+        """
+        entry = self._cache.get(token)
+        return None if entry is MISSING else entry
+
+    def set(self, token: str, user: User, token_exp: Optional[float] = None,
+            revocation_ids: Tuple[str, ...] = ()) -> UserSnapshot:
+        """Kullanıcıyı önbelleğe al; kayıt token'ın süresinden uzun yaşamaz"""
+        snapshot = UserSnapshot.model_validate(user)
+        ttl = self.ttl_seconds
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0:
+            return snapshot
+
+        with self._lock:
+            tokens = self._tokens_by_user.setdefault(snapshot.id, set())
+            if token not in tokens:
+                tokens.add(token)
+                self._indexed += 1
+            self._cache.set(token, (snapshot, revocation_ids), ttl=ttl)
+            if self._indexed > 2 * self.max_size:
+                self._prune()
+        return snapshot
+
+    def invalidate_user(self, user_id: int):
+        """Kullanıcıya ait tüm önbellek kayıtlarını sil"""
+        with self._lock:
+            tokens = self._tokens_by_user.pop(user_id, set())
+            self._indexed -= len(tokens)
+            for token in tokens:
+                self._cache.delete(token)
+
+    def invalidate_token(self, token: str):
+        """Tek bir token'ın önbellek kaydını sil"""
+        self._cache.delete(token)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._tokens_by_user.clear()
+            self._indexed = 0
+
+    def _prune(self):
+        """Önbellekten düşmüş token'ları kullanıcı dizininden çıkar"""
+        for user_id in list(self._tokens_by_user):
+            tokens = {token for token in self._tokens_by_user[user_id] if token in self._cache}
+            if tokens:
+                self._tokens_by_user[user_id] = tokens
+            else:
+                del self._tokens_by_user[user_id]
+        self._indexed = sum(len(tokens) for tokens in self._tokens_by_user.values())
+
+# Singleton instance
+user_cache = UserCache(
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    max_size=settings.USER_CACHE_MAX_SIZE
+)
+
+# User tablosuna yazıldığında (profil, deaktivasyon, abonelik) önbelleği düşür
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    user_cache.invalidate_user(target.id)
@@ -0,0 +1,68 @@
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+# Opak cursor: (created_at, id) çiftinin base64 hali.
+# Offset yerine "son görülen satırdan sonrası" sorgulanır; derin sayfalar da index'ten okunur
+# ve araya yeni satır girince sayfalar kaymaz.
+
+def _encode(*parts) -> str:
+    raw = "|".join(str(part) for part in parts).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode(cursor: str, *types) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        parts = base64.urlsafe_b64decode(padded).decode().rsplit("|", len(types) - 1)
+        if len(parts) != len(types):
+            raise ValueError(cursor)
+        return tuple(cast(part) for cast, part in zip(types, parts))
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Geçersiz cursor")
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    return _encode(created_at.isoformat(), row_id)
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    return _decode(cursor, datetime.fromisoformat, int)
+
+def encode_rank_cursor(rank: float, row_id: int) -> str:
+    """Skora göre sıralanan listeler (arama) için (skor, id) cursor'u"""
+    return _encode(repr(rank), row_id)
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, int]:
+    return _decode(cursor, float, int)
+
+def keyset_page(query, model, cursor: Optional[str], limit: int, skip: int = 0, descending: bool = True):
+    """
+    Sorguya (created_at, id) sıralaması ve cursor koşulunu ekle.
+    Sonraki sayfa olup olmadığını anlamak için limit + 1 satır istenir.
+    Cursor yoksa eski offset davranışı korunur.
+    """
+    key = tuple_(model.created_at, model.id)
+    if descending:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at.asc(), model.id.asc())
+
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        # Tekrarlı created_at koşulu: satır karşılaştırmasından partition budaması yapılamıyor
+        if descending:
+            query = query.where(key < (created_at, row_id), model.created_at <= created_at)
+        else:
+            query = query.where(key > (created_at, row_id), model.created_at >= created_at)
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit + 1)
+
+def finish_page(rows: List[Any], limit: int, response: Response) -> List[Any]:
+    """Fazla satırı at, sonraki sayfanın cursor'unu X-Next-Cursor header'ına yaz"""
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    return rows
@@ -0,0 +1,82 @@
+"""
+Senkron (threadpool) ve async (asyncpg) veritabanı yolu benchmark'ı.
+Her istek beklemeli bir sorgu çalıştırır (pg_sleep, ağ/disk gecikmesi yerine);
+sync endpoint'ler anyio threadpool'u (varsayılan 40 thread) ile sınırlıdır.
+
+    BENCH_DATABASE_URL=postgresql://... python scripts/bench_async_db.py --concurrency 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.database import _async_url
+
+QUERY = text("SELECT pg_sleep(:seconds)")
+
+def make_app(url: str, pool_size: int, latency: float) -> tuple:
+    engine = create_engine(url, pool_size=pool_size, max_overflow=0)
+    async_engine = create_async_engine(_async_url(url), pool_size=pool_size, max_overflow=0)
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_endpoint():
+        with engine.connect() as conn:
+            conn.execute(QUERY, {"seconds": latency})
+        return {}
+
+    @app.get("/async")
+    async def async_endpoint():
+        async with async_engine.connect() as conn:
+            await conn.execute(QUERY, {"seconds": latency})
+        return {}
+
+    return app, engine, async_engine
+
+async def run(app: FastAPI, path: str, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        queue = iter(range(requests))
+
+        async def worker():
+            for _ in queue:
+                response = await client.get(path)
+                assert response.status_code == 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("BENCH_DATABASE_URL ayarlı değil")
+
+    async def bench():
+        app, engine, async_engine = make_app(url, args.concurrency, args.latency_ms / 1000)
+        # Havuzlar sırayla kapatılır: iki yol aynı anda bağlantı tutmasın (max_connections)
+        for path, dispose in (("/sync", engine.dispose), ("/async", async_engine.dispose)):
+            rate = await run(app, path, args.requests, args.concurrency)
+            print(f"{path:7} concurrency={args.concurrency} req/s={rate:8.1f}")
+            result = dispose()
+            if asyncio.iscoroutine(result):
+                await result
+
+    asyncio.run(bench())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+app.main import süresi (python -X importtime). Toplam süreyi ve en pahalı modülleri yazdırır;
+import sırasında yüklenmemesi gereken ağır modüller (PIL, httpx) yüklenirse hata ile çıkar.
+Ayarlar ortamdan/.env'den okunur; import hiçbir servise bağlanmaz.
+
+    python scripts/bench_import_time.py --runs 5 --top 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND = os.path.join(os.path.dirname(__file__), "..")
+HEAVY = ("PIL", "httpx")
+
+def import_once() -> tuple:
+    code = f"import sys, app.main; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND, capture_output=True, text=True, check=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative_us)
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return modules, loaded
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    totals, modules, loaded = [], {}, []
+    for _ in range(args.runs):
+        modules, loaded = import_once()
+        totals.append(modules.get("app.main", 0) / 1e6)
+
+    print(f"app.main cumulative: median={statistics.median(totals):.3f}s min={min(totals):.3f}s ({args.runs} runs)")
+    # Son çalıştırmanın en pahalı modülleri (cumulative; iç içe olanlar üst modüle de dahil)
+    for name, us in sorted(modules.items(), key=lambda item: -item[1])[1:args.top + 1]:
+        print(f"  {us / 1e3:8.1f} ms  {name}")
+    if loaded:
+        sys.exit(f"🔴 import sırasında ağır modüller yüklendi: {', '.join(loaded)}")
+
+if __name__ == "__main__":
+    main()
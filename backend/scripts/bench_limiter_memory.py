@@ -0,0 +1,63 @@
+"""
+Süreç içi rate limiter'ın bellek kullanımı: farklı istemci sayısına göre anahtar başına byte.
+Eski defaultdict(list) tablosu (istek başına bir float) ile karşılaştırır.
+
+    python scripts/bench_limiter_memory.py --clients 1000000 --requests-per-client 5
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.middleware.limiters import MemoryTokenBucketLimiter
+
+def legacy_fill(clients: int, requests: int):
+    """Eski _check_rate_limit_memory: istemci başına istek zamanları listesi"""
+    storage = defaultdict(list)
+    for i in range(clients):
+        key = f"requests:10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+        for _ in range(requests):
+            now = time.time()
+            storage[key] = [t for t in storage[key] if now - t < 60]
+            storage[key].append(now)
+    return storage
+
+def bucket_fill(clients: int, requests: int, max_keys: int):
+    limiter = MemoryTokenBucketLimiter(max_keys=max_keys)
+    for i in range(clients):
+        key = f"requests:10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+        for _ in range(requests):
+            limiter.hit(key, 60, 60)
+    return limiter
+
+def measure(fill, *args) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    table = fill(*args)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(table), current
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=1_000_000)
+    parser.add_argument("--requests-per-client", type=int, default=5)
+    parser.add_argument("--max-keys", type=int, default=100_000)
+    args = parser.parse_args()
+
+    runs = {
+        "legacy": (legacy_fill, args.clients, args.requests_per_client),
+        "bucket (sınırsız)": (bucket_fill, args.clients, args.requests_per_client, args.clients),
+        f"bucket (max_keys={args.max_keys})": (bucket_fill, args.clients, args.requests_per_client, args.max_keys),
+    }
+    for name, (fill, *fill_args) in runs.items():
+        keys, used = measure(fill, *fill_args)
+        print(f"{name:26} keys={keys:>9} total={used / 2**20:8.1f} MiB per key={used / max(keys, 1):6.0f} B")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Rate limit middleware benchmark'ı: boş bir endpoint'e saniyedeki istek sayısı.
+Middleware'siz, eski BaseHTTPMiddleware tabanlı limiter ve saf ASGI RateLimitMiddleware
+aynı süreçte (ağ yok, httpx ASGITransport) karşılaştırılır. Limiter'lar bellek modunda.
+
+    python scripts/bench_middleware.py --requests 20000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+# Redis'e bağlanılmaz: iki limiter da süreç içi tabloyla çalışır
+os.environ.setdefault("REDIS_IN_MEMORY", "true")
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.middleware import rate_limit
+from app.middleware.rate_limit import RateLimitMiddleware
+
+LIMIT = 10**9
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    """Eski RateLimitMiddleware'in bellek yolu (istek başına zaman listesi)"""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.memory_storage = defaultdict(list)
+
+    async def dispatch(self, request: Request, call_next):
+        key = request.client.host if request.client else "unknown"
+        now = time.time()
+        # Liste 1000 kayıtla sınırlı: ölçülen fark listenin büyümesi değil middleware mekanizması olsun
+        self.memory_storage[key] = [t for t in self.memory_storage[key] if now - t < 60][-1000:]
+        if len(self.memory_storage[key]) >= LIMIT:
+            raise HTTPException(status_code=429)
+        self.memory_storage[key].append(now)
+        response = await call_next(request)
+        response.headers["X-RateLimit-Limit"] = str(LIMIT)
+        response.headers["X-RateLimit-Remaining"] = str(LIMIT - len(self.memory_storage[key]))
+        response.headers["X-RateLimit-Reset"] = "60"
+        return response
+
+def make_app(middleware) -> FastAPI:
+    app = FastAPI()
+    if middleware is not None:
+        app.add_middleware(middleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+async def run(app: FastAPI, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        queue = iter(range(requests))
+
+        async def worker():
+            for _ in queue:
+                response = await client.get("/ping")
+                assert response.status_code == 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    rate_limit.QUOTAS["requests"] = (LIMIT, LIMIT, 60)
+    stacks = {
+        "none": None,
+        "BaseHTTPMiddleware (eski)": LegacyRateLimitMiddleware,
+        "saf ASGI (yeni)": RateLimitMiddleware,
+    }
+    for name, middleware in stacks.items():
+        rate = asyncio.run(run(make_app(middleware), args.requests, args.concurrency))
+        print(f"{name:28} req/s={rate:8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Offset ve keyset (cursor) sayfalama karşılaştırması: derin sayfalarda sorgu süresi.
+Geçici bir tabloya satır doldurulur, (created_at, id) index'i ile aynı sorgu iki yolla okunur.
+Sorgular app.utils.pagination.keyset_page ile üretilir.
+
+    BENCH_DATABASE_URL=postgresql://... python scripts/bench_pagination.py --rows 1000000 --pages 1,100,1000,10000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, create_engine, select, text
+from sqlalchemy.orm import Session, declarative_base
+
+from app.utils.pagination import encode_cursor, keyset_page
+
+Base = declarative_base()
+
+class BenchRow(Base):
+    __tablename__ = "bench_pagination"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    payload = Column(String, nullable=False)
+
+    __table_args__ = (Index("idx_bench_pagination_created_id", "created_at", "id"),)
+
+def fill(engine, rows: int):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        # Her 10 satır aynı zamanı paylaşır: id ile ayrım da ölçülsün
+        conn.execute(text(
+            "INSERT INTO bench_pagination (created_at, payload) "
+            "SELECT now() - (g / 10) * interval '1 second', md5(g::text) FROM generate_series(1, :rows) g"
+        ), {"rows": rows})
+        conn.execute(text("ANALYZE bench_pagination"))
+
+def timed(db: Session, query, repeat: int) -> tuple:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = db.scalars(query).all()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--pages", default="1,100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("BENCH_DATABASE_URL ayarlı değil")
+
+    engine = create_engine(url)
+    fill(engine, args.rows)
+    base = select(BenchRow)
+    try:
+        with Session(engine) as db:
+            for page in (int(p) for p in args.pages.split(",")):
+                skip = (page - 1) * args.limit
+                if skip >= args.rows:
+                    continue
+                offset_time, rows = timed(db, keyset_page(base, BenchRow, None, args.limit, skip), args.repeat)
+                # Cursor bir önceki sayfanın son satırı: istemcinin X-Next-Cursor ile yaptığı gibi
+                previous = db.scalars(keyset_page(base, BenchRow, None, 0, skip - 1)).first() if skip else None
+                cursor = encode_cursor(previous.created_at, previous.id) if previous else None
+                keyset_time, keyset_rows = timed(db, keyset_page(base, BenchRow, cursor, args.limit), args.repeat)
+                assert [r.id for r in keyset_rows] == [r.id for r in rows]
+                print(f"page={page:>6} offset={offset_time * 1000:8.2f} ms keyset={keyset_time * 1000:8.2f} ms")
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Şifre doğrulama benchmark'ı: süreç havuzu boyutuna göre saniyedeki login (verify) sayısı
+ve bu sırada event loop gecikmesi. Ayarlar .env'den okunur (BCRYPT_ROUNDS).
+
+    python scripts/bench_password_hasher.py --workers 1 2 4 --logins 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.config import settings
+from app.services.password_hasher import PasswordHasher, pwd_context
+
+async def loop_lag(stop: asyncio.Event, samples: list):
+    """Event loop'un 10 ms'lik uykudan ne kadar geç uyandığı"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        samples.append((time.perf_counter() - started - 0.01) * 1000)
+
+async def run(workers: int, logins: int, concurrency: int, hashed: str) -> tuple:
+    hasher = PasswordHasher(workers=workers, max_pending=concurrency)
+    # Süreçlerin açılışı ölçüme girmesin
+    await asyncio.gather(*(hasher.verify_and_update("sifre", hashed) for _ in range(workers)))
+
+    stop, lag = asyncio.Event(), []
+    ticker = asyncio.create_task(loop_lag(stop, lag))
+    queue = iter(range(logins))
+
+    async def client():
+        for _ in queue:
+            valid, _ = await hasher.verify_and_update("sifre", hashed)
+            assert valid
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    hasher.shutdown()
+    return logins / elapsed, max(lag, default=0.0)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, os.cpu_count() or 1])
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    hashed = pwd_context.hash("sifre")
+    print(f"bcrypt rounds={settings.BCRYPT_ROUNDS} cpu={os.cpu_count()}")
+    for workers in args.workers:
+        rate, lag = asyncio.run(run(workers, args.logins, args.concurrency, hashed))
+        print(f"workers={workers:<3} logins/s={rate:7.1f} per worker={rate / workers:6.1f} max loop lag={lag:.1f}ms")
+
+if __name__ == "__main__":
+    main()
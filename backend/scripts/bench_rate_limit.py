@@ -0,0 +1,84 @@
+"""
+Rate limiter benchmark'ı: eski GET/SETEX/INCR uygulaması, atomik GCRA script'i ve
+hybrid (yerel dilim + Redis) limiter.
+Eşzamanlı istemciler aynı anahtarlara istek atar; saniyedeki kontrol sayısı ve
+limitin üzerinde izin verilen istek sayısı (yarış) raporlanır.
+
+    BENCH_REDIS_URL=redis://localhost:6379/15 python scripts/bench_rate_limit.py --concurrency 500
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import redis
+
+from app.middleware.limiters import RedisGCRALimiter, HybridLimiter
+
+class LegacyLimiter:
+    """Eski RateLimitMiddleware._check_rate_limit_redis (bloklayan istemci, atomik değil)"""
+
+    def __init__(self, url: str):
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+
+    async def hit(self, key: str, limit: int, window: int, cost: int = 1):
+        current = self.client.get(key)
+        if current is None:
+            self.client.setex(key, window, 1)
+            return True, limit - 1
+        current_count = int(current)
+        if current_count >= limit:
+            return False, self.client.ttl(key)
+        self.client.incr(key)
+        return True, limit - (current_count + 1)
+
+    async def close(self):
+        self.client.close()
+
+def make_limiter(mode: str, url: str):
+    if mode == "legacy":
+        return LegacyLimiter(url)
+    if mode == "hybrid":
+        return HybridLimiter(url, max_connections=50, slice_ratio=0.1, sync_ms=1000, max_keys=100_000)
+    return RedisGCRALimiter(url, max_connections=50)
+
+async def run(mode: str, url: str, concurrency: int, requests: int, clients: int, limit: int) -> tuple:
+    redis.Redis.from_url(url).flushdb()
+    limiter = make_limiter(mode, url)
+    queue = iter(range(requests))
+    allowed = [0]
+
+    async def worker():
+        for i in queue:
+            result = await limiter.hit(f"bench:{i % clients}", limit, 60)
+            if result is None:
+                raise RuntimeError("Redis hatası")
+            allowed[0] += result[0]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await limiter.close()
+    return requests / elapsed, allowed[0] - min(requests, clients * limit)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", nargs="+", default=["legacy", "gcra", "hybrid"])
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=60)
+    args = parser.parse_args()
+
+    url = os.getenv("BENCH_REDIS_URL")
+    if not url:
+        sys.exit("BENCH_REDIS_URL ayarlı değil (veritabanı boşaltılır)")
+    for mode in args.modes:
+        rate, over = asyncio.run(run(mode, url, args.concurrency, args.requests, args.clients, args.limit))
+        print(f"{mode:8} checks/s={rate:9.1f} over-admitted={over}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Mesaj arama benchmark'ı: GIN/tsvector araması ile index'siz ILIKE taramasını karşılaştırır.
+Tek kullanımlık bir PostgreSQL veritabanı gerekir (tablolar silinip yeniden oluşturulur).
+
+    BENCH_DATABASE_URL=postgresql://... python scripts/bench_search.py --messages 200000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, text
+
+import app.models  # noqa: F401 (tüm tablolar metadata'ya kaydolsun)
+from app.core.database import Base
+from app.models.message import ensure_search_schema
+
+WORDS = ["ödev", "sınav", "proje", "kitap", "ders", "matematik", "fizik", "toplantı", "yarın", "bugün"]
+
+QUERIES = {
+    "tsvector": "SELECT id FROM messages WHERE search_vector @@ websearch_to_tsquery('simple', :q) "
+                "AND (sender_id = 1 OR receiver_id = 1) ORDER BY ts_rank_cd(search_vector, websearch_to_tsquery('simple', :q)) DESC LIMIT 20",
+    "ilike": "SELECT id FROM messages WHERE content ILIKE '%' || :q || '%' "
+             "AND (sender_id = 1 OR receiver_id = 1) ORDER BY id DESC LIMIT 20",
+}
+
+def seed(engine, messages: int, users: int):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    ensure_search_schema(engine)
+    words = "ARRAY[" + ", ".join(f"'{w}'" for w in WORDS) + "]"
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            INSERT INTO users (email, username, hashed_password, is_active, role, subscription_tier)
+            SELECT 'user' || g || '@example.com', 'user' || g, 'x', true, 'student', 'free'
+            FROM generate_series(1, {users}) g
+        """))
+        conn.execute(text(f"""
+            INSERT INTO messages (sender_id, receiver_id, content, message_type, is_read, created_at)
+            SELECT 1 + g % {users}, 1 + (g * 7) % {users},
+                   ({words})[1 + g % 10] || ' ' || ({words})[1 + (g / 10) % 10] || ' mesaj ' || g,
+                   'text', true, now() - g * interval '1 second'
+            FROM generate_series(1, {messages}) g
+        """))
+        conn.execute(text("ANALYZE messages"))
+
+def timed(engine, sql: str, runs: int) -> list:
+    samples = []
+    with engine.connect() as conn:
+        for i in range(runs):
+            started = time.perf_counter()
+            conn.execute(text(sql), {"q": WORDS[i % len(WORDS)]}).all()
+            samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("BENCH_DATABASE_URL ayarlı değil")
+    engine = create_engine(url)
+    seed(engine, args.messages, args.users)
+
+    for name, sql in QUERIES.items():
+        samples = sorted(timed(engine, sql, args.runs))
+        p95 = samples[int(len(samples) * 0.95) - 1]
+        print(f"{name:10} median={statistics.median(samples):.2f}ms p95={p95:.2f}ms")
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
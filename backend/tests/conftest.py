@@ -0,0 +1,105 @@
+import os
+
+# Ayarlar import sırasında okunur; testler gerçek servislere bağlanmaz
+for _key, _value in {
+    "POSTGRES_SERVER": "localhost",
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "POSTGRES_DB": "test",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "REDIS_IN_MEMORY": "true",
+    "SECRET_KEY": "test-secret",
+    "OPENROUTER_API_KEY": "test",
+    # Bütçesini aşan endpoint testte hata verir
+    "QUERY_BUDGET_STRICT": "true",
+}.items():
+    os.environ.setdefault(_key, _value)
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+import app.models  # noqa: F401 (tüm tablolar metadata'ya kaydolsun)
+# Router'lar deps'ten önce yüklenmeli (deps -> endpoints.auth -> v1 döngüsü)
+from app.api.v1.endpoints import chat, friends, rooms
+from app.api import deps
+from app.core import database
+from app.core.database import Base
+from app.core.redis import set_redis, InMemoryRedis
+from app.middleware import QueryStatsMiddleware
+from app.models.user import User
+from app.schemas.user import UserSnapshot
+from app.services import (
+    block_graph as block_graph_module, counters as counters_module, session_store as session_store_module
+)
+from app.services.block_graph import block_graph
+
+USERNAMES = ("alice", "bob", "carol", "dave")
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """Test başına boş SQLite veritabanı; servislerin açtığı oturumlar da buna gider"""
+    path = tmp_path / "test.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(sync_engine)
+    session_factory = sessionmaker(bind=sync_engine, autoflush=False)
+    for module in (block_graph_module, counters_module, session_store_module):
+        monkeypatch.setattr(module, "SessionLocal", session_factory)
+    set_redis(InMemoryRedis())
+    block_graph._cache.clear()
+    yield sync_engine
+    sync_engine.dispose()
+
+@pytest.fixture
+def users(engine):
+    """id -> kullanıcı görüntüsü"""
+    with Session(engine) as db:
+        for name in USERNAMES:
+            db.add(User(username=name, email=f"{name}@example.com", hashed_password="x"))
+        db.commit()
+        return {u.id: UserSnapshot.model_validate(u) for u in db.query(User)}
+
+@pytest.fixture
+def async_session(engine):
+    """Aynı SQLite dosyasına AsyncSession fabrikası"""
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{engine.url.database}")
+    return async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+@pytest.fixture
+def api(engine, users, async_session):
+    """
+    chat/friends/rooms router'larıyla test istemcisi (sorgu bütçeleri zorunlu).
+    api.login(user_id) sonraki isteklerin kullanıcısını değiştirir.
+    """
+    sync_session = sessionmaker(bind=engine, autoflush=False)
+
+    def get_db():
+        with sync_session() as db:
+            yield db
+
+    async def get_async_db():
+        async with async_session() as db:
+            yield db
+
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+    app.include_router(chat.router, prefix="/chats")
+    app.include_router(friends.router, prefix="/friends")
+    app.include_router(rooms.router, prefix="/rooms")
+    current = {}
+    app.dependency_overrides.update({
+        database.get_db: get_db,
+        database.get_read_db: get_db,
+        database.get_async_db: get_async_db,
+        database.get_async_read_db: get_async_db,
+        deps.get_current_user: lambda: users[current["id"]],
+    })
+
+    client = TestClient(app)
+    client.login = lambda user_id: current.update(id=user_id)
+    client.login(1)
+    yield client
+    client.close()
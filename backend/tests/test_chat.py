@@ -0,0 +1,148 @@
+import asyncio
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+from app.api.v1.endpoints.chat import _highlight, HIGHLIGHT_START, HIGHLIGHT_STOP
+from app.models.conversation import Conversation
+from app.models.message import Message, ensure_search_schema
+from app.services.conversation_service import ConversationService
+
+def send(api, sender_id, receiver_id, content):
+    api.login(sender_id)
+    response = api.post(f"/chats/{receiver_id}", json={"content": content})
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+def contents(response):
+    return [m["content"] for m in response.json()]
+
+def test_history_id_pages(api):
+    ids = [send(api, 1 if i % 2 else 2, 2 if i % 2 else 1, f"m{i}") for i in range(5)]
+    send(api, 1, 3, "other chat")
+    api.login(1)
+
+    page = api.get("/chats/2", params={"before_id": ids[4], "limit": 2})
+    assert contents(page) == ["m2", "m3"]
+    assert page.headers["X-Has-More"] == "true"
+
+    page = api.get("/chats/2", params={"before_id": ids[2], "limit": 2})
+    assert contents(page) == ["m0", "m1"]
+    assert page.headers["X-Has-More"] == "false"
+
+    page = api.get("/chats/2", params={"after_id": ids[1], "limit": 2})
+    assert contents(page) == ["m2", "m3"]
+    assert page.headers["X-Has-More"] == "true"
+
+def test_history_since_id(api):
+    ids = [send(api, 2, 1, f"m{i}") for i in range(3)]
+    api.login(1)
+
+    assert contents(api.get("/chats/2", params={"since_id": ids[0]})) == ["m1", "m2"]
+    page = api.get("/chats/2", params={"since_id": ids[-1]})
+    assert page.json() == []
+    assert page.headers["X-Has-More"] == "false"
+    # since_id=0: son sayfa
+    assert contents(api.get("/chats/2", params={"since_id": 0, "limit": 2})) == ["m1", "m2"]
+
+def test_chat_list_unread_counts(api):
+    send(api, 1, 2, "a->b")
+    send(api, 2, 1, "b->a 1")
+    send(api, 2, 1, "b->a 2")
+    send(api, 3, 1, "c->a")
+    api.login(1)
+
+    chats = api.get("/chats/").json()
+    assert [(c["user"]["username"], c["last_message"], c["unread_count"]) for c in chats] == [
+        ("carol", "c->a", 1),
+        ("bob", "b->a 2", 2),
+    ]
+    assert api.get("/chats/unread/count").json() == {"count": 3}
+
+def test_mark_conversation_read_up_to_id(api):
+    ids = [send(api, 2, 1, f"m{i}") for i in range(4)]
+    send(api, 1, 2, "mine")
+    api.login(1)
+
+    result = api.put("/chats/2/read", params={"up_to_id": ids[1]}).json()
+    assert result == {"message_ids": ids[:2], "count": 2}
+    assert api.get("/chats/unread/count").json() == {"count": 2}
+
+    assert api.put("/chats/2/read").json() == {"message_ids": ids[2:], "count": 2}
+    assert api.put("/chats/2/read").json() == {"message_ids": [], "count": 0}
+    assert api.get("/chats/").json()[0]["unread_count"] == 0
+    assert api.get("/chats/unread/count").json() == {"count": 0}
+
+def test_mark_conversation_read_includes_null_is_read(api, engine):
+    ids = [send(api, 2, 1, f"m{i}") for i in range(2)]
+    with Session(engine) as db:
+        db.execute(update(Message).where(Message.id == ids[0]).values(is_read=None))
+        db.commit()
+    api.login(1)
+
+    assert api.get("/chats/unread/count").json() == {"count": 2}
+    assert api.put("/chats/2/read").json()["message_ids"] == ids
+    assert api.get("/chats/unread/count").json() == {"count": 0}
+
+def test_mark_single_message_read_once(api, engine):
+    ids = [send(api, 2, 1, f"m{i}") for i in range(2)]
+    api.login(1)
+
+    assert api.put(f"/chats/read/{ids[0]}").status_code == 200
+    assert api.put(f"/chats/read/{ids[0]}").status_code == 200
+    assert api.get("/chats/unread/count").json() == {"count": 1}
+    assert api.get("/chats/").json()[0]["unread_count"] == 1
+    with Session(engine) as db:
+        assert db.get(Message, ids[0]).read_at is not None
+    assert api.put("/chats/read/999999").status_code == 404
+    api.login(2)
+    assert api.put(f"/chats/read/{ids[1]}").status_code == 404
+
+def test_blocked_user_hidden_from_chat(api):
+    send(api, 2, 1, "hello")
+    api.login(1)
+    assert api.post("/friends/block/2").status_code == 200
+
+    assert api.get("/chats/").json() == []
+    assert api.get("/chats/2").status_code == 403
+    api.login(2)
+    assert api.post("/chats/1", json={"content": "again"}).status_code == 403
+
+    api.login(1)
+    assert api.post("/friends/unblock/2").status_code == 200
+    assert [c["user"]["username"] for c in api.get("/chats/").json()] == ["bob"]
+
+def test_search_highlight_escapes_html():
+    headline = f"<script>x</script> {HIGHLIGHT_START}kedi{HIGHLIGHT_STOP} & köpek"
+    assert _highlight(headline) == "&lt;script&gt;x&lt;/script&gt; <mark>kedi</mark> &amp; köpek"
+
+def test_history_since_id_without_summary_row(api, engine):
+    ids = [send(api, 2, 1, f"m{i}") for i in range(3)]
+    with Session(engine) as db:
+        db.execute(delete(Conversation))
+        db.commit()
+    api.login(1)
+
+    assert contents(api.get("/chats/2", params={"since_id": ids[0]})) == ["m1", "m2"]
+
+def test_backfill_if_empty_rebuilds_summary_once(api, engine, async_session):
+    send(api, 1, 2, "a->b")
+    send(api, 2, 1, "b->a")
+    send(api, 3, 1, "c->a")
+    with Session(engine) as db:
+        db.execute(delete(Conversation))
+        db.commit()
+
+    async def backfill():
+        async with async_session() as db:
+            return await ConversationService.backfill_if_empty(db)
+
+    assert asyncio.run(backfill()) is True
+    assert asyncio.run(backfill()) is False
+    api.login(1)
+    chats = api.get("/chats/").json()
+    assert [(c["user"]["username"], c["last_message"], c["unread_count"]) for c in chats] == [
+        ("carol", "c->a", 1),
+        ("bob", "b->a", 1),
+    ]
+
+def test_ensure_search_schema_noop_outside_postgres(engine):
+    assert ensure_search_schema(engine) is False
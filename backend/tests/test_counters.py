@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.core.redis import get_redis
+from app.models.notification import Notification
+from app.services.counters import user_counters, COUNTERS_KEY, MESSAGES, NOTIFICATIONS, FRIEND_REQUESTS
+from app.services.notification_service import NotificationService
+
+def run(async_session, fn, *args):
+    async def call():
+        async with async_session() as db:
+            return await fn(db, *args)
+    return asyncio.run(call())
+
+@pytest.fixture
+def notify(users, async_session):
+    def create(user_id, title="t"):
+        return run(async_session, NotificationService.create_notification, user_id, "system", title, "b").id
+    return create
+
+def test_get_loads_from_sql_then_uses_hash(engine, users):
+    with Session(engine) as db:
+        db.add_all([Notification(user_id=1, type="system", title="t", body="b") for _ in range(2)])
+        db.commit()
+
+    assert user_counters.get(1) == {MESSAGES: 0, NOTIFICATIONS: 2, FRIEND_REQUESTS: 0}
+    user_counters.incr(1, MESSAGES, 3)
+    user_counters.incr(1, NOTIFICATIONS, -5)
+    # Negatif kaymalar sıfırda kesilir
+    assert user_counters.get(1) == {MESSAGES: 3, NOTIFICATIONS: 0, FRIEND_REQUESTS: 0}
+
+def test_reconcile_rewrites_drift(engine, users):
+    user_counters.get(1)
+    user_counters.incr(1, MESSAGES, 7)
+
+    assert user_counters.reconcile() == 1
+    assert user_counters.get(1)[MESSAGES] == 0
+    assert user_counters.reconcile() == 1
+    # Okunmayan kullanıcılar uzlaştırılmaz
+    assert user_counters.reconcile() == 0
+
+def test_incr_many(engine, users):
+    user_counters.get(1)
+    user_counters.get(2)
+    user_counters.incr_many(FRIEND_REQUESTS, {1: 2, 2: 1, 3: 0})
+    assert user_counters.get(1)[FRIEND_REQUESTS] == 2
+    assert user_counters.get(2)[FRIEND_REQUESTS] == 1
+    assert not get_redis().exists(COUNTERS_KEY.format(user_id=3))
+
+def test_notification_mark_as_read_decrements_once(users, async_session, notify):
+    notification_id = notify(1)
+    assert user_counters.get(1)[NOTIFICATIONS] == 1
+
+    async def both():
+        async with async_session() as a, async_session() as b:
+            return await asyncio.gather(
+                NotificationService.mark_as_read(a, notification_id, 1),
+                NotificationService.mark_as_read(b, notification_id, 1),
+            )
+
+    results = asyncio.run(both())
+    assert all(n is not None and n.is_read for n in results)
+    assert user_counters.get(1)[NOTIFICATIONS] == 0
+    assert run(async_session, NotificationService.mark_as_read, notification_id, 2) is None
+
+def test_notification_delete_decrements_only_unread(engine, users, async_session, notify):
+    unread, read = notify(1), notify(1)
+    with Session(engine) as db:
+        db.execute(update(Notification).where(Notification.id == read).values(is_read=True))
+        db.commit()
+    user_counters.reconcile()
+    assert user_counters.get(1)[NOTIFICATIONS] == 1
+
+    assert run(async_session, NotificationService.delete_notification, read, 1) is True
+    assert user_counters.get(1)[NOTIFICATIONS] == 1
+    assert run(async_session, NotificationService.delete_notification, unread, 2) is False
+    assert run(async_session, NotificationService.delete_notification, unread, 1) is True
+    assert run(async_session, NotificationService.delete_notification, unread, 1) is False
+    assert user_counters.get(1)[NOTIFICATIONS] == 0
+
+def test_mark_all_as_read(users, async_session, notify):
+    notify(1), notify(1), notify(2)
+    assert run(async_session, NotificationService.mark_all_as_read, 1) == 2
+    assert user_counters.get(1)[NOTIFICATIONS] == 0
+    assert user_counters.get(2)[NOTIFICATIONS] == 1
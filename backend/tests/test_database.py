@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from sqlalchemy import Column, MetaData, String, Table, create_engine, select, text
+from sqlalchemy.orm import Session, sessionmaker
+from app.core import database
+from app.core.database import (
+    RoutingSession, WriteTracker, _async_url, current_user_id, recent_write, write_tracker
+)
+from app.models.user import User
+
+def test_async_url():
+    assert _async_url("postgresql://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+    assert _async_url("sqlite:////tmp/test.db") == "sqlite+aiosqlite:////tmp/test.db"
+    assert _async_url("postgresql+asyncpg://db/app") == "postgresql+asyncpg://db/app"
+
+@pytest.fixture
+def routing(tmp_path, engine):
+    """Primary ve replika ayrı SQLite dosyaları; hangisinden okunduğu 'where' satırından belli"""
+    engines = {}
+    for name in ("primary", "replica"):
+        db_engine = create_engine(f"sqlite:///{tmp_path / name}.db")
+        with db_engine.begin() as conn:
+            conn.execute(text("CREATE TABLE node (name TEXT)"))
+            conn.execute(text("INSERT INTO node VALUES (:name)"), {"name": name})
+        engines[name] = db_engine
+
+    class TestRoutingSession(RoutingSession):
+        primary_engine = engines["primary"]
+        replicas = [engines["replica"]]
+
+    token = current_user_id.set(None)
+    yield sessionmaker(class_=TestRoutingSession)
+    current_user_id.reset(token)
+    recent_write.set(None)
+    for db_engine in engines.values():
+        db_engine.dispose()
+
+NODE = Table("node", MetaData(), Column("name", String))
+
+def where(db) -> str:
+    return db.execute(select(NODE.c.name)).scalar()
+
+def test_reads_go_to_replica_and_writes_stick_to_primary(routing):
+    with routing() as db:
+        assert where(db) == "replica"
+    # Ham SQL'in okuma olduğu bilinmez: primary'ye gider
+    with routing() as db:
+        assert db.execute(text("SELECT name FROM node")).scalar() == "primary"
+    with routing() as db:
+        db.execute(NODE.insert().values(name="x"))
+        assert where(db) == "primary"
+
+def test_recent_writer_reads_from_primary(routing):
+    current_user_id.set(1)
+    with routing() as db:
+        assert where(db) == "replica"
+
+    write_tracker.mark(1)
+    with routing() as db:
+        assert where(db) == "primary"
+    current_user_id.set(2)
+    with routing() as db:
+        assert where(db) == "replica"
+
+def test_write_window_shared_through_redis(engine):
+    tracker = WriteTracker(window_seconds=5)
+    other_worker = WriteTracker(window_seconds=5)
+    tracker.mark(1)
+
+    assert other_worker.recently_wrote(1)
+    assert not other_worker.recently_wrote_local(1)
+    assert asyncio.run(other_worker.recently_wrote_async(1))
+    assert not other_worker.recently_wrote(2)
+
+def test_commit_marks_request_user(engine, monkeypatch):
+    monkeypatch.setattr(database, "REPLICA_URLS", ["postgresql://replica/app"])
+    token = current_user_id.set(3)
+    try:
+        with Session(engine) as db:
+            db.add(User(username="erin", email="erin@example.com", hashed_password="x"))
+            db.commit()
+        assert write_tracker.recently_wrote(3)
+        with Session(engine) as db:
+            db.query(User).all()
+            db.commit()
+        # Sadece okuyan session yazma işareti bırakmaz
+        current_user_id.set(4)
+        assert not write_tracker.recently_wrote(4)
+    finally:
+        current_user_id.reset(token)
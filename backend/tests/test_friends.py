@@ -0,0 +1,79 @@
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.models.user import User
+
+def request_ids(response):
+    return [(r["id"], r["user"]["username"]) for r in response.json()]
+
+def test_request_accept_flow(api):
+    assert api.post("/friends/request/2").status_code == 201
+    assert api.post("/friends/request/2").status_code == 400
+    assert api.get("/friends/status/2").json()["status"] == "pending_sent"
+
+    api.login(2)
+    [(request_id, username)] = request_ids(api.get("/friends/requests"))
+    assert username == "alice"
+    assert api.get("/friends/status/1").json()["status"] == "pending_received"
+    assert api.post(f"/friends/accept/{request_id}").status_code == 200
+
+    assert api.get("/friends/requests").json() == []
+    assert [f["user"]["username"] for f in api.get("/friends/").json()] == ["alice"]
+    api.login(1)
+    assert [f["user"]["username"] for f in api.get("/friends/").json()] == ["bob"]
+    assert api.get("/friends/status/2").json() == {"status": "friends", "friendship_id": request_id}
+
+def test_sent_and_rejected_requests(api):
+    api.post("/friends/request/2")
+    api.post("/friends/request/3")
+    assert [u for _, u in request_ids(api.get("/friends/requests/sent"))] == ["bob", "carol"]
+
+    api.login(3)
+    [(request_id, _)] = request_ids(api.get("/friends/requests"))
+    assert api.post(f"/friends/reject/{request_id}").status_code == 200
+    assert api.post(f"/friends/accept/{request_id}").status_code == 404
+
+    api.login(1)
+    assert [u for _, u in request_ids(api.get("/friends/requests/sent"))] == ["bob"]
+    assert api.get("/friends/").json() == []
+
+def test_block_status_both_directions(api):
+    api.post("/friends/request/2")
+    assert api.post("/friends/block/2").status_code == 200
+    assert api.post("/friends/block/2").status_code == 400
+
+    assert api.get("/friends/status/2").json()["status"] == "blocked_by_me"
+    api.login(2)
+    assert api.get("/friends/status/1").json()["status"] == "blocked_me"
+    # Engellenince bekleyen istek de silinir
+    assert api.get("/friends/requests").json() == []
+    assert api.post("/friends/request/1").status_code == 400
+
+    api.login(1)
+    assert api.post("/friends/unblock/2").status_code == 200
+    assert api.post("/friends/unblock/2").status_code == 404
+    assert api.get("/friends/status/2").json()["status"] == "none"
+
+def test_request_lists_and_search_within_query_budget(api, engine):
+    # Bütçe (QUERY_BUDGET_STRICT) satır sayısından bağımsız olmalı: satır başına sorgu yok
+    for sender in (2, 3, 4):
+        api.login(sender)
+        assert api.post("/friends/request/1").status_code == 201
+    api.login(1)
+    requests = request_ids(api.get("/friends/requests"))
+    assert [u for _, u in requests] == ["bob", "carol", "dave"]
+    assert api.post(f"/friends/accept/{requests[0][0]}").status_code == 200
+    api.login(2)
+    assert request_ids(api.get("/friends/requests/sent")) == []
+    api.login(3)
+    assert [u for _, u in request_ids(api.get("/friends/requests/sent"))] == ["alice"]
+    assert api.post("/friends/block/4").status_code == 200
+
+    with Session(engine) as db:
+        db.execute(update(User).values(full_name="Test " + User.username))
+        db.commit()
+    api.login(1)
+    found = {r["user"]["username"]: (r["friendship_status"], r["is_blocked"]) for r in api.get("/friends/search", params={"q": "test"}).json()}
+    assert found == {"bob": ("accepted", False), "carol": ("pending", False), "dave": ("pending", False)}
+    api.login(3)
+    found = {r["user"]["username"]: (r["friendship_status"], r["is_blocked"]) for r in api.get("/friends/search", params={"q": "test"}).json()}
+    assert found == {"alice": ("pending", False), "bob": (None, False), "dave": (None, True)}
@@ -0,0 +1,155 @@
+import asyncio
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from redis.exceptions import ConnectionError as RedisConnectionError
+from app.middleware import limiters as limiters_module
+from app.middleware.limiters import (
+    GCRA_SCRIPT, LEASE_SCRIPT, REFUND_SCRIPT, HybridLimiter, MemoryTokenBucketLimiter, RedisGCRALimiter
+)
+
+@pytest.fixture
+def server():
+    return FakeServer()
+
+def gcra(server) -> RedisGCRALimiter:
+    """Lua script'leri fakeredis üzerinde çalışan limiter (bağlantı havuzu hiç açılmaz)"""
+    limiter = RedisGCRALimiter("redis://localhost:6379/0", max_connections=4)
+    limiter._client = FakeRedis(server=server)
+    limiter._script = limiter._client.register_script(GCRA_SCRIPT)
+    return limiter
+
+def hits(limiter, n, key="k", limit=5, window=60, cost=1):
+    async def run():
+        return [await limiter.hit(key, limit, window, cost) for _ in range(n)]
+    return asyncio.run(run())
+
+def test_gcra_allows_limit_then_rejects(server):
+    results = hits(gcra(server), 6)
+
+    assert results[:5] == [(True, 4), (True, 3), (True, 2), (True, 1), (True, 0)]
+    allowed, wait = results[5]
+    # 60 sn'de 5 istek: bir sonraki hak ~12 sn sonra
+    assert not allowed and 11 <= wait <= 12
+
+def test_gcra_cost_and_keys(server):
+    limiter = gcra(server)
+    assert hits(limiter, 1, cost=4) == [(True, 1)]
+    assert hits(limiter, 1, cost=2)[0][0] is False
+    assert hits(limiter, 1, key="other") == [(True, 4)]
+
+def test_gcra_is_atomic_across_workers(server):
+    # Aynı Redis'i paylaşan iki worker'dan eşzamanlı 100 istek: tam limit kadarı geçer
+    workers = [gcra(server), gcra(server)]
+
+    async def run():
+        return await asyncio.gather(*(workers[i % 2].hit("k", 10, 60) for i in range(100)))
+
+    assert sum(allowed for allowed, _ in asyncio.run(run())) == 10
+
+def test_gcra_disables_itself_on_redis_error(server):
+    limiter = gcra(server)
+
+    async def broken(*args, **kwargs):
+        raise RedisConnectionError("down")
+
+    limiter._script = broken
+    assert hits(limiter, 1) == [None]
+    assert not limiter.available
+    # Devre dışıyken Redis'e hiç gidilmez
+    limiter._script = limiter._client.register_script(GCRA_SCRIPT)
+    assert hits(limiter, 1) == [None]
+    limiter._disabled_until = 0
+    assert hits(limiter, 1) == [(True, 4)]
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(limiters_module.time, "monotonic", lambda: now[0])
+    return now
+
+def test_token_bucket_refills_over_time(clock):
+    limiter = MemoryTokenBucketLimiter(max_keys=10)
+    assert [limiter.hit("k", 3, 60)[0] for _ in range(4)] == [True, True, True, False]
+    assert limiter.hit("k", 3, 60) == (False, 20)
+
+    clock[0] += 20
+    assert limiter.hit("k", 3, 60) == (True, 0)
+    clock[0] += 600
+    # Boşta kalan bucket limitin üstüne dolmaz
+    assert limiter.hit("k", 3, 60) == (True, 2)
+    assert limiter.hit("k", 3, 60, cost=5) == (False, 60)
+
+def test_token_bucket_evicts_least_recently_used(clock):
+    limiter = MemoryTokenBucketLimiter(max_keys=2)
+    limiter.hit("a", 1, 60)
+    limiter.hit("b", 1, 60)
+    limiter.hit("a", 1, 60)
+    limiter.hit("c", 1, 60)
+
+    assert len(limiter) == 2
+    assert limiter.hit("a", 1, 60)[0] is False
+    # "b" atıldı: yeni (dolu) bucket ile başlar
+    assert limiter.hit("b", 1, 60)[0] is True
+
+def hybrid(server, slice_ratio=0.25, sync_ms=60000, max_keys=100) -> HybridLimiter:
+    limiter = HybridLimiter("redis://localhost:6379/0", max_connections=4, slice_ratio=slice_ratio, sync_ms=sync_ms, max_keys=max_keys)
+    limiter._client = FakeRedis(server=server)
+    limiter._lease_script = limiter._client.register_script(LEASE_SCRIPT)
+    limiter._refund_script = limiter._client.register_script(REFUND_SCRIPT)
+    return limiter
+
+def count_calls(limiter, name):
+    calls = []
+    script = getattr(limiter, name)
+
+    async def counted(*args, **kwargs):
+        calls.append(kwargs)
+        return await script(*args, **kwargs)
+
+    setattr(limiter, name, counted)
+    return calls
+
+def test_hybrid_never_exceeds_global_limit(server):
+    workers = [hybrid(server), hybrid(server)]
+    leases = [count_calls(w, "_lease_script") for w in workers]
+
+    async def run():
+        results = []
+        for i in range(60):
+            results.append(await workers[i % 2].hit("k", 20, 60))
+            await asyncio.sleep(0)
+        return results
+
+    results = asyncio.run(run())
+    allowed = sum(allowed for allowed, _ in results)
+    # Dilimler önden ayrılır: limit aşılmaz, kayıp en fazla worker x dilim
+    assert 20 - 2 * 5 <= allowed <= 20
+    assert sum(len(calls) for calls in leases) < 20
+    assert all(wait >= 1 for allowed, wait in results if not allowed)
+
+def test_hybrid_refunds_unused_slice(server):
+    worker = hybrid(server, slice_ratio=0.5, sync_ms=0)
+    other = hybrid(server, slice_ratio=1.0)
+
+    async def run():
+        assert (await worker.hit("k", 10, 60))[0]
+        # Dilimin süresi doldu: sonraki istek kalan 4 hakkı iade edip yeni dilim alır
+        assert (await worker.hit("k", 10, 60))[0]
+        await asyncio.sleep(0.01)
+        worker._leases.clear()
+        return await other.hit("k", 10, 60)
+
+    allowed, remaining = asyncio.run(run())
+    assert allowed and remaining == 10 - 2 - 4 - 1
+
+def test_hybrid_evicts_idle_leases(server):
+    worker = hybrid(server, max_keys=2)
+
+    async def run():
+        for key in ("a", "b", "c"):
+            await worker.hit(key, 10, 60)
+        await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert list(worker._leases) == ["b", "c"]
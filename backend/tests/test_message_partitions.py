@@ -0,0 +1,86 @@
+"""
+Mesaj partition bakımı. PostgreSQL testleri TEST_DATABASE_URL ister
+(tek kullanımlık veritabanı: messages tablosu silinip yeniden oluşturulur); yoksa atlanır.
+"""
+import os
+from datetime import date
+import pytest
+from sqlalchemy import create_engine, text
+from app.services import message_partitions as partitions_module
+from app.services.message_partitions import (
+    ADVISORY_LOCK_ID, MessagePartitionManager, add_months, month_of, partition_name,
+)
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+ARCHIVE = "test_messages_archive"
+
+postgres = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL ayarlı değil (PostgreSQL gerekir)")
+
+def test_month_helpers():
+    assert add_months(date(2024, 11, 1), 1) == date(2024, 12, 1)
+    assert add_months(date(2024, 12, 1), 1) == date(2025, 1, 1)
+    assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+    assert add_months(date(2024, 3, 1), -27) == date(2021, 12, 1)
+    assert partition_name(date(2024, 3, 1)) == "messages_p202403"
+    assert month_of(partition_name(date(2024, 3, 1))) == date(2024, 3, 1)
+
+def test_noop_on_sqlite(engine, monkeypatch):
+    monkeypatch.setattr(partitions_module, "engine", engine)
+    manager = MessagePartitionManager(months_ahead=2, retention_months=1, archive_schema=ARCHIVE)
+    assert manager.run(date(2024, 3, 15)) == {"created": [], "archived": []}
+
+@pytest.fixture
+def pg_engine(monkeypatch):
+    engine = create_engine(TEST_DATABASE_URL)
+    drop = ["DROP TABLE IF EXISTS messages CASCADE", f"DROP SCHEMA IF EXISTS {ARCHIVE} CASCADE"]
+    with engine.begin() as conn:
+        for statement in drop:
+            conn.execute(text(statement))
+        conn.execute(text("""
+            CREATE TABLE messages (
+                id SERIAL, created_at TIMESTAMP WITH TIME ZONE NOT NULL, PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+        """))
+        for month in (date(2023, 12, 1), date(2024, 1, 1), date(2024, 2, 1)):
+            conn.execute(text(
+                f"CREATE TABLE {partition_name(month)} PARTITION OF messages "
+                f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+            ))
+        conn.execute(text("INSERT INTO messages (created_at) VALUES ('2023-12-10'), ('2024-02-10')"))
+    monkeypatch.setattr(partitions_module, "engine", engine)
+    yield engine
+    with engine.begin() as conn:
+        for statement in drop:
+            conn.execute(text(statement))
+    engine.dispose()
+
+def attached(engine):
+    with engine.connect() as conn:
+        return sorted(conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'messages'::regclass"
+        )).scalars())
+
+@postgres
+def test_creates_future_and_archives_old(pg_engine):
+    manager = MessagePartitionManager(months_ahead=2, retention_months=1, archive_schema=ARCHIVE)
+
+    result = manager.run(date(2024, 2, 20))
+    assert result == {"created": ["messages_p202403", "messages_p202404"], "archived": ["messages_p202312"]}
+    assert attached(pg_engine) == ["messages_p202401", "messages_p202402", "messages_p202403", "messages_p202404"]
+    with pg_engine.connect() as conn:
+        # Arşivlenen partition verisiyle birlikte arşiv şemasında
+        assert conn.execute(text(f"SELECT count(*) FROM {ARCHIVE}.messages_p202312")).scalar() == 1
+        assert conn.execute(text("SELECT count(*) FROM messages")).scalar() == 1
+
+    # İkinci çalıştırma bir şey yapmaz
+    assert manager.run(date(2024, 2, 20)) == {"created": [], "archived": []}
+
+@postgres
+def test_skips_while_another_worker_holds_lock(pg_engine):
+    manager = MessagePartitionManager(months_ahead=2, retention_months=1, archive_schema=ARCHIVE)
+    with pg_engine.connect() as other:
+        other.execute(text("SELECT pg_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID})
+        assert manager.run(date(2024, 2, 20)) == {"created": [], "archived": []}
+        other.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID})
+    assert attached(pg_engine) == ["messages_p202312", "messages_p202401", "messages_p202402"]
@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import Session
+from app.models.block import Block
+from app.models.conversation import Conversation
+from app.models.message import Message
+from app.services import message_writer as message_writer_module
+from app.services.block_graph import block_graph
+from app.services.conversation_service import ConversationService
+from app.services.counters import user_counters, MESSAGES
+from app.services.message_writer import MessageWriter, MessageRejected
+
+@pytest.fixture
+def writer(users, async_session, monkeypatch):
+    monkeypatch.setattr(message_writer_module, "AsyncSessionLocal", async_session)
+    return MessageWriter(batch_size=50, flush_ms=5, max_pending=100)
+
+def run(writer, *submits):
+    """Yazıcıyı başlat, gönderimleri aynı anda yap, durdur"""
+    async def main():
+        writer.start()
+        try:
+            return await asyncio.gather(*(writer.submit(*args) for args in submits), return_exceptions=True)
+        finally:
+            await writer.stop()
+    return asyncio.run(main())
+
+def test_batch_written_in_one_flush(writer, engine, monkeypatch):
+    batches = []
+    flush = writer._flush
+
+    async def record(batch):
+        batches.append(len(batch))
+        await flush(batch)
+
+    monkeypatch.setattr(writer, "_flush", record)
+    results = run(writer, *[(1 + i % 2, 2 - i % 2, f"m{i}") for i in range(20)])
+
+    assert batches == [20]
+    assert [m.content for m in results] == [f"m{i}" for i in range(20)]
+    assert all(m.id and m.created_at for m in results)
+    with Session(engine) as db:
+        [summary] = db.scalars(select(Conversation)).all()
+        assert (summary.last_message_id, summary.unread_low, summary.unread_high) == (results[-1].id, 10, 10)
+    assert user_counters.get(1)[MESSAGES] == 10
+
+def test_rejected_messages_do_not_drop_batch(writer, engine):
+    with Session(engine) as db:
+        db.add(Block(user_id=3, blocked_user_id=1))
+        db.commit()
+    block_graph.invalidate(3, 1)
+
+    ok, missing, blocked = run(writer, (1, 2, "ok"), (1, 99, "nobody"), (1, 3, "blocked"))
+    assert ok.content == "ok"
+    assert isinstance(missing, MessageRejected)
+    assert isinstance(blocked, MessageRejected)
+    with Session(engine) as db:
+        assert db.scalars(select(Message.content)).all() == ["ok"]
+
+def test_invalid_message_rejected_before_queue(writer):
+    [result] = run(writer, (1, 2, ""))
+    assert isinstance(result, MessageRejected)
+
+def test_stop_flushes_pending(writer, engine):
+    async def main():
+        writer.start()
+        pending = [asyncio.ensure_future(writer.submit(1, 2, f"m{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        await writer.stop()
+        return await asyncio.gather(*pending)
+
+    assert [m.content for m in asyncio.run(main())] == ["m0", "m1", "m2"]
+
+def test_summary_upsert_rows_in_pair_order():
+    captured = []
+
+    class FakeSession:
+        def get_bind(self):
+            return type("Bind", (), {"dialect": sqlite.dialect()})()
+
+        async def execute(self, stmt):
+            captured.append(stmt)
+
+    messages = [
+        Message(id=1, sender_id=5, receiver_id=4, content="a"),
+        Message(id=2, sender_id=1, receiver_id=3, content="b"),
+        Message(id=3, sender_id=2, receiver_id=1, content="c"),
+    ]
+    asyncio.run(ConversationService.record_messages(FakeSession(), messages))
+    params = captured[0].compile(dialect=sqlite.dialect()).params
+    pairs = [(params[f"user_low_id_m{i}"], params[f"user_high_id_m{i}"]) for i in range(3)]
+    assert pairs == [(1, 2), (1, 3), (4, 5)]
@@ -0,0 +1,85 @@
+from datetime import datetime
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.models.message import Message
+from app.models.room import Room
+from app.utils.pagination import (
+    decode_cursor, decode_rank_cursor, encode_cursor, encode_rank_cursor, finish_page,
+)
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+class Row:
+    def __init__(self, row_id):
+        self.id = row_id
+        self.created_at = datetime(2024, 1, 1, 12, 0, row_id)
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 8, 30, 15, 123456)
+    cursor = encode_cursor(created_at, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, 42)
+    assert decode_rank_cursor(encode_rank_cursor(0.1 + 0.2, 7)) == (0.1 + 0.2, 7)
+
+@pytest.mark.parametrize("cursor", ["", "!!!", encode_rank_cursor(1.5, 3), "MTIz"])
+def test_invalid_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
+
+def test_finish_page_sets_next_cursor():
+    response = Response()
+    rows = finish_page([Row(i) for i in range(1, 5)], 3, response)
+    assert [row.id for row in rows] == [1, 2, 3]
+    assert decode_cursor(response.headers["X-Next-Cursor"]) == (rows[-1].created_at, 3)
+
+    response = Response()
+    assert len(finish_page([Row(1)], 3, response)) == 1
+    assert "X-Next-Cursor" not in response.headers
+
+def same_created_at(engine, model):
+    """
+    Tüm satırlara aynı zaman: sıra id ile ayrılmalı.
+    SQLite'ta server_default (CURRENT_TIMESTAMP) mikrosaniyesiz metin yazar, ORM ile yazılır.
+    """
+    with Session(engine) as db:
+        db.execute(update(model).values(created_at=NOW))
+        db.commit()
+
+def test_chat_history_cursor_pages(api, engine):
+    for i in range(5):
+        api.login(1 if i % 2 else 2)
+        assert api.post(f"/chats/{2 if i % 2 else 1}", json={"content": f"m{i}"}).status_code == 200
+    same_created_at(engine, Message)
+    api.login(1)
+
+    seen, cursor = [], None
+    while True:
+        page = api.get("/chats/2", params={"limit": 2, **({"cursor": cursor} if cursor else {})})
+        assert page.status_code == 200
+        seen += [m["content"] for m in page.json()]
+        cursor = page.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    # Atlama/tekrar yok
+    assert seen == [f"m{i}" for i in range(5)]
+    assert api.get("/chats/2", params={"cursor": "bozuk"}).status_code == 400
+
+def create_room(api, name):
+    response = api.post("/rooms/", json={"name": name})
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+def test_rooms_cursor_is_stable_under_inserts(api, engine):
+    ids = [create_room(api, f"oda{i}") for i in range(4)]
+    same_created_at(engine, Room)
+
+    first = api.get("/rooms/", params={"limit": 2})
+    assert [room["id"] for room in first.json()] == ids[:1:-1]
+    # Araya giren yeni oda sonraki sayfayı kaydırmaz
+    create_room(api, "yeni")
+    second = api.get("/rooms/", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    assert [room["id"] for room in second.json()] == ids[1::-1]
+    assert "X-Next-Cursor" not in second.headers
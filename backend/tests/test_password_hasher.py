@@ -0,0 +1,83 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from app.services.password_hasher import PasswordHasher
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(workers=1, max_pending=2)
+    yield hasher
+    hasher.shutdown()
+
+@pytest.fixture
+def threaded():
+    """Havuzu thread'lerle değiştirilmiş hasher: işler testin bıraktığı olayı bekler"""
+    hasher = PasswordHasher(workers=2, max_pending=1)
+    hasher._executor = ThreadPoolExecutor(max_workers=2)
+    release = threading.Event()
+
+    def job(value):
+        release.wait(5)
+        return value
+
+    yield hasher, job, release
+    release.set()
+    hasher.shutdown()
+
+def test_hash_and_verify(hasher):
+    async def run():
+        hashed = await hasher.hash("gizli-sifre")
+        return hashed, await hasher.verify_and_update("gizli-sifre", hashed), await hasher.verify_and_update("yanlis", hashed)
+
+    hashed, (valid, new_hash), (invalid, _) = asyncio.run(run())
+    assert hashed.startswith("$2")
+    assert valid and new_hash is None
+    assert not invalid
+
+def test_verify_rehashes_old_cost(hasher):
+    old = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("gizli-sifre")
+
+    valid, new_hash = asyncio.run(hasher.verify_and_update("gizli-sifre", old))
+    assert valid
+    assert new_hash is not None and new_hash != old
+
+def test_full_pool_returns_503(threaded):
+    hasher, job, release = threaded
+
+    async def run():
+        first = asyncio.ensure_future(hasher._run(job, "a"))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as exc:
+            await hasher._run(job, "b")
+        release.set()
+        return exc.value, await first
+
+    error, result = asyncio.run(run())
+    assert error.status_code == 503
+    assert error.headers == {"Retry-After": "1"}
+    assert result == "a"
+
+def test_cancelled_request_keeps_slot_until_job_finishes(threaded):
+    hasher, job, release = threaded
+
+    async def run():
+        task = asyncio.ensure_future(hasher._run(job, "a"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # İş hâlâ çalışıyor: havuz sınırı aşılmamalı
+        with pytest.raises(HTTPException):
+            await hasher._run(job, "b")
+        release.set()
+        for _ in range(100):
+            if hasher._slots.acquire(blocking=False):
+                hasher._slots.release()
+                return True
+            await asyncio.sleep(0.01)
+        return False
+
+    assert asyncio.run(run())
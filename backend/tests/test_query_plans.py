@@ -0,0 +1,197 @@
+"""
+Sıcak sorguların (sohbet, arkadaşlar, engeller, odalar) index kullandığını EXPLAIN ile doğrular.
+Gerçek PostgreSQL gerekir: TEST_DATABASE_URL tek kullanımlık bir veritabanını göstermeli
+(tablolar silinip yeniden oluşturulur; pg_trgm eklentisi kurulabilmeli). Ayarlı değilse atlanır.
+"""
+import os
+import pytest
+from sqlalchemy import create_engine, select, update, func, or_, and_, desc, text
+from app.core.database import Base
+from app.models.block import Block
+from app.models.friendship import Friendship, FriendshipStatus
+from app.models.message import Message, ensure_search_schema
+from app.models.notification import Notification
+from app.models.room import RoomParticipant
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL ayarlı değil (PostgreSQL gerekir)")
+
+USERS = 500
+
+# Mesaj/ilişki çiftleri: gönderen 1..USERS, alıcı gönderenden farklı
+SEED = [
+    f"""
+    INSERT INTO users (email, username, hashed_password, is_active, role, subscription_tier)
+    SELECT 'user' || g || '@example.com', 'user' || g, 'x', true, 'student', 'free'
+    FROM generate_series(1, {USERS}) g
+    """,
+    f"""
+    INSERT INTO messages (sender_id, receiver_id, content, message_type, is_read, created_at)
+    SELECT s, 1 + (s + g % ({USERS} - 1)) % {USERS}, 'mesaj ' || g, 'text', g % 10 <> 0,
+           now() - g * interval '1 minute'
+    FROM (SELECT g, 1 + (g * 7919) % {USERS} AS s FROM generate_series(1, 50000) g) t
+    """,
+    f"""
+    INSERT INTO friendships (user_id, friend_id, requester_id, status)
+    SELECT s, 1 + (s + g / {USERS}) % {USERS}, s,
+           (CASE WHEN g % 4 = 0 THEN 'PENDING' ELSE 'ACCEPTED' END)::friendshipstatus
+    FROM (SELECT g, 1 + g % {USERS} AS s FROM generate_series(0, 19999) g) t
+    """,
+    f"""
+    INSERT INTO blocks (user_id, blocked_user_id)
+    SELECT 1 + g % {USERS}, 1 + (g % {USERS} + 1 + g / {USERS}) % {USERS}
+    FROM generate_series(0, 4999) g
+    """,
+    """
+    INSERT INTO rooms (name, room_type, owner_id, max_participants, is_active)
+    SELECT 'oda ' || g, 'public', 1 + g % 500, 50, true
+    FROM generate_series(1, 1000) g
+    """,
+    f"""
+    INSERT INTO room_participants (room_id, user_id, role, is_muted, is_banned)
+    SELECT 1 + g % 1000, 1 + (g / 1000 + g) % {USERS}, 'member', false, g % 20 = 0
+    FROM generate_series(0, 29999) g
+    """,
+    f"""
+    INSERT INTO notifications (user_id, type, title, body, is_read)
+    SELECT 1 + g % {USERS}, 'system', 'başlık', 'içerik', g % 10 <> 0
+    FROM generate_series(0, 19999) g
+    """,
+]
+
+@pytest.fixture(scope="module")
+def pg_engine():
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for statement in SEED:
+            conn.execute(text(statement))
+        conn.execute(text("ANALYZE"))
+    yield engine
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+def conversation(a: int, b: int):
+    return or_(
+        and_(Message.sender_id == a, Message.receiver_id == b),
+        and_(Message.sender_id == b, Message.receiver_id == a)
+    )
+
+def friendship_pair(a: int, b: int):
+    return or_(
+        and_(Friendship.user_id == a, Friendship.friend_id == b),
+        and_(Friendship.user_id == b, Friendship.friend_id == a)
+    )
+
+# İki yönlü sohbet OR'u sıralı index taramasıyla okunamaz; iki çift index'i de aynı işi görür
+MESSAGE_PAIR = ("idx_messages_sender_receiver_created", "idx_messages_receiver_sender")
+
+# (sorgu, kullanılması gereken index'ler; demet = bunlardan biri) - endpoint'lerdeki sorgu biçimleri
+QUERIES = {
+    "chat_history_keyset": (
+        select(Message).where(conversation(1, 2)).order_by(Message.created_at, Message.id).limit(51),
+        [MESSAGE_PAIR],
+    ),
+    "chat_history_before_id": (
+        select(Message).where(conversation(1, 2), Message.id < 40000).order_by(desc(Message.id)).limit(51),
+        [MESSAGE_PAIR],
+    ),
+    "chat_unread_count": (
+        select(func.count(Message.id)).where(Message.receiver_id == 1, Message.is_read.isnot(True)),
+        ["idx_messages_unread"],
+    ),
+    "chat_mark_conversation_read": (
+        update(Message)
+        .where(Message.receiver_id == 1, Message.sender_id == 2, Message.is_read.isnot(True))
+        .values(is_read=True, read_at=func.now())
+        .returning(Message.id),
+        ["idx_messages_unread"],
+    ),
+    "unread_counters": (
+        select(Message.receiver_id, func.count(Message.id))
+        .where(Message.receiver_id.in_([1, 2, 3]), Message.is_read.isnot(True))
+        .group_by(Message.receiver_id),
+        ["idx_messages_unread"],
+    ),
+    "friends_list": (
+        select(Friendship).where(
+            or_(
+                and_(Friendship.user_id == 1, Friendship.friend_id != 1),
+                and_(Friendship.friend_id == 1, Friendship.user_id != 1)
+            ),
+            Friendship.status == FriendshipStatus.ACCEPTED
+        ),
+        ["idx_friendships_user_friend_status", "idx_friendships_friend_status"],
+    ),
+    "friend_requests_received": (
+        select(Friendship).where(Friendship.friend_id == 1, Friendship.status == FriendshipStatus.PENDING),
+        ["idx_friendships_friend_status"],
+    ),
+    "friend_requests_sent": (
+        select(Friendship).where(Friendship.requester_id == 1, Friendship.status == FriendshipStatus.PENDING),
+        ["idx_friendships_pending_requester"],
+    ),
+    "friendship_status": (
+        select(Friendship).where(friendship_pair(1, 2)).limit(1),
+        ["idx_friendships_user_friend_status"],
+    ),
+    "block_relations": (
+        select(Block.user_id, Block.blocked_user_id).where(
+            or_(Block.user_id.in_([1, 2]), Block.blocked_user_id.in_([1, 2]))
+        ),
+        ["idx_blocks_user_blocked", "idx_blocks_blocked_user"],
+    ),
+    "room_participant_lookup": (
+        select(RoomParticipant).where(RoomParticipant.room_id == 1, RoomParticipant.user_id == 2),
+        ["idx_room_participants_room_user_banned"],
+    ),
+    "room_participant_count": (
+        select(func.count(RoomParticipant.id)).where(
+            RoomParticipant.room_id == 1,
+            RoomParticipant.is_banned == False
+        ),
+        ["idx_room_participants_room_user_banned"],
+    ),
+    "notifications_unread_count": (
+        select(Notification.user_id, func.count(Notification.id))
+        .where(Notification.user_id.in_([1, 2, 3]), Notification.is_read == False)
+        .group_by(Notification.user_id),
+        ["idx_notifications_unread"],
+    ),
+}
+
+def explain(conn, statement) -> str:
+    sql = statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    return "\n".join(row[0] for row in conn.exec_driver_sql(f"EXPLAIN {sql}"))
+
+@pytest.mark.parametrize("name", sorted(QUERIES))
+def test_query_uses_index(pg_engine, name):
+    statement, indexes = QUERIES[name]
+    with pg_engine.connect() as conn:
+        # Küçük tablolarda seq scan daha ucuz görünebilir; burada index'in kullanılabilir olduğu test edilir
+        conn.exec_driver_sql("SET enable_seqscan = off")
+        plan = explain(conn, statement)
+        conn.rollback()
+    assert "Seq Scan" not in plan, plan
+    for index in indexes:
+        alternatives = index if isinstance(index, tuple) else (index,)
+        assert any(name in plan for name in alternatives), plan
+
+def test_ensure_search_schema_adds_missing_column(pg_engine):
+    # create_all öncesinden kalan veritabanı: arama kolonu ve index'leri yok
+    with pg_engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS idx_messages_search"))
+        conn.execute(text("DROP INDEX IF EXISTS idx_messages_content_trgm"))
+        conn.execute(text("ALTER TABLE messages DROP COLUMN search_vector"))
+
+    assert ensure_search_schema(pg_engine) is True
+    assert ensure_search_schema(pg_engine) is False
+    with pg_engine.connect() as conn:
+        conn.exec_driver_sql("SET enable_seqscan = off")
+        plan = "\n".join(row[0] for row in conn.exec_driver_sql(
+            "EXPLAIN SELECT id FROM messages WHERE search_vector @@ websearch_to_tsquery('simple', 'mesaj')"
+        ))
+        conn.rollback()
+    assert "idx_messages_search" in plan, plan
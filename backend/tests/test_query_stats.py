@@ -0,0 +1,65 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.config import settings
+from app.core.query_stats import QueryBudgetExceeded, query_budget, query_metrics, statement_shape
+from app.middleware import QueryStatsMiddleware
+
+@pytest.fixture
+def make_client(engine, monkeypatch):
+    """Her satır için ayrı sorgu çalıştıran (N+1) bütçeli endpoint'li uygulama"""
+    def make(environment="development", strict=True):
+        monkeypatch.setattr(settings, "ENVIRONMENT", environment)
+        monkeypatch.setattr(settings, "QUERY_BUDGET_STRICT", strict)
+        factory = sessionmaker(bind=engine)
+
+        def get_db():
+            with factory() as db:
+                yield db
+
+        app = FastAPI()
+        app.add_middleware(QueryStatsMiddleware)
+
+        @app.get("/rows/{n}")
+        @query_budget(2)
+        def rows(n: int, db: Session = Depends(get_db)):
+            return [db.execute(text("SELECT :i"), {"i": i}).scalar() for i in range(n)]
+
+        return TestClient(app)
+    return make
+
+def test_statement_shape_collapses_parameter_lists():
+    assert statement_shape("SELECT *\n  FROM users WHERE id IN (?, ?, ?)") == "SELECT * FROM users WHERE id IN (?)"
+    assert statement_shape("SELECT * FROM users WHERE id IN ($1, $2)") == statement_shape("SELECT * FROM users WHERE id IN ($3)")
+    assert statement_shape("SELECT * FROM users WHERE id IN (%(id_1)s, %(id_2)s)") == "SELECT * FROM users WHERE id IN (?)"
+
+def test_within_budget_headers(make_client):
+    response = make_client().get("/rows/2")
+    assert response.json() == [0, 1]
+    assert response.headers["x-db-query-budget"] == "2"
+    assert response.headers["x-db-endpoint-query-count"] == "2"
+    assert "x-db-n-plus-one" not in response.headers
+
+def test_strict_mode_raises_when_over_budget(make_client):
+    with pytest.raises(QueryBudgetExceeded):
+        make_client().get("/rows/3")
+
+def test_over_budget_and_n_plus_one_flagged(make_client):
+    response = make_client(strict=False).get("/rows/6")
+    assert response.status_code == 200
+    assert response.headers["x-db-endpoint-query-count"] == "6"
+    assert response.headers["x-db-n-plus-one"] == str(settings.QUERY_N_PLUS_ONE_THRESHOLD + 1)
+
+def test_metrics_count_over_budget_routes(make_client):
+    client = make_client(environment="production", strict=False)
+    before = query_metrics.snapshot().get("GET /rows/{n}", {"requests": 0, "over_budget": 0, "n_plus_one": 0})
+    client.get("/rows/1")
+    client.get("/rows/6")
+
+    after = query_metrics.snapshot()["GET /rows/{n}"]
+    assert after["requests"] - before["requests"] == 2
+    assert after["over_budget"] - before["over_budget"] == 1
+    assert after["n_plus_one"] - before["n_plus_one"] == 1
+    assert "x-db-query-count" not in client.get("/rows/1").headers
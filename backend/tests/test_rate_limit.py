@@ -0,0 +1,130 @@
+import pytest
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.testclient import TestClient
+from starlette.testclient import WebSocketDenialResponse
+from app.core.config import settings
+from app.middleware import rate_limit
+from app.middleware.rate_limit import RateLimitMiddleware, route_cost
+from app.models.user import User
+from app.services.auth import AuthService
+from app.services.tier_cache import tier_cache
+from app.services.file_service import MAX_FILE_SIZE
+
+API = settings.API_V1_STR
+
+@pytest.fixture
+def quotas(monkeypatch):
+    """Küçük kotalar: ad -> (normal, premium, pencere)"""
+    def set_quota(bucket, limit, premium=None, window=60):
+        monkeypatch.setitem(rate_limit.QUOTAS, bucket, (limit, premium or limit, window))
+    return set_quota
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware)
+
+    @app.get("/health")
+    def health():
+        return {"ok": True}
+
+    @app.get(f"{API}/notes")
+    def notes():
+        return []
+
+    @app.post(f"{API}/ai/chat")
+    def ai_chat():
+        return {}
+
+    @app.post(f"{API}/ai/summarize")
+    def ai_summarize():
+        return {}
+
+    return TestClient(app)
+
+def test_route_cost():
+    assert route_cost("POST", f"{API}/ai/chat", None) == ("ai", 2)
+    assert route_cost("POST", f"{API}/ai/generate-quiz", None) == ("ai", 3)
+    assert route_cost("POST", f"{API}/ai/summarize", None) == ("ai", 1)
+    assert route_cost("GET", f"{API}/ai/history", None) == ("requests", 1)
+    assert route_cost("POST", f"{API}/files/upload", "2048") == ("upload", 2048)
+    assert route_cost("POST", f"{API}/files/upload", "0") == ("upload", 1)
+    # Başlık yoksa (chunked) veya bozuksa en büyük yükleme kadar harcanır
+    assert route_cost("POST", f"{API}/files/upload", None) == ("upload", MAX_FILE_SIZE)
+    assert route_cost("POST", f"{API}/files/upload", "abc") == ("upload", MAX_FILE_SIZE)
+
+def test_weighted_routes_spend_their_own_bucket(client, quotas):
+    quotas("ai", 5)
+    quotas("requests", 100)
+
+    assert client.post(f"{API}/ai/chat").headers["x-ratelimit-remaining"] == "3"
+    assert client.post(f"{API}/ai/chat").headers["x-ratelimit-bucket"] == "ai"
+    assert client.post(f"{API}/ai/chat").status_code == 429
+    assert client.post(f"{API}/ai/summarize").status_code == 200
+    assert client.post(f"{API}/ai/summarize").status_code == 429
+
+    response = client.get(f"{API}/notes")
+    assert response.status_code == 200
+    assert response.headers["x-ratelimit-bucket"] == "requests"
+    assert response.headers["x-ratelimit-remaining"] == "99"
+
+def test_rejection_is_429_with_retry_after(client, quotas):
+    quotas("requests", 2)
+    client.get(f"{API}/notes")
+    client.get(f"{API}/notes")
+
+    response = client.get(f"{API}/notes")
+    assert response.status_code == 429
+    assert response.json()["detail"].startswith("Too many requests")
+    assert 1 <= int(response.headers["retry-after"]) <= 30
+    assert client.get("/health").status_code == 200
+
+def test_premium_token_gets_premium_limit(client, quotas, users):
+    quotas("requests", 1, premium=3)
+    tier_cache.remember(User(id=2, username="bob", subscription_tier="premium"))
+    token = AuthService.create_access_token(AuthService.build_access_claims(2, "bob", "premium", "student"))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert [client.get(f"{API}/notes", headers=headers).status_code for _ in range(4)] == [200, 200, 200, 429]
+    # Anonim istemci IP'ye göre ayrı sayılır
+    assert client.get(f"{API}/notes").headers["x-ratelimit-limit"] == "1"
+
+@pytest.fixture
+def ws_client():
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware)
+
+    @app.websocket("/ws")
+    async def echo(websocket: WebSocket):
+        await websocket.accept()
+        try:
+            while True:
+                await websocket.send_text(await websocket.receive_text())
+        except WebSocketDisconnect:
+            pass
+
+    return TestClient(app)
+
+def test_websocket_connect_quota(ws_client, quotas):
+    quotas("ws_connect", 2)
+    for _ in range(2):
+        with ws_client.websocket_connect("/ws") as ws:
+            ws.send_text("x")
+            assert ws.receive_text() == "x"
+
+    # TestClient websocket.http.response'u destekler: handshake gerçek 429 ile reddedilir
+    with pytest.raises(WebSocketDenialResponse) as exc:
+        with ws_client.websocket_connect("/ws"):
+            pass
+    assert exc.value.status_code == 429
+    assert "retry-after" in exc.value.headers
+
+def test_websocket_message_quota(ws_client, quotas):
+    quotas("ws_messages", 3)
+    with ws_client.websocket_connect("/ws") as ws:
+        for i in range(3):
+            ws.send_text(str(i))
+            assert ws.receive_text() == str(i)
+        ws.send_text("fazla")
+        message = ws.receive()
+    assert message == {"type": "websocket.close", "code": 1008, "reason": "Too many messages"}
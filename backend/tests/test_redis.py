@@ -0,0 +1,44 @@
+import asyncio
+import pytest
+import redis
+from app.core import redis as redis_module
+from app.core.config import settings
+from app.core.redis import InMemoryRedis, get_redis, set_redis, wait_for_redis
+
+@pytest.fixture
+def real_redis_settings(monkeypatch):
+    monkeypatch.setattr(settings, "REDIS_IN_MEMORY", False)
+    set_redis(None)
+    yield
+    set_redis(None)
+
+def test_in_memory_only_when_configured():
+    set_redis(None)
+    assert isinstance(get_redis(), InMemoryRedis)
+
+def test_real_client_without_fallback(real_redis_settings):
+    # Bağlantı ilk komutta kurulur; ulaşılamazsa komut hata verir, yedeğe geçilmez
+    client = get_redis()
+    assert isinstance(client, redis.Redis)
+    assert get_redis() is client
+
+def test_wait_for_redis_retries_then_fails(monkeypatch):
+    calls, delays = [], []
+
+    class Down:
+        async def ping(self):
+            calls.append(1)
+            raise redis.exceptions.ConnectionError("refused")
+
+    async def no_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(redis_module, "get_async_redis", lambda: Down())
+    monkeypatch.setattr(redis_module.asyncio, "sleep", no_sleep)
+    with pytest.raises(RuntimeError):
+        asyncio.run(wait_for_redis(3, delay=0.5))
+    assert (len(calls), delays) == (3, [0.5, 1.0])
+
+def test_wait_for_redis_in_memory():
+    set_redis(InMemoryRedis())
+    asyncio.run(wait_for_redis(1))
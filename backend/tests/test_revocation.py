@@ -0,0 +1,50 @@
+import asyncio
+import time
+from app.core.redis import get_redis
+from app.services.revocation import AccessTokenRevocation, BloomFilter, REVOKED_KEY, REVOKED_VERSION_KEY, revocation_ids
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"jti:{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    false_positives = sum(f"other:{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+def test_revocation_ids():
+    assert revocation_ids({"sid": 7, "jti": "ab"}) == ("sid:7", "jti:ab")
+    assert revocation_ids({"sub": "alice"}) == ()
+
+def test_revoke_visible_locally_and_after_sync_elsewhere(engine):
+    worker_a = AccessTokenRevocation(capacity=100, error_rate=0.01)
+    worker_b = AccessTokenRevocation(capacity=100, error_rate=0.01)
+    worker_b.sync()
+
+    worker_a.revoke(["jti:x"])
+    assert worker_a.is_revoked(("sid:1", "jti:x"))
+    # Diğer worker'ın filtresi senkronizasyona kadar eski
+    assert not worker_b.is_revoked(("jti:x",))
+    worker_b.sync()
+    assert worker_b.is_revoked(("jti:x",))
+    assert asyncio.run(worker_b.is_revoked_async(("jti:x",)))
+    assert not asyncio.run(worker_b.is_revoked_async(("jti:y",)))
+
+def test_revoke_sessions(engine):
+    revocation = AccessTokenRevocation(capacity=100, error_rate=0.01)
+    revocation.revoke_sessions([3, 4])
+    assert revocation.is_revoked(("sid:4", "jti:z"))
+    assert not revocation.is_revoked(("sid:5",))
+
+def test_expired_revocations_dropped(engine):
+    revocation = AccessTokenRevocation(capacity=100, error_rate=0.01)
+    revocation.revoke(["jti:old"])
+    # Access token ömrü dolmuş: filtre eşleşse de Redis'teki süre belirleyici
+    get_redis().zadd(REVOKED_KEY, {"jti:old": time.time() - 1})
+    assert not revocation.is_revoked(("jti:old",))
+
+    get_redis().incr(REVOKED_VERSION_KEY)
+    revocation.sync()
+    assert get_redis().zscore(REVOKED_KEY, "jti:old") is None
+    assert "jti:old" not in revocation._filter
@@ -0,0 +1,49 @@
+def usernames(response):
+    return sorted(p["username"] for p in response.json())
+
+def create_room(api, **fields):
+    response = api.post("/rooms/", json={"name": "Matematik", **fields})
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+def test_join_and_participants(api):
+    room_id = create_room(api)
+    api.login(2)
+    assert api.post(f"/rooms/{room_id}/join").json()["message"] == "Odaya katıldınız"
+    assert api.post(f"/rooms/{room_id}/join").json()["message"] == "Zaten bu odadasınız"
+
+    assert usernames(api.get(f"/rooms/{room_id}/participants")) == ["alice", "bob"]
+    assert api.get(f"/rooms/{room_id}").json()["participant_count"] == 2
+
+def test_banned_user_excluded_and_cannot_rejoin(api):
+    room_id = create_room(api)
+    for user_id in (2, 3):
+        api.login(user_id)
+        api.post(f"/rooms/{room_id}/join")
+
+    api.login(2)
+    assert api.post(f"/rooms/{room_id}/ban/3").status_code == 403
+    api.login(1)
+    assert api.post(f"/rooms/{room_id}/ban/3").status_code == 200
+
+    assert usernames(api.get(f"/rooms/{room_id}/participants")) == ["alice", "bob"]
+    assert api.get(f"/rooms/{room_id}").json()["participant_count"] == 2
+    api.login(3)
+    assert api.post(f"/rooms/{room_id}/join").status_code == 403
+
+def test_full_room_rejects_join(api):
+    room_id = create_room(api, max_participants=2)
+    api.login(2)
+    assert api.post(f"/rooms/{room_id}/join").status_code == 200
+    api.login(3)
+    assert api.post(f"/rooms/{room_id}/join").status_code == 400
+
+def test_owner_leaving_hands_over_room(api):
+    room_id = create_room(api)
+    api.login(2)
+    api.post(f"/rooms/{room_id}/join")
+    api.login(1)
+    assert api.post(f"/rooms/{room_id}/leave").status_code == 200
+
+    [participant] = api.get(f"/rooms/{room_id}/participants").json()
+    assert (participant["username"], participant["role"]) == ("bob", "owner")
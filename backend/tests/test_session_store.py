@@ -0,0 +1,83 @@
+import time
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.orm import Session
+from app.core.redis import get_redis
+from app.models.session import UserSession
+from app.models.user import User
+from app.services.auth import AuthService
+from app.services.session_store import (
+    RefreshSessionStore, refresh_session_store, flush_sessions, ACTIVITY_KEY, REVOKED_KEY
+)
+
+@pytest.fixture
+def session(engine, users):
+    """(refresh token, kullanıcı) - Postgres'te ve Redis'te kayıtlı oturum"""
+    with Session(engine) as db:
+        user = db.get(User, 1)
+        row = UserSession(user_id=1, session_token="tok", expires_at=datetime.utcnow() + timedelta(days=7))
+        db.add(row)
+        db.commit()
+        refresh_session_store.put("tok", row.id, user, row.expires_at)
+        return "tok", user
+
+def session_row(engine, token="tok"):
+    with Session(engine) as db:
+        return db.query(UserSession).filter(UserSession.session_token == token).one()
+
+def test_refresh_served_from_redis(engine, session):
+    token, user = session
+    cached = refresh_session_store.get(token)
+    assert (cached["user_id"], cached["username"]) == (1, "alice")
+
+    access = AuthService.refresh_access_token(None, token)  # Redis'te varsa DB'ye gidilmez
+    assert AuthService.decode_access_token(access)["uid"] == 1
+
+def test_refresh_reloads_from_postgres_after_forget(engine, session):
+    token, _ = session
+    refresh_session_store.forget_user(1)
+    assert refresh_session_store.get(token) is None
+
+    with Session(engine) as db:
+        assert AuthService.refresh_access_token(db, token) is not None
+    assert refresh_session_store.get(token) is not None
+
+def test_revoked_token_stays_dead(engine, session):
+    token, _ = session
+    refresh_session_store.revoke(token, user_id=1)
+    with Session(engine) as db:
+        # Postgres'e henüz yazılmadı; tombstone DB'den yeniden yüklemeyi engeller
+        assert AuthService.refresh_access_token(db, token) is None
+
+    assert flush_sessions() == 1
+    assert session_row(engine).is_active is False
+
+def test_flush_writes_naive_utc_last_active(engine, session):
+    token, _ = session
+    now = time.time()
+    get_redis().hset(ACTIVITY_KEY, token, now)
+
+    assert flush_sessions() == 1
+    last_active = session_row(engine).last_active
+    assert last_active.tzinfo is None
+    assert abs((last_active - datetime.utcfromtimestamp(now)).total_seconds()) < 1
+    assert get_redis().hgetall(ACTIVITY_KEY) == {}
+
+def test_failed_flush_requeues_activity_and_revocations(engine, session, monkeypatch):
+    token, _ = session
+    redis = get_redis()
+    redis.hset(ACTIVITY_KEY, token, 100.0)
+    redis.hset(ACTIVITY_KEY, "other", 100.0)
+    redis.sadd(REVOKED_KEY, "dead")
+
+    def fail(db, activity, revoked):
+        # Yazma sürerken aynı token tekrar kullanıldı
+        redis.hset(ACTIVITY_KEY, token, 200.0)
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(RefreshSessionStore, "_write", staticmethod(fail))
+    with pytest.raises(RuntimeError):
+        flush_sessions()
+
+    assert redis.hgetall(ACTIVITY_KEY) == {token: "200.0", "other": "100.0"}
+    assert redis.smembers(REVOKED_KEY) == {"dead"}
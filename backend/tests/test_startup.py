@@ -0,0 +1,23 @@
+import os
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_import_has_no_side_effects(tmp_path):
+    # Ulaşılamayan servislerle import başarılı olmalı; dizin oluşturulmaz, ağır modüller yüklenmez
+    env = {
+        **os.environ,
+        "PYTHONPATH": BACKEND,
+        "POSTGRES_SERVER": "127.0.0.1",
+        "POSTGRES_PORT": "1",
+        "REDIS_HOST": "127.0.0.1",
+        "REDIS_PORT": "1",
+        "REDIS_IN_MEMORY": "false",
+    }
+    code = "import sys, app.main; print(sorted(m for m in ('PIL', 'httpx') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+    assert list(tmp_path.iterdir()) == []
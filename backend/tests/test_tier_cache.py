@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from sqlalchemy.orm import Session, sessionmaker
+from app.models.user import User
+from app.services import tier_cache as tier_cache_module
+from app.services.tier_cache import TierCache, tier_cache
+
+@pytest.fixture
+def loads(engine, users, monkeypatch):
+    """Veritabanından yapılan seviye okumaları"""
+    calls = []
+    factory = sessionmaker(bind=engine)
+
+    def session():
+        calls.append(1)
+        return factory()
+
+    monkeypatch.setattr(tier_cache_module, "SessionLocal", session)
+    tier_cache._cache.clear()
+    yield calls
+    tier_cache._cache.clear()
+
+def resolve(cache, **kwargs):
+    return asyncio.run(cache.resolve(**kwargs))
+
+def test_resolve_cached_after_first_load(engine, loads):
+    with Session(engine) as db:
+        db.get(User, 2).subscription_tier = "premium"
+        db.commit()
+    loads.clear()
+    cache = TierCache(max_size=10, ttl_seconds=60, negative_ttl_seconds=5)
+
+    assert resolve(cache, user_id=2) == "premium"
+    assert resolve(cache, user_id=2) == "premium"
+    assert resolve(cache, username="alice") == "free"
+    assert len(loads) == 2
+
+def test_unknown_user_negatively_cached(loads):
+    cache = TierCache(max_size=10, ttl_seconds=60, negative_ttl_seconds=5)
+
+    assert resolve(cache, user_id=99) == "free"
+    assert resolve(cache, user_id=99) == "free"
+    assert len(loads) == 1
+
+def test_orm_writes_invalidate_singleton(engine, loads):
+    assert resolve(tier_cache, username="erin") == "free"
+    assert resolve(tier_cache, user_id=1) == "free"
+
+    with Session(engine) as db:
+        db.add(User(username="erin", email="erin@example.com", hashed_password="x", subscription_tier="pro"))
+        user = db.get(User, 1)
+        user.subscription_tier = "edu"
+        user.username = "alicia"
+        db.commit()
+
+    loads.clear()
+    # Kayıt negatif önbelleği, güncelleme eski kullanıcı adını da düşürür
+    assert resolve(tier_cache, username="erin") == "pro"
+    assert resolve(tier_cache, user_id=1) == "edu"
+    assert resolve(tier_cache, username="alice") == "free"
+    assert resolve(tier_cache, username="alicia") == "edu"
+    assert len(loads) == 4
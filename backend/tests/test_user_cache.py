@@ -0,0 +1,102 @@
+import asyncio
+import time
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.api.v1.endpoints.auth import get_current_user
+from app.models.user import User
+from app.services.auth import AuthService
+from app.services.revocation import access_token_revocation
+from app.services.user_cache import UserCache, user_cache
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
+@pytest.fixture
+def current_user(engine, users, async_session):
+    """Token ile get_current_user; çalışan SELECT sayısını da döndürür"""
+    def call(token):
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine.__class__, "before_cursor_execute", count)
+
+        async def run():
+            async with async_session() as db:
+                return await get_current_user(token, db)
+        try:
+            return asyncio.run(run()), len(statements)
+        finally:
+            event.remove(engine.__class__, "before_cursor_execute", count)
+    return call
+
+def token_for(user_id: int, username: str) -> str:
+    return AuthService.create_access_token(AuthService.build_access_claims(user_id, username, "free", "student"))
+
+def test_second_request_skips_database(current_user):
+    token = token_for(1, "alice")
+
+    user, queries = current_user(token)
+    assert (user.id, user.username, queries) == (1, "alice", 1)
+    user, queries = current_user(token)
+    assert (user.username, queries) == ("alice", 0)
+
+def test_user_update_invalidates_all_tokens(engine, current_user):
+    tokens = [token_for(1, "alice"), token_for(1, "alice")]
+    other = token_for(2, "bob")
+    for token in tokens + [other]:
+        current_user(token)
+
+    with Session(engine) as db:
+        db.get(User, 1).full_name = "Alice A."
+        db.commit()
+
+    assert all(user_cache.get(token) is None for token in tokens)
+    assert user_cache.get(other) is not None
+    user, queries = current_user(tokens[0])
+    assert (user.full_name, queries) == ("Alice A.", 1)
+
+def test_deleted_user_rejected(engine, current_user):
+    token = token_for(4, "dave")
+    current_user(token)
+    with Session(engine) as db:
+        db.delete(db.get(User, 4))
+        db.commit()
+
+    with pytest.raises(HTTPException) as exc:
+        current_user(token)
+    assert exc.value.status_code == 401
+
+def test_revoked_cached_token_rejected(current_user):
+    token = token_for(1, "alice")
+    current_user(token)
+    _, ids = user_cache.get(token)
+    access_token_revocation.revoke(ids)
+
+    with pytest.raises(HTTPException):
+        current_user(token)
+
+def test_entry_does_not_outlive_token(users):
+    cache = UserCache(ttl_seconds=60, max_size=10)
+    cache.set("expired", users[1], token_exp=time.time() - 1)
+    cache.set("valid", users[1], token_exp=time.time() + 30)
+
+    assert cache.get("expired") is None
+    assert cache.get("valid")[0].username == "alice"
+
+def test_user_index_pruned_when_entries_evicted(users):
+    cache = UserCache(ttl_seconds=60, max_size=1)
+    for user_id in (1, 2, 3, 4):
+        cache.set(f"t{user_id}", users[user_id])
+
+    assert len(cache._cache) == 1
+    assert cache._indexed <= 2 * cache.max_size
+    assert set(cache._tokens_by_user) <= {3, 4}
+    cache.invalidate_user(4)
+    assert cache.get("t4") is None